@@ -0,0 +1,136 @@
+"""add account closure
+
+Revision ID: 5c35c26867af
+Revises: 842b82061f4c
+Create Date: 2026-10-17 15:48:33.105274
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5c35c26867af"
+down_revision: Union[str, None] = "842b82061f4c"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Advisory lock key serializing the writers of account_closure
+_CLOSURE_LOCK = "hashtext('account_closure')"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "account_closure",
+        sa.Column("ancestor_id", sa.UUID(), nullable=False),
+        sa.Column("descendant_id", sa.UUID(), nullable=False),
+        sa.Column("depth", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["ancestor_id"], ["accounts.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["descendant_id"], ["accounts.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("ancestor_id", "descendant_id"),
+    )
+    op.create_index(
+        "ix_account_closure_descendant_id", "account_closure", ["descendant_id"]
+    )
+    # Inserts and parent changes patch the closure of the affected subtree, rows
+    # of deleted accounts go with the foreign key cascade. The writers share an
+    # advisory lock, moves and full rebuilds take it exclusively, so concurrent
+    # inserts do not wait for each other but never see a half moved subtree.
+    # Parent cycles are cut.
+    op.execute(f"""
+        CREATE FUNCTION rebuild_account_closure() RETURNS void
+        LANGUAGE sql AS $$
+            SELECT pg_advisory_xact_lock({_CLOSURE_LOCK});
+            DELETE FROM account_closure;
+            INSERT INTO account_closure (ancestor_id, descendant_id, depth)
+            WITH RECURSIVE closure (ancestor_id, descendant_id, depth) AS (
+                SELECT id, id, 0 FROM accounts
+                UNION ALL
+                SELECT closure.ancestor_id, accounts.id, closure.depth + 1
+                FROM closure
+                JOIN accounts ON accounts.parent_id = closure.descendant_id
+            ) CYCLE descendant_id SET is_cycle USING path
+            SELECT ancestor_id, descendant_id, min(depth)
+            FROM closure
+            WHERE NOT is_cycle
+            GROUP BY ancestor_id, descendant_id;
+        $$
+        """)
+    op.execute("""
+        CREATE FUNCTION attach_account_closure(node uuid, parent uuid) RETURNS void
+        LANGUAGE sql AS $$
+            -- Every ancestor of the parent becomes an ancestor of the subtree,
+            -- unless the parent is part of the subtree, which would be a cycle
+            INSERT INTO account_closure (ancestor_id, descendant_id, depth)
+            SELECT above.ancestor_id, below.descendant_id, above.depth + below.depth + 1
+            FROM account_closure AS above
+            CROSS JOIN account_closure AS below
+            WHERE above.descendant_id = parent
+                AND below.ancestor_id = node
+                AND NOT EXISTS (
+                    SELECT 1 FROM account_closure
+                    WHERE ancestor_id = node AND descendant_id = parent
+                )
+            ON CONFLICT DO NOTHING;
+        $$
+        """)
+    op.execute(f"""
+        CREATE FUNCTION account_closure_trigger() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                PERFORM pg_advisory_xact_lock_shared({_CLOSURE_LOCK});
+                INSERT INTO account_closure (ancestor_id, descendant_id, depth)
+                VALUES (NEW.id, NEW.id, 0)
+                ON CONFLICT DO NOTHING;
+                -- Children inserted before their parent by the same statement
+                PERFORM attach_account_closure(child.id, NEW.id)
+                FROM accounts AS child
+                WHERE child.parent_id = NEW.id AND child.id <> NEW.id;
+            ELSE
+                PERFORM pg_advisory_xact_lock({_CLOSURE_LOCK});
+                -- Detach the subtree from the ancestors outside of it
+                DELETE FROM account_closure AS link
+                USING account_closure AS below
+                WHERE below.ancestor_id = NEW.id
+                    AND link.descendant_id = below.descendant_id
+                    AND link.ancestor_id NOT IN (
+                        SELECT descendant_id FROM account_closure
+                        WHERE ancestor_id = NEW.id
+                    );
+            END IF;
+            IF NEW.parent_id IS NOT NULL THEN
+                PERFORM attach_account_closure(NEW.id, NEW.parent_id);
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """)
+    op.execute("""
+        CREATE TRIGGER account_closure_insert
+        AFTER INSERT ON accounts
+        FOR EACH ROW EXECUTE FUNCTION account_closure_trigger()
+        """)
+    op.execute("""
+        CREATE TRIGGER account_closure_move
+        AFTER UPDATE OF parent_id ON accounts
+        FOR EACH ROW
+        WHEN (OLD.parent_id IS DISTINCT FROM NEW.parent_id)
+        EXECUTE FUNCTION account_closure_trigger()
+        """)
+    op.execute("SELECT rebuild_account_closure()")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER account_closure_move ON accounts")
+    op.execute("DROP TRIGGER account_closure_insert ON accounts")
+    op.execute("DROP FUNCTION account_closure_trigger()")
+    op.execute("DROP FUNCTION attach_account_closure(uuid, uuid)")
+    op.execute("DROP FUNCTION rebuild_account_closure()")
+    op.drop_index("ix_account_closure_descendant_id", table_name="account_closure")
+    op.drop_table("account_closure")
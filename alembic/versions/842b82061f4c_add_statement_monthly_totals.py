@@ -0,0 +1,75 @@
+"""add statement monthly totals
+
+Revision ID: 842b82061f4c
+Revises: b2443c36f293
+Create Date: 2026-10-17 15:02:18.640512
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "842b82061f4c"
+down_revision: Union[str, None] = "b2443c36f293"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "statement_monthly_totals",
+        sa.Column("month", sa.Date(), nullable=False),
+        sa.Column("account_iban", sa.String(), nullable=False),
+        sa.Column("account_name", sa.String(), nullable=False),
+        sa.Column("tag_id", sa.UUID(), nullable=True),
+        sa.Column("total", sa.BigInteger(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["tag_id"], ["tags.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(
+            ["account_iban", "account_name"],
+            ["accounts.iban", "accounts.name"],
+            name="fk_statement_monthly_totals_account",
+        ),
+        sa.UniqueConstraint(
+            "month",
+            "account_iban",
+            "account_name",
+            "tag_id",
+            name="uq_statement_monthly_totals",
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
+    op.create_index(
+        "ix_statement_monthly_totals_account_month",
+        "statement_monthly_totals",
+        ["account_iban", "account_name", "month"],
+    )
+    # Backfill every month that already has statements
+    op.execute("""
+        INSERT INTO statement_monthly_totals
+            (month, account_iban, account_name, tag_id, total, count)
+        SELECT
+            date_trunc('month', statements.date AT TIME ZONE 'UTC')::date,
+            statements.account_iban,
+            statements.account_name,
+            tags_to_statement.tag_id,
+            sum(statements.amount),
+            count(*)
+        FROM statements
+        LEFT JOIN tags_to_statement ON tags_to_statement.statement_id = statements.id
+        GROUP BY 1, 2, 3, 4
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_statement_monthly_totals_account_month",
+        table_name="statement_monthly_totals",
+    )
+    op.drop_table("statement_monthly_totals")
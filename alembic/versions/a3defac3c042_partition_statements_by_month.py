@@ -0,0 +1,161 @@
+"""partition statements by month
+
+Revision ID: a3defac3c042
+Revises: ea796d650fc1
+Create Date: 2026-10-17 11:03:27.916052
+
+"""
+
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a3defac3c042"
+down_revision: Union[str, None] = "ea796d650fc1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+STATEMENT_COLUMNS = """
+    id UUID NOT NULL,
+    date TIMESTAMP WITH TIME ZONE NOT NULL,
+    interest_date TIMESTAMP WITH TIME ZONE NOT NULL,
+    amount INTEGER NOT NULL,
+    account_iban VARCHAR NOT NULL,
+    account_name VARCHAR NOT NULL DEFAULT '',
+    counterparty_iban VARCHAR,
+    counterparty_name VARCHAR,
+    description VARCHAR,
+    CONSTRAINT fk_statements_source_account
+        FOREIGN KEY (account_iban, account_name) REFERENCES accounts (iban, name),
+    CONSTRAINT fk_statements_destination_account
+        FOREIGN KEY (counterparty_iban, counterparty_name)
+        REFERENCES accounts (iban, name),
+    CONSTRAINT uq_statements_natural_key UNIQUE NULLS NOT DISTINCT
+        (account_iban, date, amount, counterparty_iban, counterparty_name)
+"""
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _rename_old_table() -> None:
+    op.execute("ALTER TABLE statements RENAME TO statements_old")
+    op.execute(
+        "ALTER TABLE statements_old "
+        "RENAME CONSTRAINT statements_pkey TO statements_old_pkey"
+    )
+    op.execute(
+        "ALTER TABLE statements_old "
+        "RENAME CONSTRAINT uq_statements_natural_key TO uq_statements_old_natural_key"
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The partitioned table's unique keys must contain the partition key, so the
+    # id alone can no longer be referenced by a foreign key. The links carry the
+    # statement date instead and reference (id, date).
+    op.drop_constraint(
+        "tags_to_statement_statement_id_fkey", "tags_to_statement", type_="foreignkey"
+    )
+    _rename_old_table()
+
+    op.execute(f"""
+        CREATE TABLE statements (
+            {STATEMENT_COLUMNS},
+            CONSTRAINT statements_pkey PRIMARY KEY (id, date)
+        ) PARTITION BY RANGE (date)
+        """)
+    op.execute("CREATE TABLE statements_default PARTITION OF statements DEFAULT")
+
+    connection = op.get_bind()
+    first_date = connection.execute(
+        sa.text("SELECT min(date) FROM statements_old")
+    ).scalar()
+    this_month = datetime.now(timezone.utc).date().replace(day=1)
+    month = (
+        first_date.astimezone(timezone.utc).date().replace(day=1)
+        if first_date is not None
+        else this_month
+    )
+    last_month = _add_months(this_month, MONTHS_AHEAD)
+    while month <= last_month:
+        next_month = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE statements_y{month.year:04d}m{month.month:02d} "
+            "PARTITION OF statements "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+            f"TO ('{next_month.isoformat()} 00:00:00+00')"
+        )
+        month = next_month
+
+    op.execute(
+        "INSERT INTO statements (id, date, interest_date, amount, account_iban, "
+        "account_name, counterparty_iban, counterparty_name, description) "
+        "SELECT id, date, interest_date, amount, account_iban, account_name, "
+        "counterparty_iban, counterparty_name, description FROM statements_old"
+    )
+    op.execute("DROP TABLE statements_old")
+
+    op.add_column(
+        "tags_to_statement",
+        sa.Column("statement_date", sa.TIMESTAMP(timezone=True), nullable=True),
+    )
+    op.execute(
+        "UPDATE tags_to_statement AS tts SET statement_date = statements.date "
+        "FROM statements WHERE statements.id = tts.statement_id"
+    )
+    op.execute("DELETE FROM tags_to_statement WHERE statement_date IS NULL")
+    op.alter_column("tags_to_statement", "statement_date", nullable=False)
+    op.create_foreign_key(
+        "fk_tags_to_statement_statement",
+        "tags_to_statement",
+        "statements",
+        ["statement_id", "statement_date"],
+        ["id", "date"],
+        ondelete="CASCADE",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(
+        "fk_tags_to_statement_statement", "tags_to_statement", type_="foreignkey"
+    )
+    op.drop_column("tags_to_statement", "statement_date")
+    _rename_old_table()
+
+    op.execute(f"""
+        CREATE TABLE statements (
+            {STATEMENT_COLUMNS},
+            CONSTRAINT statements_pkey PRIMARY KEY (id)
+        )
+        """)
+    op.execute(
+        "INSERT INTO statements (id, date, interest_date, amount, account_iban, "
+        "account_name, counterparty_iban, counterparty_name, description) "
+        "SELECT id, date, interest_date, amount, account_iban, account_name, "
+        "counterparty_iban, counterparty_name, description FROM statements_old"
+    )
+    # Dropping the partitioned table drops all of its partitions
+    op.execute("DROP TABLE statements_old")
+
+    op.execute(
+        "DELETE FROM tags_to_statement AS tts WHERE NOT EXISTS "
+        "(SELECT 1 FROM statements WHERE statements.id = tts.statement_id)"
+    )
+    op.create_foreign_key(
+        "tags_to_statement_statement_id_fkey",
+        "tags_to_statement",
+        "statements",
+        ["statement_id"],
+        ["id"],
+    )
@@ -0,0 +1,48 @@
+"""add statement lookup indexes
+
+Revision ID: b2443c36f293
+Revises: a3defac3c042
+Create Date: 2026-10-17 12:41:05.377190
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b2443c36f293"
+down_revision: Union[str, None] = "a3defac3c042"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_statements_date_id", "statements", ["date", "id"])
+    op.create_index(
+        "ix_statements_account_date",
+        "statements",
+        ["account_iban", "account_name", "date"],
+        postgresql_include=["amount"],
+    )
+    op.create_index(
+        "ix_statements_counterparty",
+        "statements",
+        ["counterparty_iban", "counterparty_name"],
+    )
+    op.create_index(
+        "ix_tags_to_statement_statement_id_tag_id",
+        "tags_to_statement",
+        ["statement_id", "tag_id"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_tags_to_statement_statement_id_tag_id", table_name="tags_to_statement"
+    )
+    op.drop_index("ix_statements_counterparty", table_name="statements")
+    op.drop_index("ix_statements_account_date", table_name="statements")
+    op.drop_index("ix_statements_date_id", table_name="statements")
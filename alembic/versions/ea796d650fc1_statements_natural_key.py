@@ -0,0 +1,137 @@
+"""statements natural key
+
+Revision ID: ea796d650fc1
+Revises: 6ef8c48bf3d4
+Create Date: 2026-10-17 09:12:41.208113
+
+"""
+
+import logging
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "ea796d650fc1"
+down_revision: Union[str, None] = "6ef8c48bf3d4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+# Statements merged into another statement with the same natural key, with the
+# tags they had. Kept after the upgrade so nothing is lost, drop them once the
+# merge is verified.
+DUPLICATES_BACKUP = "statements_natural_key_duplicates"
+# Tag links that were moved over to the kept statement
+MERGED_TAGS_BACKUP = "statements_natural_key_merged_tags"
+
+STATEMENT_COLUMNS = (
+    "id, date, interest_date, amount, account_iban, account_name, "
+    "counterparty_iban, counterparty_name, description"
+)
+
+
+def _prefixed(alias: str, columns: str) -> str:
+    return ", ".join(f"{alias}.{column}" for column in columns.split(", "))
+
+
+def _merge_duplicates() -> None:
+    op.execute(f"""
+        CREATE TABLE {MERGED_TAGS_BACKUP} AS
+        WITH moved AS (
+            INSERT INTO tags_to_statement (tag_id, statement_id)
+            SELECT DISTINCT unnest(d.tag_ids), d.keep_id
+            FROM {DUPLICATES_BACKUP} AS d
+            ON CONFLICT DO NOTHING
+            RETURNING tag_id, statement_id
+        )
+        SELECT tag_id, statement_id FROM moved
+        """)
+    op.execute(
+        "DELETE FROM tags_to_statement "
+        f"WHERE statement_id IN (SELECT id FROM {DUPLICATES_BACKUP})"
+    )
+    op.execute(
+        f"DELETE FROM statements WHERE id IN (SELECT id FROM {DUPLICATES_BACKUP})"
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Merge already imported duplicates into the first statement of their
+    # natural key, moving their tags over, so the constraint can be created.
+    op.execute(f"""
+        CREATE TABLE {DUPLICATES_BACKUP} AS
+        SELECT
+            {_prefixed("s", STATEMENT_COLUMNS)},
+            ranked.keep_id,
+            ARRAY(
+                SELECT tag_id FROM tags_to_statement WHERE statement_id = s.id
+            ) AS tag_ids
+        FROM (
+            SELECT
+                id,
+                first_value(id) OVER (
+                    PARTITION BY account_iban, date, amount,
+                        counterparty_iban, counterparty_name
+                    ORDER BY id
+                ) AS keep_id
+            FROM statements
+        ) AS ranked
+        JOIN statements AS s ON s.id = ranked.id
+        WHERE ranked.id <> ranked.keep_id
+        """)
+    connection = op.get_bind()
+    duplicates = connection.execute(
+        sa.text(f"SELECT count(*) FROM {DUPLICATES_BACKUP}")
+    ).scalar()
+    if not duplicates:
+        op.execute(f"DROP TABLE {DUPLICATES_BACKUP}")
+    else:
+        logger.warning(
+            f"Merging {duplicates} statements that duplicate the natural key of "
+            f"another statement, the removed rows are kept in {DUPLICATES_BACKUP}"
+        )
+        _merge_duplicates()
+
+    op.create_unique_constraint(
+        "uq_statements_natural_key",
+        "statements",
+        ["account_iban", "date", "amount", "counterparty_iban", "counterparty_name"],
+        postgresql_nulls_not_distinct=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint("uq_statements_natural_key", "statements", type_="unique")
+
+    # Restore the merged duplicates and their own tags, unless the backups were
+    # already dropped after verifying the merge
+    connection = op.get_bind()
+    backups_exist = connection.execute(
+        sa.text("SELECT to_regclass(:name) IS NOT NULL"),
+        {"name": DUPLICATES_BACKUP},
+    ).scalar()
+    if not backups_exist:
+        return
+
+    op.execute(f"""
+        DELETE FROM tags_to_statement AS tts
+        USING {MERGED_TAGS_BACKUP} AS merged
+        WHERE tts.tag_id = merged.tag_id
+            AND tts.statement_id = merged.statement_id
+        """)
+    op.execute(
+        f"INSERT INTO statements ({STATEMENT_COLUMNS}) "
+        f"SELECT {STATEMENT_COLUMNS} FROM {DUPLICATES_BACKUP}"
+    )
+    op.execute(f"""
+        INSERT INTO tags_to_statement (tag_id, statement_id)
+        SELECT unnest(tag_ids), id FROM {DUPLICATES_BACKUP}
+        """)
+    op.execute(f"DROP TABLE {MERGED_TAGS_BACKUP}")
+    op.execute(f"DROP TABLE {DUPLICATES_BACKUP}")
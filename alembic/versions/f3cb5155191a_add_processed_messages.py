@@ -0,0 +1,44 @@
+"""add processed messages
+
+Revision ID: f3cb5155191a
+Revises: 5c35c26867af
+Create Date: 2026-10-17 16:27:51.930846
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f3cb5155191a"
+down_revision: Union[str, None] = "5c35c26867af"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "processed_messages",
+        sa.Column("queue", sa.String(), nullable=False),
+        sa.Column("message_id", sa.String(), nullable=False),
+        sa.Column(
+            "processed_at",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("queue", "message_id"),
+    )
+    op.create_index(
+        "ix_processed_messages_processed_at", "processed_messages", ["processed_at"]
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_processed_messages_processed_at", table_name="processed_messages")
+    op.drop_table("processed_messages")
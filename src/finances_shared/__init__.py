@@ -1,6 +1,8 @@
-from .logger import add_log_context, get_logger
+from .logger import add_global_log_context, add_log_context, get_logger, log_context
 
 __all__ = [
     "get_logger",
     "add_log_context",
+    "add_global_log_context",
+    "log_context",
 ]
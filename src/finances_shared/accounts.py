@@ -0,0 +1,437 @@
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from logging import Logger
+
+import aio_pika
+from aio_pika.abc import AbstractConnection, AbstractIncomingMessage
+from sqlalchemy import ColumnElement, literal, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from finances_shared.models import Account, Statements
+from finances_shared.models.models import account_closure_table
+from finances_shared.serializers import decode_body, get_serializer
+
+ACCOUNTS_CHANGED_EXCHANGE = "accounts.changed"
+
+AccountKey = tuple[str, str]
+
+# Parent chains are walked at most this deep, so a cycle can not recurse forever
+MAX_ACCOUNT_DEPTH = 100
+
+
+@dataclass(frozen=True, slots=True)
+class CanonicalAccount:
+    """The root account an (iban, name) pair resolves to through its parents"""
+
+    id: uuid.UUID
+    iban: str
+    name: str
+    nickname: str
+
+
+@dataclass(frozen=True, slots=True)
+class AccountAlias:
+    """An account of an alias tree and its distance from the root"""
+
+    id: uuid.UUID
+    iban: str
+    name: str
+    nickname: str
+    parent_id: uuid.UUID | None
+    depth: int
+
+
+class AccountCache:
+    """
+    In-process cache resolving (iban, name) pairs to their canonical root account.
+
+    Entries expire after `ttl` seconds and the least recently used entries are
+    evicted above `max_size`. Pairs without an account are cached as well, so
+    unknown accounts do not query the database on every statement. The cache can
+    be warmed up from the `accounts` table in one query and invalidated through
+    the `accounts.changed` broadcast.
+
+    Usage:
+    ```python
+    account_cache = AccountCache()
+    async with get_db_session() as session:
+        await account_cache.warm_up(session)
+    await account_cache.subscribe(listener.connection, logger)
+
+    root = await account_cache.resolve(session, statement.account_iban, statement.account_name)
+    ```
+    """
+
+    def __init__(self, ttl: float = 300.0, max_size: int = 10_000):
+        """
+        Args:
+            ttl (float): Seconds an entry is served from the cache.
+            max_size (int): Maximum number of cached (iban, name) pairs.
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[
+            AccountKey, tuple[float, CanonicalAccount | None]
+        ] = OrderedDict()
+        self._channel = None
+        self._queue = None
+        self._consumer_tag: str | None = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _put(self, key: AccountKey, account: CanonicalAccount | None, now: float):
+        self._entries[key] = (now + self.ttl, account)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _get_entry(
+        self, key: AccountKey
+    ) -> tuple[float, CanonicalAccount | None] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(self, iban: str, name: str) -> CanonicalAccount | None:
+        """
+        Get a cached canonical account without querying the database.
+
+        Args:
+            iban (str): The IBAN of the account.
+            name (str): The name of the account.
+
+        Returns:
+            CanonicalAccount | None: The canonical account, or None on a miss or
+                when the pair is cached as unknown.
+        """
+        entry = self._get_entry((iban, name))
+        return None if entry is None else entry[1]
+
+    async def warm_up(self, session: AsyncSession) -> int:
+        """
+        Load every account in one query and cache its canonical account.
+
+        Accounts whose parent chain is cyclic are skipped, so they are resolved
+        and rejected by `resolve` like any other miss.
+
+        Args:
+            session (AsyncSession): The database session.
+
+        Returns:
+            int: The number of cached accounts.
+        """
+        result = await session.execute(
+            select(
+                Account.id,
+                Account.iban,
+                Account.name,
+                Account.nickname,
+                Account.parent_id,
+            )
+        )
+        rows = {row.id: row for row in result}
+
+        roots: dict[uuid.UUID, CanonicalAccount] = {}
+        cyclic: set[uuid.UUID] = set()
+
+        def _root(account_id: uuid.UUID) -> CanonicalAccount | None:
+            chain = []
+            seen = set()
+            current = rows[account_id]
+            while current.id not in roots and current.parent_id in rows:
+                if current.id in cyclic or current.id in seen:
+                    cyclic.update(chain)
+                    return None
+                chain.append(current.id)
+                seen.add(current.id)
+                current = rows[current.parent_id]
+            root = roots.get(current.id) or CanonicalAccount(
+                id=current.id,
+                iban=current.iban,
+                name=current.name,
+                nickname=current.nickname,
+            )
+            roots[current.id] = root
+            for member in chain:
+                roots[member] = root
+            return root
+
+        now = time.monotonic()
+        cached = 0
+        for row in rows.values():
+            root = _root(row.id)
+            if root is not None:
+                self._put((row.iban, row.name), root, now)
+                cached += 1
+        return cached
+
+    async def resolve(
+        self, session: AsyncSession, iban: str, name: str
+    ) -> CanonicalAccount | None:
+        """
+        Resolve an (iban, name) pair to its canonical root account.
+
+        Args:
+            session (AsyncSession): The database session used on a cache miss.
+            iban (str): The IBAN of the account.
+            name (str): The name of the account.
+
+        Returns:
+            CanonicalAccount | None: The canonical account, or None if no account
+                has this IBAN and name.
+
+        Raises:
+            ValueError: If the parent chain of the account is cyclic or deeper
+                than `MAX_ACCOUNT_DEPTH`.
+        """
+        key = (iban, name)
+        entry = self._get_entry(key)
+        if entry is not None:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+
+        chain = (
+            select(Account.id, Account.parent_id, literal(0).label("depth"))
+            .where(Account.iban == iban, Account.name == name)
+            .cte("chain", recursive=True)
+        )
+        chain = chain.union_all(
+            select(Account.id, Account.parent_id, chain.c.depth + 1)
+            .join(chain, Account.id == chain.c.parent_id)
+            .where(chain.c.depth < MAX_ACCOUNT_DEPTH)
+        )
+        # The last account of the chain is the root, unless the depth cap cut it
+        row = (
+            await session.execute(
+                select(
+                    Account.id,
+                    Account.iban,
+                    Account.name,
+                    Account.nickname,
+                    chain.c.parent_id,
+                )
+                .join(chain, Account.id == chain.c.id)
+                .order_by(chain.c.depth.desc())
+                .limit(1)
+            )
+        ).first()
+        if row is None:
+            self._put(key, None, time.monotonic())
+            return None
+        if row.parent_id is not None:
+            raise ValueError(
+                f"Account ({iban}, {name}) has a cyclic parent chain or more than "
+                f"{MAX_ACCOUNT_DEPTH} levels"
+            )
+
+        account = CanonicalAccount(
+            id=row.id, iban=row.iban, name=row.name, nickname=row.nickname
+        )
+        self._put(key, account, time.monotonic())
+        return account
+
+    def invalidate(self, accounts: Iterable[AccountKey] | None = None) -> None:
+        """
+        Drop cached entries.
+
+        Args:
+            accounts (Iterable[AccountKey] | None): The changed (iban, name) pairs.
+                Their entries and every entry resolving to them are dropped.
+                Everything is dropped when not set.
+        """
+        if accounts is None:
+            self._entries.clear()
+            return
+
+        changed = set(accounts)
+        for key, (_, account) in list(self._entries.items()):
+            if key in changed or (
+                account is not None and (account.iban, account.name) in changed
+            ):
+                del self._entries[key]
+
+    async def subscribe(self, connection: AbstractConnection, logger: Logger):
+        """
+        Invalidate the cache on `accounts.changed` broadcast messages.
+
+        Every subscriber gets its own exclusive queue bound to the fanout
+        exchange, so every process drops its stale entries.
+
+        Args:
+            connection (AbstractConnection): An open RabbitMQ connection, e.g. the
+                connection of a `RabbitMQListener` or `RabbitMQProducer`.
+            logger (Logger): Logger instance.
+        """
+        self._channel = await connection.channel()
+        exchange = await self._channel.declare_exchange(
+            ACCOUNTS_CHANGED_EXCHANGE, aio_pika.ExchangeType.FANOUT, durable=True
+        )
+        self._queue = await self._channel.declare_queue(
+            exclusive=True, auto_delete=True
+        )
+        await self._queue.bind(exchange)
+
+        async def _on_message(message: AbstractIncomingMessage):
+            async with message.process(ignore_processed=True):
+                try:
+                    payload = decode_body(message.body, message.content_type)
+                except ValueError:
+                    payload = None
+                changed = (payload or {}).get("accounts")
+                self.invalidate(
+                    None if changed is None else [tuple(key) for key in changed]
+                )
+                logger.info(
+                    f"Invalidated account cache for "
+                    f"{'all accounts' if changed is None else changed}"
+                )
+
+        self._consumer_tag = await self._queue.consume(_on_message)
+        logger.info(f"Subscribed account cache to {ACCOUNTS_CHANGED_EXCHANGE}")
+
+    async def unsubscribe(self):
+        """Stop listening for invalidation messages."""
+        if self._queue is not None and self._consumer_tag is not None:
+            await self._queue.cancel(self._consumer_tag)
+        if self._channel is not None and not self._channel.is_closed:
+            await self._channel.close()
+        self._channel = None
+        self._queue = None
+        self._consumer_tag = None
+
+
+async def get_alias_tree(
+    session: AsyncSession, iban: str, name: str
+) -> list[AccountAlias]:
+    """
+    Get the whole alias tree an account belongs to in one recursive query.
+
+    The query walks up the parents to the root and then down to every alias of
+    the root, so siblings and their aliases are included as well.
+
+    Args:
+        session (AsyncSession): The database session.
+        iban (str): The IBAN of any account of the tree.
+        name (str): The name of the account.
+
+    Returns:
+        list[AccountAlias]: The accounts of the tree, the root first, then
+            ordered by depth. Empty if no account has this IBAN and name.
+    """
+    up = (
+        select(Account.id, Account.parent_id, literal(0).label("height"))
+        .where(Account.iban == iban, Account.name == name)
+        .cte("up", recursive=True)
+    )
+    up = up.union_all(
+        select(Account.id, Account.parent_id, up.c.height + 1)
+        .join(up, Account.id == up.c.parent_id)
+        .where(up.c.height < MAX_ACCOUNT_DEPTH)
+    )
+
+    down = (
+        select(up.c.id, literal(0).label("depth"))
+        .where(up.c.parent_id.is_(None))
+        .cte("down", recursive=True)
+    )
+    alias = aliased(Account)
+    down = down.union_all(
+        select(alias.id, down.c.depth + 1).join(down, alias.parent_id == down.c.id)
+    )
+
+    result = await session.execute(
+        select(
+            Account.id,
+            Account.iban,
+            Account.name,
+            Account.nickname,
+            Account.parent_id,
+            down.c.depth,
+        )
+        .join(down, Account.id == down.c.id)
+        .order_by(down.c.depth, Account.nickname)
+    )
+    return [AccountAlias(**row._mapping) for row in result]
+
+
+def account_tree_filter(account_id: uuid.UUID) -> ColumnElement[bool]:
+    """
+    Filter statements of an account and all of its aliases.
+
+    The aliases are read from the precomputed `account_closure` table, so the
+    filter is a single indexed lookup regardless of the depth of the tree.
+
+    Args:
+        account_id (uuid.UUID): The id of the account, usually a root account.
+
+    Returns:
+        ColumnElement[bool]: Criteria for `Statements` queries.
+
+    Example:
+        >>> page = await get_statements_page(
+        ...     session, account_tree_filter(root.id), limit=50
+        ... )
+    """
+    closure = account_closure_table.c
+    return tuple_(Statements.account_iban, Statements.account_name).in_(
+        select(Account.iban, Account.name)
+        .join(account_closure_table, closure.descendant_id == Account.id)
+        .where(closure.ancestor_id == account_id)
+    )
+
+
+async def rebuild_account_closure(session: AsyncSession):
+    """
+    Rebuild the `account_closure` table.
+
+    A trigger on `accounts` already keeps it up to date, this is only needed
+    after writes that bypass triggers, e.g. `session_replication_role = replica`.
+
+    Args:
+        session (AsyncSession): The database session, the caller commits.
+    """
+    await session.execute(text("SELECT rebuild_account_closure()"))
+
+
+async def publish_accounts_changed(
+    connection: AbstractConnection, accounts: Iterable[AccountKey] | None = None
+):
+    """
+    Broadcast that accounts changed, so every `AccountCache` invalidates them.
+
+    Args:
+        connection (AbstractConnection): An open RabbitMQ connection, e.g. the
+            connection of a `RabbitMQProducer`.
+        accounts (Iterable[AccountKey] | None): The changed (iban, name) pairs, or
+            None to invalidate every cached account. Pass None when a parent
+            changed, the aliases below the account resolve differently then.
+    """
+    serializer = get_serializer()
+    payload = {"accounts": None if accounts is None else [list(a) for a in accounts]}
+    channel = await connection.channel()
+    try:
+        exchange = await channel.declare_exchange(
+            ACCOUNTS_CHANGED_EXCHANGE, aio_pika.ExchangeType.FANOUT, durable=True
+        )
+        await exchange.publish(
+            aio_pika.Message(
+                body=serializer.dumps(payload),
+                content_type=serializer.content_type,
+            ),
+            routing_key="",
+        )
+    finally:
+        await channel.close()
@@ -0,0 +1,157 @@
+import uuid
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+
+from sqlalchemy import ARRAY, Date, bindparam, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from finances_shared.models import StatementMonthlyTotals
+
+# Concurrent refreshes of the same month would both insert its rows
+_LOCK_TOTALS = text(
+    "SELECT pg_advisory_xact_lock(hashtext('statement_monthly_totals'))"
+)
+
+_DELETE_MONTHS = text(
+    "DELETE FROM statement_monthly_totals WHERE month = ANY(:months)"
+).bindparams(bindparam("months", type_=ARRAY(Date)))
+
+# Every month is a range on `statements.date`, so the scan only touches the
+# partitions and index ranges of the refreshed months.
+_RECOMPUTE_MONTHS = text("""
+    INSERT INTO statement_monthly_totals
+        (month, account_iban, account_name, tag_id, total, count)
+    SELECT
+        months.month,
+        statements.account_iban,
+        statements.account_name,
+        tags_to_statement.tag_id,
+        sum(statements.amount),
+        count(*)
+    FROM unnest(:months) AS months(month)
+    JOIN statements
+        ON statements.date >= months.month::timestamp AT TIME ZONE 'UTC'
+        AND statements.date
+            < (months.month + interval '1 month')::timestamp AT TIME ZONE 'UTC'
+    LEFT JOIN tags_to_statement ON tags_to_statement.statement_id = statements.id
+    GROUP BY 1, 2, 3, 4
+    """).bindparams(bindparam("months", type_=ARRAY(Date)))
+
+
+@dataclass
+class MonthlyTotal:
+    """Sum and count of the statement amounts of an account and tag in a month"""
+
+    month: date
+    account_iban: str
+    account_name: str
+    tag_id: uuid.UUID | None
+    total: int
+    count: int
+
+
+def statement_months(dates: Iterable[datetime]) -> set[date]:
+    """
+    Get the months touched by statement dates, e.g. of a freshly ingested batch.
+
+    Args:
+        dates (Iterable[datetime]): The statement dates, naive dates are UTC.
+
+    Returns:
+        set[date]: The first day of every touched month in UTC.
+    """
+    months = set()
+    for day in dates:
+        if day.tzinfo is not None:
+            day = day.astimezone(timezone.utc)
+        months.add(date(day.year, day.month, 1))
+    return months
+
+
+async def refresh_monthly_totals(session: AsyncSession, months: Iterable[date]) -> int:
+    """
+    Recompute `statement_monthly_totals` for the given months only.
+
+    Call it after ingesting or retagging statements with the months they touch,
+    see `statement_months`. The caller owns the transaction, concurrent refreshes
+    wait for each other until it ends.
+
+    Args:
+        session (AsyncSession): The database session.
+        months (Iterable[date]): Any day of every month to recompute.
+
+    Returns:
+        int: The number of summary rows written.
+
+    Example:
+        >>> async with get_db_session() as session:
+        ...     await bulk_upsert_statements(session, rows)
+        ...     await refresh_monthly_totals(
+        ...         session, statement_months(row["date"] for row in rows)
+        ...     )
+        ...     await session.commit()
+    """
+    months = sorted({date(month.year, month.month, 1) for month in months})
+    if not months:
+        return 0
+    await session.execute(_LOCK_TOTALS)
+    await session.execute(_DELETE_MONTHS, {"months": months})
+    result = await session.execute(_RECOMPUTE_MONTHS, {"months": months})
+    return result.rowcount
+
+
+async def get_monthly_totals(
+    session: AsyncSession,
+    start: date | None = None,
+    end: date | None = None,
+    account_iban: str | None = None,
+    account_name: str | None = None,
+    tag_ids: Iterable[uuid.UUID | None] | None = None,
+) -> list[MonthlyTotal]:
+    """
+    Read monthly totals from `statement_monthly_totals`.
+
+    Args:
+        session (AsyncSession): The database session.
+        start (date | None): First month to include.
+        end (date | None): Last month to include.
+        account_iban (str | None): Only this account IBAN.
+        account_name (str | None): Only this account name.
+        tag_ids (Iterable[uuid.UUID | None] | None): Only these tags, None in the
+            list selects the untagged statements.
+
+    Returns:
+        list[MonthlyTotal]: The totals ordered by month and account.
+    """
+    query = select(
+        StatementMonthlyTotals.month,
+        StatementMonthlyTotals.account_iban,
+        StatementMonthlyTotals.account_name,
+        StatementMonthlyTotals.tag_id,
+        StatementMonthlyTotals.total,
+        StatementMonthlyTotals.count,
+    ).order_by(
+        StatementMonthlyTotals.month,
+        StatementMonthlyTotals.account_iban,
+        StatementMonthlyTotals.account_name,
+    )
+    if start is not None:
+        query = query.where(
+            StatementMonthlyTotals.month >= date(start.year, start.month, 1)
+        )
+    if end is not None:
+        query = query.where(StatementMonthlyTotals.month <= end)
+    if account_iban is not None:
+        query = query.where(StatementMonthlyTotals.account_iban == account_iban)
+    if account_name is not None:
+        query = query.where(StatementMonthlyTotals.account_name == account_name)
+    if tag_ids is not None:
+        tag_ids = set(tag_ids)
+        condition = StatementMonthlyTotals.tag_id.in_(tag_ids - {None})
+        if None in tag_ids:
+            condition = condition | StatementMonthlyTotals.tag_id.is_(None)
+        query = query.where(condition)
+
+    result = await session.execute(query)
+    return [MonthlyTotal(**row._mapping) for row in result]
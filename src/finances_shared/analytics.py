@@ -0,0 +1,280 @@
+import uuid
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import BigInteger, ColumnElement, cast, extract, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from finances_shared.models import Statements
+from finances_shared.models.models import tags_to_statement_table
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+AccountKey = tuple[str | None, str | None]
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError(
+            "numpy is not installed. Install finances-shared[analytics] to use it."
+        )
+
+
+@dataclass
+class StatementArrays:
+    """
+    Statements in columnar form, one array element per statement.
+
+    Accounts, counterparties and tags are dictionary encoded: the code arrays
+    index into the `accounts`, `counterparties` and `tag_ids` lists. Tags are
+    stored as (row, tag) pairs since a statement can have any number of them.
+    """
+
+    date: "np.ndarray"  # datetime64[us] in UTC
+    amount: "np.ndarray"  # int64
+    account: "np.ndarray"  # int32 codes into `accounts`
+    counterparty: "np.ndarray"  # int32 codes into `counterparties`, -1 for none
+    accounts: list[AccountKey]
+    counterparties: list[AccountKey]
+    tag_rows: "np.ndarray"  # int64 statement row of every tag link
+    tag_codes: "np.ndarray"  # int32 codes into `tag_ids` of every tag link
+    tag_ids: list[uuid.UUID]
+
+    def __len__(self) -> int:
+        return len(self.amount)
+
+    def to_arrow(self) -> "pa.Table":
+        """
+        Convert to an Arrow table with dictionary encoded accounts and a list of
+        tag ids per statement.
+
+        Returns:
+            pa.Table: The table, one row per statement.
+        """
+        if pa is None:
+            raise ImportError(
+                "pyarrow is not installed. "
+                "Install finances-shared[analytics] to use it."
+            )
+
+        def _dictionary(codes, keys: list[AccountKey], index: int):
+            values = pa.array([key[index] for key in keys], type=pa.string())
+            indices = pa.array(codes, mask=codes < 0)
+            return pa.DictionaryArray.from_arrays(indices, values)
+
+        order = np.argsort(self.tag_rows, kind="stable")
+        offsets = np.zeros(len(self) + 1, dtype=np.int32)
+        np.cumsum(np.bincount(self.tag_rows, minlength=len(self)), out=offsets[1:])
+        tag_values = pa.array(
+            [str(self.tag_ids[code]) for code in self.tag_codes[order]],
+            type=pa.string(),
+        )
+        return pa.table(
+            {
+                "date": pa.array(self.date, type=pa.timestamp("us", tz="UTC")),
+                "amount": pa.array(self.amount),
+                "account_iban": _dictionary(self.account, self.accounts, 0),
+                "account_name": _dictionary(self.account, self.accounts, 1),
+                "counterparty_iban": _dictionary(
+                    self.counterparty, self.counterparties, 0
+                ),
+                "counterparty_name": _dictionary(
+                    self.counterparty, self.counterparties, 1
+                ),
+                "tag_ids": pa.ListArray.from_arrays(offsets, tag_values),
+            }
+        )
+
+
+def _encode(keys: list[Any], codes: dict[Any, int], key: Any) -> int:
+    code = codes.get(key)
+    if code is None:
+        code = codes[key] = len(keys)
+        keys.append(key)
+    return code
+
+
+async def load_statement_arrays(
+    session: AsyncSession, *where: ColumnElement[bool]
+) -> StatementArrays:
+    """
+    Load statements straight into columnar arrays, without ORM objects.
+
+    The dates are converted to epoch microseconds by the database, the tags are
+    aggregated per statement in the same query.
+
+    Args:
+        session (AsyncSession): The database session.
+        *where (ColumnElement[bool]): Filter criteria on `Statements`.
+
+    Returns:
+        StatementArrays: The statements ordered by date.
+
+    Example:
+        >>> arrays = await load_statement_arrays(
+        ...     session, Statements.date >= datetime(2025, 1, 1, tzinfo=timezone.utc)
+        ... )
+        >>> balances = running_balance(arrays)
+    """
+    _require_numpy()
+    tags = tags_to_statement_table.c
+    query = (
+        select(
+            cast(extract("epoch", Statements.date) * 1_000_000, BigInteger),
+            Statements.amount,
+            Statements.account_iban,
+            Statements.account_name,
+            Statements.counterparty_iban,
+            Statements.counterparty_name,
+            func.array_remove(func.array_agg(tags.tag_id), None),
+        )
+        .outerjoin(tags_to_statement_table, tags.statement_id == Statements.id)
+        .where(*where)
+        .group_by(Statements.id, Statements.date)
+        .order_by(Statements.date, Statements.id)
+    )
+    rows = (await session.execute(query)).all()
+
+    accounts: list[AccountKey] = []
+    account_codes: dict[AccountKey, int] = {}
+    counterparties: list[AccountKey] = []
+    counterparty_codes: dict[AccountKey, int] = {}
+    tag_ids: list[uuid.UUID] = []
+    tag_id_codes: dict[uuid.UUID, int] = {}
+
+    account = np.empty(len(rows), dtype=np.int32)
+    counterparty = np.empty(len(rows), dtype=np.int32)
+    tag_rows: list[int] = []
+    tag_codes: list[int] = []
+    for index, row in enumerate(rows):
+        account[index] = _encode(accounts, account_codes, (row[2], row[3]))
+        if row[4] is None and row[5] is None:
+            counterparty[index] = -1
+        else:
+            counterparty[index] = _encode(
+                counterparties, counterparty_codes, (row[4], row[5])
+            )
+        for tag_id in row[6]:
+            tag_rows.append(index)
+            tag_codes.append(_encode(tag_ids, tag_id_codes, tag_id))
+
+    return StatementArrays(
+        date=np.fromiter((row[0] for row in rows), np.int64, len(rows)).view(
+            "datetime64[us]"
+        ),
+        amount=np.fromiter((row[1] for row in rows), np.int64, len(rows)),
+        account=account,
+        counterparty=counterparty,
+        accounts=accounts,
+        counterparties=counterparties,
+        tag_rows=np.array(tag_rows, dtype=np.int64),
+        tag_codes=np.array(tag_codes, dtype=np.int32),
+        tag_ids=tag_ids,
+    )
+
+
+def running_balance(arrays: StatementArrays) -> "np.ndarray":
+    """
+    Compute the balance of every account after each of its statements.
+
+    Args:
+        arrays (StatementArrays): Statements ordered by date, as loaded by
+            `load_statement_arrays`.
+
+    Returns:
+        np.ndarray: int64 running balance per statement, aligned with the rows.
+    """
+    _require_numpy()
+    order = np.argsort(arrays.account, kind="stable")
+    amounts = arrays.amount[order]
+    totals = np.cumsum(amounts)
+    group_starts = np.flatnonzero(np.diff(arrays.account[order], prepend=-1))
+    # Subtract everything accumulated before the first row of each account
+    offsets = totals[group_starts] - amounts[group_starts]
+    group_sizes = np.diff(np.append(group_starts, len(order)))
+    balances = np.empty_like(totals)
+    balances[order] = totals - np.repeat(offsets, group_sizes)
+    return balances
+
+
+def monthly_sums(
+    arrays: StatementArrays,
+) -> tuple["np.ndarray", "np.ndarray", "np.ndarray", "np.ndarray"]:
+    """
+    Sum the amounts per account and month.
+
+    Args:
+        arrays (StatementArrays): The statements.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: The months
+            (datetime64[M]), the account codes, the int64 sums and the counts,
+            ordered by month and account.
+    """
+    _require_numpy()
+    account_count = max(len(arrays.accounts), 1)
+    months = arrays.date.astype("datetime64[M]").astype(np.int64)
+    keys = months * account_count + arrays.account
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    sums = np.zeros(len(unique_keys), dtype=np.int64)
+    np.add.at(sums, inverse, arrays.amount)
+    counts = np.bincount(inverse, minlength=len(unique_keys))
+    return (
+        (unique_keys // account_count).astype("datetime64[M]"),
+        (unique_keys % account_count).astype(np.int32),
+        sums,
+        counts,
+    )
+
+
+def tag_sums(arrays: StatementArrays) -> tuple["np.ndarray", "np.ndarray"]:
+    """
+    Sum the amounts per tag, statements with several tags count under each.
+
+    Args:
+        arrays (StatementArrays): The statements.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The int64 sums and the counts, indexed by
+            the codes of `arrays.tag_ids`.
+    """
+    _require_numpy()
+    sums = np.zeros(len(arrays.tag_ids), dtype=np.int64)
+    np.add.at(sums, arrays.tag_codes, arrays.amount[arrays.tag_rows])
+    counts = np.bincount(arrays.tag_codes, minlength=len(arrays.tag_ids))
+    return sums, counts
+
+
+def top_counterparties(
+    arrays: StatementArrays, n: int = 10
+) -> list[tuple[AccountKey, int, int]]:
+    """
+    Get the counterparties with the largest absolute total amount.
+
+    Args:
+        arrays (StatementArrays): The statements.
+        n (int): Number of counterparties to return.
+
+    Returns:
+        list[tuple[AccountKey, int, int]]: The (iban, name) pair, the total amount
+            and the number of statements of each counterparty, largest first.
+    """
+    _require_numpy()
+    known = arrays.counterparty >= 0
+    codes = arrays.counterparty[known]
+    sums = np.zeros(len(arrays.counterparties), dtype=np.int64)
+    np.add.at(sums, codes, arrays.amount[known])
+    counts = np.bincount(codes, minlength=len(arrays.counterparties))
+    top = np.argsort(-np.abs(sums), kind="stable")[:n]
+    return [
+        (arrays.counterparties[code], int(sums[code]), int(counts[code]))
+        for code in top
+    ]
@@ -1,28 +1,189 @@
+import time
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from logging import Logger
 
+from sqlalchemy import event, exc
+from sqlalchemy.engine import ExceptionContext
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
+from finances_shared import metrics
 from finances_shared.params import DatabaseParams
 
 _engine = None
 _async_session = None
+_pool_counters = {"connects": 0, "checkouts": 0, "invalidations": 0}
+_replicas: list["_Replica"] = []
+_replica_index = 0
+_replica_ejection_seconds = 30.0
+_logger: Logger | None = None
 
+_session_checkout_seconds = metrics.histogram(
+    "finances_db_session_checkout_seconds",
+    "Time to open a database session and check out its connection",
+    ("readonly",),
+)
+_active_sessions = metrics.gauge(
+    "finances_db_active_sessions",
+    "Database sessions opened with get_db_session and not yet closed",
+    ("readonly",),
+)
+_session_errors = metrics.counter(
+    "finances_db_session_errors",
+    "Errors opening a database session with get_db_session",
+    ("readonly",),
+)
 
-def init_db(logger: Logger):
-    global _engine, _async_session
-    db_params = DatabaseParams.from_env(logger)
+
+@dataclass
+class DatabasePoolStats:
+    """Snapshot of the connection pool of the database engine"""
+
+    pool_size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    connects: int
+    checkouts: int
+    invalidations: int
+
+
+@dataclass
+class _Replica:
+    """A read replica engine and its health state"""
+
+    name: str
+    engine: object
+    session_factory: sessionmaker
+    ejected_until: float = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return self.ejected_until <= time.monotonic()
+
+
+def _count_pool_event(counter: str):
+    def _listener(*args):
+        _pool_counters[counter] += 1
+
+    return _listener
+
+
+def init_db(
+    logger: Logger,
+    db_params: DatabaseParams | None = None,
+    replica_params: list[DatabaseParams] | None = None,
+    replica_ejection_seconds: float = 30.0,
+):
+    """
+    Initialize the database engine and session factory.
+
+    Args:
+        logger (Logger): Logger instance.
+        db_params (DatabaseParams | None): The primary database parameters, loaded
+            from the environment when not set.
+        replica_params (list[DatabaseParams] | None): Read replicas. Read-only
+            sessions are distributed over them round-robin.
+        replica_ejection_seconds (float): How long a replica is skipped after a
+            connection error.
+    """
+    global _engine, _async_session, _replica_ejection_seconds, _logger
+    _logger = logger
+    _replica_ejection_seconds = replica_ejection_seconds
+    if db_params is None:
+        db_params = DatabaseParams.from_env(logger)
     if _engine is None:
         _engine = create_async_engine(
-            db_params.connection_string(), echo=True, future=True
+            db_params.connection_string(),
+            future=True,
+            **db_params.pool.engine_kwargs(),
         )
+        pool = _engine.sync_engine.pool
+        event.listen(pool, "connect", _count_pool_event("connects"))
+        event.listen(pool, "checkout", _count_pool_event("checkouts"))
+        event.listen(pool, "invalidate", _count_pool_event("invalidations"))
+        for field in ("pool_size", "checked_in", "checked_out", "overflow"):
+            metrics.gauge(
+                f"finances_db_pool_{field}",
+                f"Database connection pool {field.replace('_', ' ')}",
+            ).set_function(lambda field=field: getattr(get_pool_stats(), field))
     if _async_session is None:
         _async_session = sessionmaker(
             bind=_engine,
             class_=AsyncSession,
             expire_on_commit=False,
         )
+    if replica_params and not _replicas:
+        for params in replica_params:
+            engine = create_async_engine(
+                params.connection_string(),
+                future=True,
+                **params.pool.engine_kwargs(),
+            )
+            replica = _Replica(
+                name=f"{params.host}:{params.port}",
+                engine=engine,
+                session_factory=sessionmaker(
+                    bind=engine,
+                    class_=AsyncSession,
+                    expire_on_commit=False,
+                ),
+            )
+            event.listen(
+                engine.sync_engine, "handle_error", _ejection_listener(replica)
+            )
+            _replicas.append(replica)
+
+
+def _pick_replica() -> _Replica | None:
+    global _replica_index
+    for _ in range(len(_replicas)):
+        replica = _replicas[_replica_index % len(_replicas)]
+        _replica_index += 1
+        if replica.healthy:
+            return replica
+    return None
+
+
+def _eject_replica(replica: _Replica, error: BaseException):
+    replica.ejected_until = time.monotonic() + _replica_ejection_seconds
+    if _logger is not None:
+        _logger.warning(
+            f"Ejecting read replica {replica.name} for "
+            f"{_replica_ejection_seconds}s after connection error: {error}"
+        )
+
+
+def _ejection_listener(replica: _Replica):
+    def _listener(context: ExceptionContext):
+        # Only connection level failures take the replica out of the rotation,
+        # a failing query on a healthy replica does not.
+        if context.is_disconnect:
+            _eject_replica(replica, context.original_exception)
+
+    return _listener
+
+
+def get_pool_stats() -> DatabasePoolStats:
+    """
+    Get the connection pool statistics of the database engine.
+
+    Returns:
+        DatabasePoolStats: The current pool usage and the cumulative counters.
+    """
+    if _engine is None:
+        raise RuntimeError("Database engine is not initialized. Call init_db() first.")
+    pool = _engine.sync_engine.pool
+    return DatabasePoolStats(
+        pool_size=pool.size(),
+        checked_in=pool.checkedin(),
+        checked_out=pool.checkedout(),
+        overflow=max(pool.overflow(), 0),
+        connects=_pool_counters["connects"],
+        checkouts=_pool_counters["checkouts"],
+        invalidations=_pool_counters["invalidations"],
+    )
 
 
 # Dependency for route handlers
@@ -33,18 +194,59 @@ async def get_db():
         yield session
 
 
+# Dependency for read-only route handlers, routed to the read replicas
+async def get_readonly_db():
+    if _async_session is None:
+        raise RuntimeError("Database session is not initialized. Call init_db() first.")
+    # Every replica is tried at most once, an ejection may already have expired
+    for _ in range(len(_replicas)):
+        replica = _pick_replica()
+        if replica is None:
+            break
+        session = replica.session_factory()
+        try:
+            # Connect up front so an unreachable replica is ejected and the
+            # next one is tried instead of failing the request
+            await session.connection()
+        except (OSError, exc.DBAPIError) as e:
+            await session.close()
+            _eject_replica(replica, e)
+            continue
+        async with session:
+            yield session
+        return
+
+    # Without a healthy replica the reads fall back to the primary
+    async with _async_session() as session:
+        yield session
+
+
 @asynccontextmanager
-async def get_db_session():
+async def get_db_session(readonly: bool = False):
     if _async_session is None:
         raise RuntimeError("Database session is not initialized. Call init_db() first.")
 
-    db_generator = get_db()
+    db_generator = get_readonly_db() if readonly else get_db()
+    label = "true" if readonly else "false"
+    active_sessions = _active_sessions.labels(label)
 
+    session = None
+    start = time.perf_counter()
     try:
-        session = await anext(db_generator)
-        yield session
-    except Exception as e:
-        raise RuntimeError(f"Error getting database session: {e}")
+        try:
+            session = await anext(db_generator)
+            # Check out the connection up front to measure the pool wait
+            await session.connection()
+        except Exception as e:
+            _session_errors.labels(label).inc()
+            raise RuntimeError(f"Error getting database session: {e}") from e
+        _session_checkout_seconds.labels(label).observe(time.perf_counter() - start)
+        active_sessions.inc()
+        try:
+            # Errors of the caller propagate unchanged
+            yield session
+        finally:
+            active_sessions.dec()
     finally:
         await db_generator.aclose()
         if session:
@@ -0,0 +1,271 @@
+import uuid
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from finances_shared.models import Account, Statements, Tags
+from finances_shared.serializers import Serializer, decode_body, get_serializer
+
+
+def _uuid(value: Any) -> uuid.UUID | None:
+    if value is None or isinstance(value, uuid.UUID):
+        return value
+    return uuid.UUID(value)
+
+
+def _datetime(value: Any) -> datetime:
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+
+@dataclass(slots=True)
+class StatementDTO:
+    """
+    Lightweight statement for messages, mirroring `Statements`.
+
+    On the wire a statement is a positional list instead of a dict, so the field
+    names are not repeated in every message.
+
+    Usage:
+    ```python
+    body = dump_statements(statements)
+    ...
+    statements = load_statements(message.body, message.content_type)
+    await bulk_upsert_statements(session, statements)
+    ```
+    """
+
+    date: datetime
+    interest_date: datetime
+    amount: int
+    account_iban: str
+    account_name: str = ""
+    counterparty_iban: str | None = None
+    counterparty_name: str | None = None
+    description: str | None = None
+    tags: tuple[str, ...] = ()
+    id: uuid.UUID = field(default_factory=uuid.uuid4)
+
+    def to_wire(self) -> list[Any]:
+        """
+        Encode as a positional list, see `from_wire`.
+
+        Returns:
+            list[Any]: The field values.
+        """
+        return [
+            self.id,
+            self.date,
+            self.interest_date,
+            self.amount,
+            self.account_iban,
+            self.account_name,
+            self.counterparty_iban,
+            self.counterparty_name,
+            self.description,
+            list(self.tags),
+        ]
+
+    @classmethod
+    def from_wire(cls, values: list[Any]) -> "StatementDTO":
+        """
+        Decode a list created by `to_wire` after a serializer round trip.
+
+        Args:
+            values (list[Any]): The field values.
+
+        Returns:
+            StatementDTO: The statement.
+        """
+        return cls(
+            id=_uuid(values[0]),
+            date=_datetime(values[1]),
+            interest_date=_datetime(values[2]),
+            amount=values[3],
+            account_iban=values[4],
+            account_name=values[5],
+            counterparty_iban=values[6],
+            counterparty_name=values[7],
+            description=values[8],
+            tags=tuple(values[9]),
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "StatementDTO":
+        """
+        Convert a statement dict of the older dict based messages.
+
+        Args:
+            data (dict[str, Any]): The statement with the `Statements` columns as
+                keys and an optional `tags` list of tag names.
+
+        Returns:
+            StatementDTO: The statement.
+        """
+        return cls(
+            id=_uuid(data.get("id")) or uuid.uuid4(),
+            date=_datetime(data["date"]),
+            interest_date=_datetime(data["interest_date"]),
+            amount=data["amount"],
+            account_iban=data["account_iban"],
+            account_name=data.get("account_name", ""),
+            counterparty_iban=data.get("counterparty_iban"),
+            counterparty_name=data.get("counterparty_name"),
+            description=data.get("description"),
+            tags=tuple(data.get("tags") or ()),
+        )
+
+    @classmethod
+    def from_orm(cls, statement: Statements) -> "StatementDTO":
+        """
+        Convert a `Statements` instance, its tags only if they are loaded.
+
+        Args:
+            statement (Statements): The statement.
+
+        Returns:
+            StatementDTO: The statement.
+        """
+        loaded_tags = statement.__dict__.get("tags") or ()
+        return cls(
+            id=statement.id,
+            date=statement.date,
+            interest_date=statement.interest_date,
+            amount=statement.amount,
+            account_iban=statement.account_iban,
+            account_name=statement.account_name,
+            counterparty_iban=statement.counterparty_iban,
+            counterparty_name=statement.counterparty_name,
+            description=statement.description,
+            tags=tuple(tag.name for tag in loaded_tags),
+        )
+
+    def to_row(self) -> tuple[Any, ...]:
+        """
+        Get the values in the column order of `bulk_upsert_statements`.
+
+        Returns:
+            tuple[Any, ...]: The column values followed by the list of tag names.
+        """
+        return (
+            self.id,
+            self.date,
+            self.interest_date,
+            self.amount,
+            self.account_iban,
+            self.account_name,
+            self.counterparty_iban,
+            self.counterparty_name,
+            self.description,
+            list(self.tags),
+        )
+
+
+@dataclass(slots=True)
+class AccountDTO:
+    """Lightweight account for messages, mirroring `Account`"""
+
+    iban: str
+    name: str
+    nickname: str
+    parent_id: uuid.UUID | None = None
+    id: uuid.UUID = field(default_factory=uuid.uuid4)
+
+    def to_wire(self) -> list[Any]:
+        return [self.id, self.iban, self.name, self.nickname, self.parent_id]
+
+    @classmethod
+    def from_wire(cls, values: list[Any]) -> "AccountDTO":
+        return cls(
+            id=_uuid(values[0]),
+            iban=values[1],
+            name=values[2],
+            nickname=values[3],
+            parent_id=_uuid(values[4]),
+        )
+
+    @classmethod
+    def from_orm(cls, account: Account) -> "AccountDTO":
+        return cls(
+            id=account.id,
+            iban=account.iban,
+            name=account.name,
+            nickname=account.nickname,
+            parent_id=account.parent_id,
+        )
+
+
+@dataclass(slots=True)
+class TagDTO:
+    """Lightweight tag for messages, mirroring `Tags`"""
+
+    name: str
+    color: str | None = None
+    id: uuid.UUID = field(default_factory=uuid.uuid4)
+
+    def to_wire(self) -> list[Any]:
+        return [self.id, self.name, self.color]
+
+    @classmethod
+    def from_wire(cls, values: list[Any]) -> "TagDTO":
+        return cls(id=_uuid(values[0]), name=values[1], color=values[2])
+
+    @classmethod
+    def from_orm(cls, tag: Tags) -> "TagDTO":
+        return cls(id=tag.id, name=tag.name, color=tag.color)
+
+
+def statement_rows(statements: Iterable[StatementDTO]) -> Iterator[tuple[Any, ...]]:
+    """
+    Convert statements to insertable row tuples, see `StatementDTO.to_row`.
+
+    Args:
+        statements (Iterable[StatementDTO]): The statements.
+
+    Yields:
+        tuple[Any, ...]: The row of every statement.
+    """
+    for statement in statements:
+        yield statement.to_row()
+
+
+def dump_statements(
+    statements: Iterable[StatementDTO], serializer: Serializer | None = None
+) -> bytes:
+    """
+    Encode a batch of statements as one message body.
+
+    Args:
+        statements (Iterable[StatementDTO]): The statements.
+        serializer (Serializer | None): The serializer, defaults to JSON. Publish
+            the body with its `content_type`.
+
+    Returns:
+        bytes: The message body.
+    """
+    serializer = serializer or get_serializer()
+    return serializer.dumps([statement.to_wire() for statement in statements])
+
+
+def load_statements(body: bytes, content_type: str | None = None) -> list[StatementDTO]:
+    """
+    Decode a message body created by `dump_statements`.
+
+    Args:
+        body (bytes): The message body.
+        content_type (str | None): The content type of the message.
+
+    Returns:
+        list[StatementDTO]: The statements.
+
+    Raises:
+        ValueError: If the body can not be decoded.
+    """
+    try:
+        return [
+            StatementDTO.from_wire(values) for values in decode_body(body, content_type)
+        ]
+    except (AttributeError, IndexError, TypeError) as e:
+        raise ValueError(f"Invalid statements message: {e}") from e
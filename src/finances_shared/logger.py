@@ -1,8 +1,26 @@
+import atexit
+import copy
+import json
 import logging
-from typing import Any
+import queue
+import re
+import threading
+import time
+from collections.abc import Callable, Iterator, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from types import MappingProxyType
+from typing import Any, Literal
 
+from pythonjsonlogger.core import RESERVED_ATTRS
 from pythonjsonlogger.json import JsonFormatter
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
 _log_format = "%(asctime)s - [%(levelname)s] - %(name)s - %(funcName)s - %(message)s"
 
 
@@ -22,25 +40,130 @@ class CustomJsonFormatter(JsonFormatter):
         log_record["location"] = f"{record.filename}:{record.lineno}"
 
 
+def _json_default(obj: Any) -> Any:
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    return str(obj)
+
+
+if orjson is not None:
+
+    def _dumps(log_data: dict[str, Any]) -> str:
+        return orjson.dumps(
+            log_data, default=_json_default, option=orjson.OPT_NON_STR_KEYS
+        ).decode()
+
+else:
+
+    def _dumps(log_data: dict[str, Any]) -> str:
+        return json.dumps(log_data, default=_json_default)
+
+
+class FastJsonFormatter(logging.Formatter):
+    """JSON formatter producing the same fields as `CustomJsonFormatter`
+
+    The fields of the format string and the attributes to skip are resolved once,
+    the timestamp prefix is cached per second and the record is serialized with
+    orjson when it is installed.
+    """
+
+    def __init__(self, fmt: str = _log_format, datefmt: str | None = None) -> None:
+        super().__init__(fmt, datefmt)
+        self._fields = tuple(re.findall(r"%\((.+?)\)", fmt))
+        self._skip_fields = frozenset(RESERVED_ATTRS) | frozenset(self._fields)
+        self._needs_asctime = "asctime" in self._fields
+        self._cached_second = -1
+        self._cached_time = ""
+
+    def formatTime(self, record: logging.LogRecord, datefmt: str | None = None) -> str:
+        if datefmt:
+            return super().formatTime(record, datefmt)
+        second = int(record.created)
+        if second != self._cached_second:
+            self._cached_time = time.strftime(
+                self.default_time_format, self.converter(record.created)
+            )
+            self._cached_second = second
+        return self.default_msec_format % (self._cached_time, record.msecs)
+
+    def format(self, record: logging.LogRecord) -> str:
+        if isinstance(record.msg, dict):
+            message_dict = record.msg
+            record.message = ""
+        else:
+            message_dict = None
+            record.message = record.getMessage()
+        if self._needs_asctime:
+            record.asctime = self.formatTime(record, self.datefmt)
+
+        record_dict = record.__dict__
+        log_data = {field: record_dict.get(field) for field in self._fields}
+        if message_dict:
+            log_data.update(message_dict)
+        if not log_data.get("exc_info"):
+            if record.exc_info:
+                log_data["exc_info"] = self.formatException(record.exc_info)
+            elif record.exc_text:
+                log_data["exc_info"] = record.exc_text
+        if record.stack_info and not log_data.get("stack_info"):
+            log_data["stack_info"] = self.formatStack(record.stack_info)
+
+        skip_fields = self._skip_fields
+        for key, value in record_dict.items():
+            if key not in skip_fields and not key.startswith("_"):
+                log_data[key] = value
+
+        log_data["location"] = f"{record.filename}:{record.lineno}"
+        return _dumps(log_data)
+
+
+_EMPTY_CONTEXT: Mapping[str, Any] = MappingProxyType({})
+
+_log_context: ContextVar[Mapping[str, Any]] = ContextVar(
+    "log_context", default=_EMPTY_CONTEXT
+)
+
+
 class ContextFilter(logging.Filter):
-    """A logging filter to add context and extra attributes to the log records"""
+    """A logging filter to add context and extra attributes to the log records
+
+    The process wide context is shared by every task and thread, the task context
+    lives in a context variable, so it is scoped to the current asyncio task (and
+    the tasks it creates) or thread. Both are immutable snapshots replaced on
+    update, so the filter only merges them into the record.
+    """
 
     def __init__(self, name: str = "") -> None:
         super().__init__(name)
-        self.context: dict[str, Any] = {}
+        self._global_context: Mapping[str, Any] = _EMPTY_CONTEXT
+
+    @property
+    def context(self) -> Mapping[str, Any]:
+        """The context applied to records logged from the current task"""
+        return {**self._global_context, **_log_context.get()}
 
     def update_context(self, **kwargs: Any) -> None:
-        """Update the context for the logger
+        """Update the context of the current task
 
         Args:
             **kwargs: The context key-value pairs
         """
-        self.context.update(kwargs)
+        _log_context.set(MappingProxyType({**_log_context.get(), **kwargs}))
+
+    def update_global_context(self, **kwargs: Any) -> None:
+        """Update the context shared by every task and thread
+
+        Args:
+            **kwargs: The context key-value pairs
+        """
+        self._global_context = MappingProxyType({**self._global_context, **kwargs})
 
     def filter(self, record: logging.LogRecord) -> bool:
-        for key, value in self.context.items():
-            if not hasattr(record, key) or getattr(record, key) is not None:
-                setattr(record, key, value)
+        if self._global_context:
+            record.__dict__.update(self._global_context)
+        task_context = _log_context.get()
+        if task_context:
+            record.__dict__.update(task_context)
         return True
 
 
@@ -50,6 +173,12 @@ context_filter = ContextFilter()
 def add_log_context(**kwargs: Any) -> None:
     """Add extra context to the log records
 
+    The context is scoped to the current asyncio task, so values added while
+    handling one request do not leak into concurrent requests. Tasks created
+    afterwards inherit it. Use `add_global_log_context` for values that must be
+    visible everywhere regardless of where they are set, e.g. from a lifespan
+    handler.
+
     Args:
         **kwargs: The context key-value pairs
 
@@ -62,32 +191,299 @@ def add_log_context(**kwargs: Any) -> None:
     context_filter.update_context(**kwargs)
 
 
+def add_global_log_context(**kwargs: Any) -> None:
+    """Add extra context to the log records of every task and thread
+
+    Args:
+        **kwargs: The context key-value pairs
+    """
+    context_filter.update_global_context(**kwargs)
+
+
+@contextmanager
+def log_context(**kwargs: Any) -> Iterator[None]:
+    """Add extra context to the log records inside the `with` block
+
+    Args:
+        **kwargs: The context key-value pairs
+
+    Example:
+        >>> with log_context(request_id="abc"):
+        ...     my_logger.info("Handling request")
+    """
+    token = _log_context.set(MappingProxyType({**_log_context.get(), **kwargs}))
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+ThrottleKey = Literal["call_site", "logger"]
+
+
+class _ThrottleFilter(logging.Filter):
+    """Base class of the filters dropping part of the records
+
+    Records are throttled per call site (file and line) or per logger. The number
+    of records dropped since the last emitted one of the same key is added to
+    the next emitted record as `suppressed`, so the volume stays visible.
+    """
+
+    def __init__(self, per: ThrottleKey = "call_site") -> None:
+        super().__init__()
+        self.per = per
+        self._suppressed: dict[Any, int] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, record: logging.LogRecord) -> Any:
+        if self.per == "logger":
+            return record.name
+        return (record.pathname, record.lineno)
+
+    def _allow(self, key: Any) -> bool:
+        raise NotImplementedError
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # Warnings and errors are never dropped
+        if record.levelno >= logging.WARNING:
+            return True
+
+        key = self._key(record)
+        with self._lock:
+            if not self._allow(key):
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False
+            suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class SamplingFilter(_ThrottleFilter):
+    """A logging filter keeping a fixed share of the records of each key
+
+    Sampling is deterministic: with `rate=0.1` every 10th record is kept.
+    """
+
+    def __init__(self, rate: float, per: ThrottleKey = "call_site") -> None:
+        if not 0 < rate <= 1:
+            raise ValueError("Sample rate must be in the (0, 1] range.")
+        super().__init__(per)
+        self.rate = rate
+        self._credit: dict[Any, float] = {}
+
+    def _allow(self, key: Any) -> bool:
+        # Start one step short of a full credit so the first record is kept
+        credit = self._credit.get(key, 1.0 - self.rate) + self.rate
+        if credit >= 1.0 - 1e-9:
+            self._credit[key] = credit - 1.0
+            return True
+        self._credit[key] = credit
+        return False
+
+
+class RateLimitFilter(_ThrottleFilter):
+    """A logging filter limiting the records of each key with a token bucket
+
+    Up to `burst` records pass at once, after that `rate` records per second.
+    The buckets are refilled from `clock`, which returns seconds.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int | None = None,
+        per: ThrottleKey = "call_site",
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if rate <= 0:
+            raise ValueError("Rate limit must be positive.")
+        super().__init__(per)
+        self.rate = rate
+        self.burst = burst or max(int(rate), 1)
+        self.clock = clock
+        self._buckets: dict[Any, tuple[float, float]] = {}
+
+    def _allow(self, key: Any) -> bool:
+        now = self.clock()
+        tokens, updated = self._buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens >= 1.0:
+            self._buckets[key] = (tokens - 1.0, now)
+            return True
+        self._buckets[key] = (tokens, now)
+        return False
+
+
 def _get_stream_handler() -> logging.StreamHandler:
     """Get a stream handler for logging to the console"""
     stream_handler = logging.StreamHandler()
     stream_handler.setLevel(logging.INFO)
 
-    json_formatter = CustomJsonFormatter(_log_format)
+    json_formatter = FastJsonFormatter(_log_format)
 
     stream_handler.setFormatter(json_formatter)
     return stream_handler
 
 
-def get_logger(name: str) -> logging.Logger:
+OverflowPolicy = Literal["drop", "block"]
+
+
+class BoundedQueueHandler(QueueHandler):
+    """A queue handler with a bounded buffer
+
+    When the buffer is full the record is dropped (`drop`) or the caller waits up
+    to `block_timeout` seconds for free space before dropping it (`block`).
+    """
+
+    def __init__(
+        self,
+        log_queue: queue.Queue,
+        overflow: OverflowPolicy = "drop",
+        block_timeout: float = 1.0,
+    ) -> None:
+        super().__init__(log_queue)
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only resolve what can not cross threads, the JSON formatting and
+        # writing happen on the listener thread. The traceback is kept in
+        # `exc_text` so it stays a separate field of the JSON output. Dict
+        # messages are kept as they are, the formatter merges their keys.
+        record = copy.copy(record)
+        if not isinstance(record.msg, dict):
+            record.msg = record.message = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            if self.overflow == "block":
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_exception_formatter = logging.Formatter()
+_queue_handler: BoundedQueueHandler | None = None
+_queue_listener: QueueListener | None = None
+# Loggers writing to the queue, switched back to a stream handler when it stops
+_queued_loggers: set[logging.Logger] = set()
+
+
+def start_log_queue(
+    max_size: int = 10_000,
+    overflow: OverflowPolicy = "drop",
+    block_timeout: float = 1.0,
+) -> BoundedQueueHandler:
+    """Start the background thread formatting and writing the queued log records
+
+    The queue is shared by every logger created with `get_logger(..., queued=True)`
+    and is flushed on interpreter exit. Calling it again returns the running
+    handler unchanged.
+
+    Args:
+        max_size (int): Maximum number of records waiting to be written
+        overflow (OverflowPolicy): What to do when the buffer is full
+        block_timeout (float): Seconds to wait for free space with `block`
+
+    Returns:
+        BoundedQueueHandler: The handler the loggers enqueue their records to
+    """
+    global _queue_handler, _queue_listener
+    if _queue_handler is not None:
+        return _queue_handler
+
+    log_queue: queue.Queue = queue.Queue(maxsize=max_size)
+    _queue_handler = BoundedQueueHandler(log_queue, overflow, block_timeout)
+    _queue_handler.setLevel(logging.INFO)
+    _queue_listener = QueueListener(
+        log_queue, _get_stream_handler(), respect_handler_level=True
+    )
+    _queue_listener.start()
+    atexit.register(stop_log_queue)
+    return _queue_handler
+
+
+def stop_log_queue() -> None:
+    """Flush the queued log records and stop the background thread
+
+    The loggers created with `get_logger(..., queued=True)` write on the calling
+    thread again afterwards.
+    """
+    global _queue_handler, _queue_listener
+    if _queue_listener is None:
+        return
+
+    for logger in _queued_loggers:
+        if _queue_handler in logger.handlers:
+            logger.removeHandler(_queue_handler)
+            logger.addHandler(_get_stream_handler())
+    _queued_loggers.clear()
+
+    _queue_listener.stop()
+    if _queue_handler.dropped:
+        logging.getLogger(__name__).warning(
+            f"Dropped {_queue_handler.dropped} log records, the log queue was full"
+        )
+    _queue_handler = None
+    _queue_listener = None
+
+
+def get_logger(
+    name: str,
+    queued: bool = False,
+    sample_rate: float | None = None,
+    rate_limit: float | None = None,
+    rate_limit_burst: int | None = None,
+) -> logging.Logger:
     """Get a logger instance with a custom JSON formatter
 
     Args:
         name (str): The name of the logger
+        queued (bool): Hand the records to a background thread for formatting and
+            writing instead of doing it on the calling thread, see
+            `start_log_queue`
+        sample_rate (float | None): Keep only this share of the INFO and lower
+            records of each call site, see `SamplingFilter`
+        rate_limit (float | None): Keep at most this many INFO and lower records
+            per second of each call site, see `RateLimitFilter`
+        rate_limit_burst (int | None): Number of records allowed at once before
+            `rate_limit` applies
 
     Returns:
         logging.Logger: The logger instance
+
+    Example:
+        >>> # Keep the per message "sending" log of a busy producer cheap
+        >>> producer_logger = get_logger("producer", rate_limit=10)
     """
     logger = logging.getLogger(name)
     logger.setLevel(logging.INFO)
 
     logger.handlers.clear()
-    logger.addHandler(_get_stream_handler())
+    if queued:
+        logger.addHandler(start_log_queue())
+        _queued_loggers.add(logger)
+    else:
+        logger.addHandler(_get_stream_handler())
+        _queued_loggers.discard(logger)
 
+    # Throttle before the context is merged, so dropped records cost the least
+    for log_filter in list(logger.filters):
+        if isinstance(log_filter, _ThrottleFilter) or log_filter is context_filter:
+            logger.removeFilter(log_filter)
+    if sample_rate is not None:
+        logger.addFilter(SamplingFilter(sample_rate))
+    if rate_limit is not None:
+        logger.addFilter(RateLimitFilter(rate_limit, rate_limit_burst))
     logger.addFilter(context_filter)
 
     return logger
@@ -0,0 +1,340 @@
+import math
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _format_labels(labelnames: tuple[str, ...], labelvalues: tuple[str, ...]) -> str:
+    if not labelnames:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)
+    )
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base class of the metrics, keeps one child per label combination"""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._default = self._new_child()
+            self._children[()] = self._default
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *labelvalues: str, **labelkwargs: str):
+        """
+        Get the child metric of a label combination.
+
+        Resolve it once and keep it around on hot paths, the child's methods do
+        not look up anything.
+
+        Returns:
+            The child metric for the given label values.
+        """
+        if labelkwargs:
+            labelvalues = tuple(str(labelkwargs[name]) for name in self.labelnames)
+        else:
+            labelvalues = tuple(str(value) for value in labelvalues)
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        child = self._children.get(labelvalues)
+        if child is None:
+            child = self._children.setdefault(labelvalues, self._new_child())
+        return child
+
+    def _samples(self) -> Iterator[tuple[str, str, float]]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        for suffix, labels, value in self._samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class Counter(_Metric):
+    """A monotonically increasing value"""
+
+    type_name = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default.inc(amount)
+
+    def _samples(self):
+        for labelvalues, child in list(self._children.items()):
+            yield "_total", _format_labels(self.labelnames, labelvalues), child.value
+
+
+class _GaugeChild:
+    __slots__ = ("value", "function")
+
+    def __init__(self):
+        self.value = 0.0
+        self.function: Callable[[], float] | None = None
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Read the value from `function` at render time instead"""
+        self.function = function
+
+    def get(self) -> float:
+        if self.function is not None:
+            return self.function()
+        return self.value
+
+
+class Gauge(_Metric):
+    """A value that can go up and down"""
+
+    type_name = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._default.set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default.dec(amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._default.set_function(function)
+
+    def _samples(self):
+        for labelvalues, child in list(self._children.items()):
+            yield "", _format_labels(self.labelnames, labelvalues), child.get()
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe the duration of the `with` block in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...],
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+    def _samples(self):
+        for labelvalues, child in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), child.counts):
+                cumulative += count
+                labels = _format_labels(
+                    (*self.labelnames, "le"), (*labelvalues, _format_value(bound))
+                )
+                yield "_bucket", labels, cumulative
+            labels = _format_labels(self.labelnames, labelvalues)
+            yield "_sum", labels, child.sum
+            yield "_count", labels, child.count
+
+
+class MetricsRegistry:
+    """Collection of the metrics of the process"""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def _get_or_create(self, metric_class, name: str, *args, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics.setdefault(name, metric_class(name, *args, **kwargs))
+        if not isinstance(metric, metric_class):
+            raise ValueError(
+                f"Metric {name} is already registered as {metric.type_name}"
+            )
+        return metric
+
+    def counter(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = ()
+    ) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = ()
+    ) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets)
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def counter(name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+    """
+    Get or create a counter in the default registry.
+
+    Args:
+        name (str): The metric name, without the `_total` suffix.
+        documentation (str): The help text of the metric.
+        labelnames (tuple[str, ...]): The label names of the metric.
+
+    Returns:
+        Counter: The counter.
+    """
+    return registry.counter(name, documentation, labelnames)
+
+
+def gauge(name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+    """
+    Get or create a gauge in the default registry.
+
+    Args:
+        name (str): The metric name.
+        documentation (str): The help text of the metric.
+        labelnames (tuple[str, ...]): The label names of the metric.
+
+    Returns:
+        Gauge: The gauge.
+    """
+    return registry.gauge(name, documentation, labelnames)
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: tuple[str, ...] = (),
+    buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+) -> Histogram:
+    """
+    Get or create a histogram in the default registry.
+
+    Args:
+        name (str): The metric name.
+        documentation (str): The help text of the metric.
+        labelnames (tuple[str, ...]): The label names of the metric.
+        buckets (tuple[float, ...]): The upper bounds of the buckets.
+
+    Returns:
+        Histogram: The histogram.
+    """
+    return registry.histogram(name, documentation, labelnames, buckets)
+
+
+def render_prometheus() -> str:
+    """
+    Render the metrics of the default registry in the Prometheus text format.
+
+    Returns:
+        str: The exposition text.
+
+    Example:
+        >>> @app.get("/metrics", response_class=PlainTextResponse)
+        ... async def metrics():
+        ...     return render_prometheus()
+    """
+    return registry.render()
@@ -1,3 +1,3 @@
-from .models import Account, Statements, Tags, Base
+from .models import Account, Statements, StatementMonthlyTotals, Tags, Base
 
-__all__ = ["Account", "Statements", "Tags", "Base"]
+__all__ = ["Account", "Statements", "StatementMonthlyTotals", "Tags", "Base"]
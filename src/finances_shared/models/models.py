@@ -1,26 +1,69 @@
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 from typing import List
 
 from sqlalchemy import (
     TIMESTAMP,
+    BigInteger,
     Column,
+    Date,
     ForeignKey,
     ForeignKeyConstraint,
+    Index,
+    Integer,
     String,
     Table,
     UniqueConstraint,
+    and_,
+    func,
 )
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import Mapped, declarative_base, mapped_column, relationship
+from sqlalchemy.orm import (
+    Mapped,
+    declarative_base,
+    mapped_column,
+    relationship,
+)
 
 Base = declarative_base()
 
+# `statements` is partitioned by date and its primary key is (id, date), so the
+# link carries the statement date to reference it with a foreign key.
 tags_to_statement_table = Table(
     "tags_to_statement",
     Base.metadata,
     Column("tag_id", ForeignKey("tags.id"), primary_key=True),
-    Column("statement_id", ForeignKey("statements.id"), primary_key=True),
+    Column("statement_id", UUID(as_uuid=True), primary_key=True),
+    Column("statement_date", TIMESTAMP(timezone=True), nullable=False),
+    ForeignKeyConstraint(
+        ["statement_id", "statement_date"],
+        ["statements.id", "statements.date"],
+        name="fk_tags_to_statement_statement",
+        ondelete="CASCADE",
+    ),
+    # The primary key leads with tag_id, lookups by statement need their own index
+    Index("ix_tags_to_statement_statement_id_tag_id", "statement_id", "tag_id"),
+)
+
+
+# Every (ancestor, descendant) pair of the `Account.parent` tree, including each
+# account with itself at depth 0. Kept up to date by triggers on `accounts`, the
+# `rebuild_account_closure` database function recomputes it from scratch.
+account_closure_table = Table(
+    "account_closure",
+    Base.metadata,
+    Column(
+        "ancestor_id",
+        ForeignKey("accounts.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    Column(
+        "descendant_id",
+        ForeignKey("accounts.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    Column("depth", Integer, nullable=False),
+    Index("ix_account_closure_descendant_id", "descendant_id"),
 )
 
 
@@ -57,7 +100,10 @@ class Statements(Base):
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
     )
-    date: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
+    # Part of the primary key because the table is range partitioned by month on it
+    date: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), primary_key=True, nullable=False
+    )
     interest_date: Mapped[datetime] = mapped_column(
         TIMESTAMP(timezone=True), nullable=False
     )
@@ -85,6 +131,11 @@ class Statements(Base):
     tags: Mapped[List[Tags]] = relationship(
         Tags,
         secondary=tags_to_statement_table,
+        primaryjoin=lambda: and_(
+            Statements.id == tags_to_statement_table.c.statement_id,
+            Statements.date == tags_to_statement_table.c.statement_date,
+        ),
+        secondaryjoin=lambda: Tags.id == tags_to_statement_table.c.tag_id,
         back_populates="statements",
     )
 
@@ -99,7 +150,88 @@ class Statements(Base):
             ["accounts.iban", "accounts.name"],
             name="fk_statements_destination_account",
         ),
+        UniqueConstraint(
+            "account_iban",
+            "date",
+            "amount",
+            "counterparty_iban",
+            "counterparty_name",
+            name="uq_statements_natural_key",
+            postgresql_nulls_not_distinct=True,
+        ),
+        Index("ix_statements_date_id", "date", "id"),
+        Index(
+            "ix_statements_account_date",
+            "account_iban",
+            "account_name",
+            "date",
+            postgresql_include=["amount"],
+        ),
+        Index(
+            "ix_statements_counterparty",
+            "counterparty_iban",
+            "counterparty_name",
+        ),
+        {"postgresql_partition_by": "RANGE (date)"},
+    )
+    # Statements are still identified by their id alone in the ORM
+    __mapper_args__ = {"primary_key": [id]}
+
+
+# Materialized monthly sum and count of the statement amounts per account and tag,
+# maintained by `finances_shared.aggregates.refresh_monthly_totals`. Statements
+# with several tags are counted under each of them, untagged ones under NULL.
+class StatementMonthlyTotals(Base):
+    __tablename__ = "statement_monthly_totals"
+
+    month: Mapped[date] = mapped_column(Date, nullable=False)
+    account_iban: Mapped[str] = mapped_column(nullable=False)
+    account_name: Mapped[str] = mapped_column(nullable=False)
+    tag_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("tags.id", ondelete="CASCADE"), nullable=True
+    )
+    total: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    count: Mapped[int] = mapped_column(nullable=False)
+
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["account_iban", "account_name"],
+            ["accounts.iban", "accounts.name"],
+            name="fk_statement_monthly_totals_account",
+        ),
+        UniqueConstraint(
+            "month",
+            "account_iban",
+            "account_name",
+            "tag_id",
+            name="uq_statement_monthly_totals",
+            postgresql_nulls_not_distinct=True,
+        ),
+        Index(
+            "ix_statement_monthly_totals_account_month",
+            "account_iban",
+            "account_name",
+            "month",
+        ),
     )
+    # The unique key has a nullable column, so it can not be the primary key
+    __mapper_args__ = {"primary_key": [month, account_iban, account_name, tag_id]}
+
+
+# Ids of the messages consumed by `RabbitMQListener`s with a `PostgresDedupeStore`
+processed_messages_table = Table(
+    "processed_messages",
+    Base.metadata,
+    Column("queue", String, primary_key=True),
+    Column("message_id", String, primary_key=True),
+    Column(
+        "processed_at",
+        TIMESTAMP(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+    ),
+    Index("ix_processed_messages_processed_at", "processed_at"),
+)
 
 
 Account.parent = relationship(
@@ -117,5 +249,10 @@ Account.aliases = relationship(
 Tags.statements = relationship(
     Statements,
     secondary=tags_to_statement_table,
+    primaryjoin=lambda: Tags.id == tags_to_statement_table.c.tag_id,
+    secondaryjoin=lambda: and_(
+        Statements.id == tags_to_statement_table.c.statement_id,
+        Statements.date == tags_to_statement_table.c.statement_date,
+    ),
     back_populates="tags",
 )
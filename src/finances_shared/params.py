@@ -1,6 +1,102 @@
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from logging import Logger
+from typing import Any
+
+
+def _int_from_env(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    if not value.isdigit():
+        raise ValueError(f"{name} must be a valid integer.")
+    return int(value)
+
+
+def _bool_from_env(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+@dataclass
+class DatabasePoolParams:
+    """Database engine and connection pool tuning parameters"""
+
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: int = 30
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    echo: bool = False
+    statement_cache_size: int = 100
+
+    @classmethod
+    def from_env(cls, logger: Logger) -> "DatabasePoolParams":
+        """
+        Create a DatabasePoolParams instance from environment variables.
+
+        Every variable is optional and falls back to the production defaults:
+        POSTGRES_POOL_SIZE, POSTGRES_MAX_OVERFLOW, POSTGRES_POOL_TIMEOUT,
+        POSTGRES_POOL_RECYCLE, POSTGRES_POOL_PRE_PING, POSTGRES_ECHO and
+        POSTGRES_STATEMENT_CACHE_SIZE (set it to 0 behind pgbouncer).
+
+        Args:
+            logger (Logger): Logger instance for logging errors.
+
+        Returns:
+            DatabasePoolParams: An instance of DatabasePoolParams.
+
+        Raises:
+            ValueError: If a numeric variable is not a valid integer.
+        """
+        defaults = cls()
+        try:
+            return cls(
+                pool_size=_int_from_env("POSTGRES_POOL_SIZE", defaults.pool_size),
+                max_overflow=_int_from_env(
+                    "POSTGRES_MAX_OVERFLOW", defaults.max_overflow
+                ),
+                pool_timeout=_int_from_env(
+                    "POSTGRES_POOL_TIMEOUT", defaults.pool_timeout
+                ),
+                pool_recycle=_int_from_env(
+                    "POSTGRES_POOL_RECYCLE", defaults.pool_recycle
+                ),
+                pool_pre_ping=_bool_from_env(
+                    "POSTGRES_POOL_PRE_PING", defaults.pool_pre_ping
+                ),
+                echo=_bool_from_env("POSTGRES_ECHO", defaults.echo),
+                statement_cache_size=_int_from_env(
+                    "POSTGRES_STATEMENT_CACHE_SIZE", defaults.statement_cache_size
+                ),
+            )
+        except ValueError as e:
+            logger.error(f"Invalid database pool parameters: {e}")
+            raise
+
+    def engine_kwargs(self) -> dict[str, Any]:
+        """
+        Get the keyword arguments for `create_async_engine`.
+
+        Returns:
+            dict[str, Any]: The engine and pool options.
+        """
+        return {
+            "echo": self.echo,
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_timeout": self.pool_timeout,
+            "pool_recycle": self.pool_recycle,
+            "pool_pre_ping": self.pool_pre_ping,
+            "connect_args": {
+                # asyncpg's own statement cache and SQLAlchemy's prepared
+                # statement cache on top of it
+                "statement_cache_size": self.statement_cache_size,
+                "prepared_statement_cache_size": self.statement_cache_size,
+            },
+        }
 
 
 @dataclass
@@ -12,6 +108,7 @@ class DatabaseParams:
     user: str
     password: str
     database: str
+    pool: DatabasePoolParams = field(default_factory=DatabasePoolParams)
 
     @classmethod
     def from_env(cls, logger: Logger) -> "DatabaseParams":
@@ -49,6 +146,7 @@ class DatabaseParams:
             user=db_user,
             password=db_password,
             database=db_name,
+            pool=DatabasePoolParams.from_env(logger),
         )
 
     def connection_string(self) -> str:
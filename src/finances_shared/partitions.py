@@ -0,0 +1,106 @@
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+STATEMENTS_DEFAULT_PARTITION = "statements_default"
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def statement_partition_name(month: date) -> str:
+    """
+    Get the name of the `statements` partition holding the given month.
+
+    Args:
+        month (date): Any day of the month.
+
+    Returns:
+        str: The partition name, e.g. `statements_y2025m06`.
+    """
+    return f"statements_y{month.year:04d}m{month.month:02d}"
+
+
+def _bound(month: date) -> str:
+    return f"{month.isoformat()} 00:00:00+00"
+
+
+async def create_statement_partition(session: AsyncSession, month: date) -> bool:
+    """
+    Create the `statements` partition for a month if it does not exist yet.
+
+    Rows of the month that were already written to the default partition are
+    moved into the new partition before it is attached.
+
+    Args:
+        session (AsyncSession): The database session, the caller commits.
+        month (date): Any day of the month.
+
+    Returns:
+        bool: True if the partition was created.
+    """
+    month = _month_start(month)
+    name = statement_partition_name(month)
+    exists = await session.scalar(
+        text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}
+    )
+    if exists:
+        return False
+
+    start, end = _bound(month), _bound(_add_months(month, 1))
+    await session.execute(
+        text(
+            f"CREATE TABLE {name} "
+            "(LIKE statements INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+    )
+    await session.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {STATEMENTS_DEFAULT_PARTITION} "
+            f"WHERE date >= '{start}' AND date < '{end}' RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        )
+    )
+    await session.execute(
+        text(
+            f"ALTER TABLE statements ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        )
+    )
+    return True
+
+
+async def ensure_statement_partitions(
+    session: AsyncSession, months_ahead: int = 3, start: date | None = None
+) -> list[str]:
+    """
+    Pre-create the monthly `statements` partitions.
+
+    Meant to run periodically (e.g. daily from a scheduler), so that new
+    statements never land in the default partition.
+
+    Args:
+        session (AsyncSession): The database session, the caller commits.
+        months_ahead (int): Number of months after the current one to create.
+        start (date | None): First month to create, defaults to the current month.
+
+    Returns:
+        list[str]: The names of the created partitions.
+    """
+    first = _month_start(start or datetime.now(timezone.utc).date())
+    last = _add_months(_month_start(datetime.now(timezone.utc).date()), months_ahead)
+
+    created = []
+    month = first
+    while month <= last:
+        if await create_statement_partition(session, month):
+            created.append(statement_partition_name(month))
+        month = _add_months(month, 1)
+    return created
@@ -0,0 +1,252 @@
+import base64
+import binascii
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Literal
+
+from sqlalchemy import ColumnElement, Select, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, raiseload, selectinload
+from sqlalchemy.orm.interfaces import LoaderOption
+
+from finances_shared.models import Statements
+
+StatementLoad = Literal["rows", "list", "detail"]
+
+
+def statement_load_options(load: StatementLoad) -> list[LoaderOption]:
+    """
+    Get the loader options of a `Statements` loading preset.
+
+    Every preset loads a fixed number of queries regardless of the number of
+    statements, relationships that are not part of the preset raise on access
+    instead of lazy loading, which does not work in an `AsyncSession` anyway.
+
+    - `rows`: only the statement columns, 1 query.
+    - `list`: the source and destination accounts joined in, 1 query.
+    - `detail`: the accounts joined in and the tags loaded with one extra
+      `SELECT ... WHERE statement_id IN (...)`, 2 queries.
+
+    Args:
+        load (StatementLoad): The loading preset.
+
+    Returns:
+        list[LoaderOption]: The options to pass to `Select.options`.
+    """
+    if load == "rows":
+        return [raiseload("*")]
+    if load == "list":
+        return [
+            joinedload(Statements.source_account),
+            joinedload(Statements.destination_account),
+            raiseload("*"),
+        ]
+    if load == "detail":
+        return [
+            joinedload(Statements.source_account),
+            joinedload(Statements.destination_account),
+            selectinload(Statements.tags),
+            raiseload("*"),
+        ]
+    raise ValueError(f"Unknown statement load preset: {load}")
+
+
+def select_statements(
+    *where: ColumnElement[bool], load: StatementLoad = "list"
+) -> Select[tuple[Statements]]:
+    """
+    Build a `Statements` select with a loading preset.
+
+    Args:
+        *where (ColumnElement[bool]): Filter criteria.
+        load (StatementLoad): The loading preset, see `statement_load_options`.
+
+    Returns:
+        Select[tuple[Statements]]: The select, newest statements first.
+    """
+    return (
+        select(Statements)
+        .where(*where)
+        .options(*statement_load_options(load))
+        .order_by(Statements.date.desc(), Statements.id.desc())
+    )
+
+
+async def get_statements(
+    session: AsyncSession,
+    *where: ColumnElement[bool],
+    load: StatementLoad = "list",
+    limit: int | None = None,
+) -> list[Statements]:
+    """
+    Load statements with a loading preset.
+
+    Args:
+        session (AsyncSession): The database session.
+        *where (ColumnElement[bool]): Filter criteria.
+        load (StatementLoad): The loading preset, see `statement_load_options`.
+        limit (int | None): Maximum number of statements.
+
+    Returns:
+        list[Statements]: The statements, newest first.
+
+    Example:
+        >>> statements = await get_statements(
+        ...     session, Statements.account_iban == iban, load="list", limit=50
+        ... )
+    """
+    query = select_statements(*where, load=load).limit(limit)
+    return list((await session.scalars(query)).unique())
+
+
+async def get_statement(
+    session: AsyncSession, statement_id: uuid.UUID, load: StatementLoad = "detail"
+) -> Statements | None:
+    """
+    Load one statement with a loading preset.
+
+    Args:
+        session (AsyncSession): The database session.
+        statement_id (uuid.UUID): The statement id.
+        load (StatementLoad): The loading preset, see `statement_load_options`.
+
+    Returns:
+        Statements | None: The statement, or None if it does not exist.
+    """
+    query = select_statements(Statements.id == statement_id, load=load)
+    return (await session.scalars(query)).unique().one_or_none()
+
+
+@dataclass(frozen=True)
+class StatementCursor:
+    """Position in the `(date, id)` ordering of the statements"""
+
+    date: datetime
+    id: uuid.UUID
+
+    def encode(self) -> str:
+        """
+        Encode the cursor as an opaque, URL safe token.
+
+        Returns:
+            str: The token, see `decode`.
+        """
+        raw = f"{self.date.isoformat()}|{self.id}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, token: str) -> "StatementCursor":
+        """
+        Decode a token created by `encode`.
+
+        Args:
+            token (str): The token.
+
+        Returns:
+            StatementCursor: The cursor.
+
+        Raises:
+            ValueError: If the token is malformed.
+        """
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+            date, statement_id = raw.split("|")
+            return cls(date=datetime.fromisoformat(date), id=uuid.UUID(statement_id))
+        except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+            raise ValueError(f"Invalid statement cursor: {token}") from e
+
+
+@dataclass
+class StatementPage:
+    """A page of statements and the cursor of the next page"""
+
+    statements: list[Statements]
+    next_cursor: StatementCursor | None
+
+
+async def get_statements_page(
+    session: AsyncSession,
+    *where: ColumnElement[bool],
+    after: StatementCursor | None = None,
+    limit: int = 50,
+    load: StatementLoad = "list",
+) -> StatementPage:
+    """
+    Load a page of statements with keyset pagination.
+
+    Pages are ordered newest first on `(date, id)` and continue after the cursor
+    of the previous page instead of using OFFSET, so every page is an index range
+    scan on `ix_statements_date_id` no matter how deep the user scrolls.
+
+    Args:
+        session (AsyncSession): The database session.
+        *where (ColumnElement[bool]): Filter criteria.
+        after (StatementCursor | None): The `next_cursor` of the previous page,
+            None for the first page.
+        limit (int): Number of statements per page.
+        load (StatementLoad): The loading preset, see `statement_load_options`.
+
+    Returns:
+        StatementPage: The statements and the cursor of the next page, which is
+            None on the last page.
+
+    Example:
+        >>> page = await get_statements_page(session, limit=100)
+        >>> while page.next_cursor is not None:
+        ...     page = await get_statements_page(
+        ...         session, after=page.next_cursor, limit=100
+        ...     )
+    """
+    if after is not None:
+        where = (
+            *where,
+            tuple_(Statements.date, Statements.id) < (after.date, after.id),
+        )
+    query = select_statements(*where, load=load).limit(limit + 1)
+    statements = list((await session.scalars(query)).unique())
+
+    next_cursor = None
+    if len(statements) > limit:
+        statements = statements[:limit]
+        last = statements[-1]
+        next_cursor = StatementCursor(date=last.date, id=last.id)
+    return StatementPage(statements=statements, next_cursor=next_cursor)
+
+
+async def stream_statements(
+    session: AsyncSession,
+    *where: ColumnElement[bool],
+    chunk_size: int = 1000,
+    load: StatementLoad = "rows",
+) -> AsyncIterator[Statements]:
+    """
+    Iterate over statements through a server-side cursor.
+
+    The rows are fetched `chunk_size` at a time, so exports of any size run in
+    constant memory as long as the caller does not keep the statements around.
+
+    Args:
+        session (AsyncSession): The database session, the cursor lives in its
+            transaction.
+        *where (ColumnElement[bool]): Filter criteria.
+        chunk_size (int): Number of rows fetched per round trip.
+        load (StatementLoad): The loading preset, see `statement_load_options`.
+
+    Yields:
+        Statements: The statements, newest first.
+
+    Example:
+        >>> async with get_db_session(readonly=True) as session:
+        ...     async for statement in stream_statements(session, chunk_size=5000):
+        ...         writer.writerow(...)
+    """
+    query = select_statements(*where, load=load).execution_options(yield_per=chunk_size)
+    result = await session.stream_scalars(query)
+    try:
+        async for partition in result.partitions():
+            for statement in partition:
+                yield statement
+    finally:
+        await result.close()
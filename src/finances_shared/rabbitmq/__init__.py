@@ -1,4 +1,23 @@
+from .channel_pool import ChannelPool, ChannelPoolStats
+from .dedupe import (
+    DedupeStore,
+    MemoryDedupeStore,
+    PostgresDedupeStore,
+    content_message_id,
+)
 from .listener import RabbitMQListener
 from .producer import RabbitMQProducer
+from .runner import ConsumerRunner, WorkerContext
 
-__all__ = ["RabbitMQListener", "RabbitMQProducer"]
+__all__ = [
+    "ChannelPool",
+    "ChannelPoolStats",
+    "ConsumerRunner",
+    "DedupeStore",
+    "MemoryDedupeStore",
+    "PostgresDedupeStore",
+    "RabbitMQListener",
+    "RabbitMQProducer",
+    "WorkerContext",
+    "content_message_id",
+]
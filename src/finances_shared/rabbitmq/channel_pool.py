@@ -0,0 +1,146 @@
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+from aio_pika.abc import AbstractChannel, AbstractRobustConnection
+
+from finances_shared import metrics
+
+_checkout_wait_seconds = metrics.histogram(
+    "finances_rabbitmq_channel_checkout_wait_seconds",
+    "Time spent waiting for a free channel in the channel pool",
+)
+
+
+@dataclass
+class ChannelPoolStats:
+    """Snapshot of the channel pool usage, useful for sizing the pool"""
+
+    max_size: int
+    size: int
+    idle: int
+    in_use: int
+    checkouts: int
+    waited_checkouts: int
+    total_wait_time: float
+    max_wait_time: float
+    recreated: int
+
+
+class ChannelPool:
+    """
+    Bounded pool of channels on a single (robust) connection.
+
+    Channels are checked out for a single publish and returned afterwards, so
+    concurrent publishers do not queue on one channel. Channels that were closed
+    while idle or in use are dropped and transparently replaced on the next
+    checkout.
+
+    Usage:
+    ```python
+    pool = ChannelPool(connection, max_size=8)
+    async with pool.acquire() as channel:
+        await channel.default_exchange.publish(message, routing_key="queue")
+    ```
+    """
+
+    def __init__(
+        self,
+        connection: AbstractRobustConnection,
+        max_size: int,
+        publisher_confirms: bool = True,
+    ):
+        if max_size < 1:
+            raise ValueError("Channel pool size must be at least 1.")
+        self.connection = connection
+        self.max_size = max_size
+        self.publisher_confirms = publisher_confirms
+        self._semaphore = asyncio.Semaphore(max_size)
+        self._idle: list[AbstractChannel] = []
+        self._size = 0
+        self._checkouts = 0
+        self._waited_checkouts = 0
+        self._total_wait_time = 0.0
+        self._max_wait_time = 0.0
+        self._recreated = 0
+
+    async def _get_channel(self) -> AbstractChannel:
+        while self._idle:
+            channel = self._idle.pop()
+            if not channel.is_closed:
+                return channel
+            self._size -= 1
+            self._recreated += 1
+
+        channel = await self.connection.channel(
+            publisher_confirms=self.publisher_confirms
+        )
+        self._size += 1
+        return channel
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[AbstractChannel]:
+        """
+        Check out a channel from the pool.
+
+        Waits until a channel is free if all `max_size` channels are in use.
+
+        Yields:
+            AbstractChannel: An open channel, returned to the pool on exit.
+        """
+        must_wait = self._semaphore.locked()
+        start = time.perf_counter()
+        await self._semaphore.acquire()
+        waited = time.perf_counter() - start
+
+        self._checkouts += 1
+        self._total_wait_time += waited
+        self._max_wait_time = max(self._max_wait_time, waited)
+        _checkout_wait_seconds.observe(waited)
+        if must_wait:
+            self._waited_checkouts += 1
+
+        try:
+            channel = await self._get_channel()
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+        try:
+            yield channel
+        finally:
+            if channel.is_closed:
+                self._size -= 1
+                self._recreated += 1
+            else:
+                self._idle.append(channel)
+            self._semaphore.release()
+
+    def stats(self) -> ChannelPoolStats:
+        """
+        Get the current pool statistics.
+
+        Returns:
+            ChannelPoolStats: The pool size, wait time and checkout counters.
+        """
+        return ChannelPoolStats(
+            max_size=self.max_size,
+            size=self._size,
+            idle=len(self._idle),
+            in_use=self._size - len(self._idle),
+            checkouts=self._checkouts,
+            waited_checkouts=self._waited_checkouts,
+            total_wait_time=self._total_wait_time,
+            max_wait_time=self._max_wait_time,
+            recreated=self._recreated,
+        )
+
+    async def close(self):
+        """Close all idle channels of the pool."""
+        while self._idle:
+            channel = self._idle.pop()
+            self._size -= 1
+            if not channel.is_closed:
+                await channel.close()
@@ -0,0 +1,151 @@
+import hashlib
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Protocol
+
+from sqlalchemy import ARRAY, Interval, String, bindparam, text
+
+from finances_shared.db import get_db_session
+
+
+def content_message_id(queue_name: str, body: bytes) -> str:
+    """
+    Derive a deterministic message id from the destination queue and the body.
+
+    Publishing the same payload twice, e.g. when a producer retries after a lost
+    confirm, yields the same id, so consumers can recognise the duplicate.
+
+    Args:
+        queue_name (str): The queue the message is published to.
+        body (bytes): The serialized message body.
+
+    Returns:
+        str: The message id, 32 hex characters.
+    """
+    digest = hashlib.sha256(queue_name.encode())
+    digest.update(b"\0")
+    digest.update(body)
+    return digest.hexdigest()[:32]
+
+
+class DedupeStore(Protocol):
+    """Remembers the ids of processed messages"""
+
+    async def seen(self, message_ids: list[str]) -> set[str]:
+        """Get the ids of the given messages that were already processed"""
+        ...
+
+    async def mark(self, message_ids: list[str]) -> None:
+        """Remember the given messages as processed"""
+        ...
+
+
+class MemoryDedupeStore:
+    """
+    Bounded in-process store of processed message ids.
+
+    Only catches redeliveries to the same worker, e.g. after a reconnect. Use
+    `PostgresDedupeStore` to deduplicate across workers.
+    """
+
+    def __init__(self, max_size: int = 100_000):
+        """
+        Args:
+            max_size (int): Maximum number of remembered ids, the least recently
+                seen ones are forgotten first.
+        """
+        self.max_size = max_size
+        self._ids: OrderedDict[str, None] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    async def seen(self, message_ids: list[str]) -> set[str]:
+        seen = set()
+        for message_id in message_ids:
+            if message_id in self._ids:
+                self._ids.move_to_end(message_id)
+                seen.add(message_id)
+        return seen
+
+    async def mark(self, message_ids: list[str]) -> None:
+        for message_id in message_ids:
+            self._ids[message_id] = None
+            self._ids.move_to_end(message_id)
+        while len(self._ids) > self.max_size:
+            self._ids.popitem(last=False)
+
+
+_SEEN_MESSAGES = text("""
+    SELECT message_id FROM processed_messages
+    WHERE queue = :queue AND message_id = ANY(:message_ids)
+    """).bindparams(bindparam("message_ids", type_=ARRAY(String)))
+
+_MARK_MESSAGES = text("""
+    INSERT INTO processed_messages (queue, message_id)
+    SELECT :queue, unnest(:message_ids)
+    ON CONFLICT DO NOTHING
+    """).bindparams(bindparam("message_ids", type_=ARRAY(String)))
+
+_PRUNE_MESSAGES = text("""
+    DELETE FROM processed_messages
+    WHERE processed_at < now() - :max_age
+    """).bindparams(bindparam("max_age", type_=Interval))
+
+
+class PostgresDedupeStore:
+    """
+    Store of processed message ids in the `processed_messages` table, shared by
+    every worker of a queue.
+
+    Ids found in the database are also kept in a local `MemoryDedupeStore`, so
+    repeated redeliveries do not hit the database again. Uses the sessions of
+    `init_db`.
+    """
+
+    def __init__(self, queue_name: str, cache_size: int = 10_000):
+        """
+        Args:
+            queue_name (str): The queue the ids belong to.
+            cache_size (int): Size of the local cache of processed ids.
+        """
+        self.queue_name = queue_name
+        self._cache = MemoryDedupeStore(cache_size)
+
+    async def seen(self, message_ids: list[str]) -> set[str]:
+        seen = await self._cache.seen(message_ids)
+        unknown = [message_id for message_id in message_ids if message_id not in seen]
+        if not unknown:
+            return seen
+
+        async with get_db_session() as session:
+            result = await session.execute(
+                _SEEN_MESSAGES, {"queue": self.queue_name, "message_ids": unknown}
+            )
+            found = set(result.scalars())
+        await self._cache.mark(list(found))
+        return seen | found
+
+    async def mark(self, message_ids: list[str]) -> None:
+        async with get_db_session() as session:
+            await session.execute(
+                _MARK_MESSAGES, {"queue": self.queue_name, "message_ids": message_ids}
+            )
+            await session.commit()
+        await self._cache.mark(message_ids)
+
+    async def prune(self, max_age: timedelta = timedelta(days=7)) -> int:
+        """
+        Forget processed messages older than `max_age`, across all queues.
+
+        Args:
+            max_age (timedelta): Age after which a redelivery is not expected
+                anymore.
+
+        Returns:
+            int: The number of deleted ids.
+        """
+        async with get_db_session() as session:
+            result = await session.execute(_PRUNE_MESSAGES, {"max_age": max_age})
+            await session.commit()
+        return result.rowcount
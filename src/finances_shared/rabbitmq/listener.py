@@ -1,18 +1,129 @@
 import asyncio
+import time
+from collections.abc import Awaitable, Callable
 from logging import Logger
 
 import aio_pika
+from aio_pika.abc import AbstractIncomingMessage
 
+from finances_shared import metrics
 from finances_shared.params import RabbitMQParams
+from finances_shared.rabbitmq.dedupe import DedupeStore
+from finances_shared.serializers import decode_body
+
+# Prefetch of a listener without `prefetch_count` or `max_in_flight`, so the
+# broker does not push the whole queue into the client
+DEFAULT_PREFETCH_COUNT = 10
+
+_in_flight_messages = metrics.gauge(
+    "finances_rabbitmq_consumer_in_flight_messages",
+    "Messages being handled by the consumer",
+    ("queue",),
+)
+_consumed_messages = metrics.counter(
+    "finances_rabbitmq_consumed_messages",
+    "Messages handled by the consumer by outcome",
+    ("queue", "outcome"),
+)
+_handler_seconds = metrics.histogram(
+    "finances_rabbitmq_handler_seconds",
+    "Time spent in the message or batch handler",
+    ("queue",),
+)
 
 
 class RabbitMQListener:
-    def __init__(self, queue_name: str):
+    """
+    RabbitMQ Listener consuming messages from a specified queue.
+
+    `listen` hands the raw messages to the callback, which is responsible for
+    acknowledging them. `consume` runs the handler with a bounded number of
+    messages in flight and acks the message when the handler returns or nacks it
+    when it raises.
+
+    Usage:
+    ```python
+    listener = RabbitMQListener("your_queue_name", prefetch_count=20, max_in_flight=10)
+    await listener.connect(params, logger)
+
+    async def handle(message: AbstractIncomingMessage):
+        statement = decode_body(message.body, message.content_type)
+        ...
+
+    # Runs until listener.stop() is called, e.g. from a SIGTERM handler
+    await listener.consume(handle, logger)
+    ```
+
+    `consume_batch` accumulates messages and hands the handler a list of decoded
+    payloads, so the handler can write them with a single bulk insert:
+    ```python
+    async def handle_batch(statements: list[dict]):
+        ...
+
+    await listener.consume_batch(handle_batch, logger, batch_size=500)
+    ```
+
+    With a dedupe store, `consume` and `consume_batch` skip messages whose
+    message id was already processed, e.g. redeliveries after a reconnect or a
+    crashed consumer. Ids are remembered once the handler succeeded:
+    ```python
+    listener = RabbitMQListener(
+        "your_queue_name", dedupe=PostgresDedupeStore("your_queue_name")
+    )
+    ```
+    """
+
+    def __init__(
+        self,
+        queue_name: str,
+        prefetch_count: int | None = None,
+        max_in_flight: int | None = None,
+        requeue_on_error: bool = True,
+        dedupe: DedupeStore | None = None,
+    ):
+        """
+        Args:
+            queue_name (str): The name of the queue to consume from.
+            prefetch_count (int | None): Maximum number of unacknowledged messages the
+                broker delivers to this consumer. Defaults to `max_in_flight`, or
+                to `DEFAULT_PREFETCH_COUNT` (`batch_size` in `consume_batch`) when
+                neither is set.
+            max_in_flight (int | None): Maximum number of handlers running at once in
+                `consume`. Defaults to `prefetch_count`.
+            requeue_on_error (bool): Requeue messages whose handler raised in
+                `consume`, otherwise they are rejected.
+            dedupe (DedupeStore | None): Store of processed message ids, messages
+                already in it are acked without calling the handler.
+        """
         self.queue_name = queue_name
+        self.prefetch_count = prefetch_count or max_in_flight or DEFAULT_PREFETCH_COUNT
+        self.max_in_flight = max_in_flight or self.prefetch_count
+        self._default_prefetch = prefetch_count is None
+        self.requeue_on_error = requeue_on_error
+        self.dedupe = dedupe
         self.connection = None
         self.channel = None
+        self.in_flight = 0
+        self._params: RabbitMQParams | None = None
+        self._queue = None
+        self._consumer_tag: str | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._tasks: set[asyncio.Task] = set()
+        # Created up front, so a `stop` before `consume` keeps the listener stopped
+        self._stopped = asyncio.Event()
+        self._batch: list[tuple[AbstractIncomingMessage, object]] = []
+        self._batch_lock = asyncio.Lock()
+        self._batch_timer: asyncio.Task | None = None
+        self._batch_handler: Callable[[list], Awaitable[None]] | None = None
+        self._in_flight_messages = _in_flight_messages.labels(queue_name)
+        self._acked_messages = _consumed_messages.labels(queue_name, "ack")
+        self._nacked_messages = _consumed_messages.labels(queue_name, "nack")
+        self._rejected_messages = _consumed_messages.labels(queue_name, "reject")
+        self._duplicate_messages = _consumed_messages.labels(queue_name, "duplicate")
+        self._handler_seconds = _handler_seconds.labels(queue_name)
 
     async def connect(self, params: RabbitMQParams, logger: Logger):
+        self._params = params
         self.connection = await aio_pika.connect_robust(
             params.connection_string(), heartbeat=30
         )
@@ -21,13 +132,276 @@ class RabbitMQListener:
         await self.channel.declare_queue(self.queue_name, durable=True)
         logger.info(f"Connected to RabbitMQ on queue: {self.queue_name}")
 
-    async def listen(self, callback, logger: Logger):
-        if not self.connection or self.connection.is_closed:
-            await self.connect(logger)
+    async def _ensure_connected(self, logger: Logger):
+        if self.connection and not self.connection.is_closed:
+            return
+        if self._params is None:
+            raise RuntimeError(
+                "RabbitMQ listener is not connected. Call connect() first."
+            )
+        await self.connect(self._params, logger)
+
+    async def _start_consuming(self, callback, logger: Logger):
+        await self._ensure_connected(logger)
 
-        queue = await self.channel.get_queue(self.queue_name)
+        # Set when consuming starts, `consume_batch` may have raised the default
+        await self.channel.set_qos(prefetch_count=self.prefetch_count)
+        self._queue = await self.channel.get_queue(self.queue_name)
 
         logger.info(f"Listening for messages on queue: {self.queue_name}")
-        await queue.consume(callback)
+        self._consumer_tag = await self._queue.consume(callback)
+
+    async def listen(self, callback, logger: Logger):
+        if self._stopped.is_set():
+            logger.info(f"Not listening on stopped queue: {self.queue_name}")
+            return
+        await self._start_consuming(callback, logger)
+
+        await self._stopped.wait()  # Keep the listener running until stopped
+
+    async def _seen(self, message_ids: list[str], logger: Logger) -> set[str]:
+        if self.dedupe is None or not message_ids:
+            return set()
+        try:
+            return await self.dedupe.seen(message_ids)
+        except Exception:
+            # Processing a duplicate is better than not processing at all
+            logger.exception(f"Could not check for duplicates on {self.queue_name}")
+            return set()
+
+    async def _mark_processed(self, message_ids: list[str], logger: Logger):
+        if self.dedupe is None or not message_ids:
+            return
+        try:
+            await self.dedupe.mark(message_ids)
+        except Exception:
+            logger.exception(
+                f"Could not remember processed messages on {self.queue_name}"
+            )
+
+    async def _handle(
+        self,
+        message: AbstractIncomingMessage,
+        handler: Callable[[AbstractIncomingMessage], Awaitable[None]],
+        logger: Logger,
+    ):
+        task = asyncio.current_task()
+        self._tasks.add(task)
+        try:
+            async with self._semaphore:
+                self.in_flight += 1
+                self._in_flight_messages.inc()
+                start = time.perf_counter()
+                message_ids = [message.message_id] if message.message_id else []
+                try:
+                    async with message.process(
+                        requeue=self.requeue_on_error, ignore_processed=True
+                    ):
+                        duplicate = bool(await self._seen(message_ids, logger))
+                        if not duplicate:
+                            await handler(message)
+                    if duplicate:
+                        self._duplicate_messages.inc()
+                        logger.info(
+                            f"Skipped duplicate message {message.message_id} from "
+                            f"queue: {self.queue_name}"
+                        )
+                    else:
+                        self._acked_messages.inc()
+                        await self._mark_processed(message_ids, logger)
+                except Exception:
+                    self._nacked_messages.inc()
+                    logger.exception(
+                        f"Error handling message {message.message_id} from queue: "
+                        f"{self.queue_name}"
+                    )
+                finally:
+                    self._handler_seconds.observe(time.perf_counter() - start)
+                    self.in_flight -= 1
+                    self._in_flight_messages.dec()
+        finally:
+            self._tasks.discard(task)
+
+    async def consume(
+        self,
+        handler: Callable[[AbstractIncomingMessage], Awaitable[None]],
+        logger: Logger,
+    ):
+        """
+        Consume messages with bounded concurrency until `stop` is called.
+
+        The message is acked after `handler` returns and nacked (requeued when
+        `requeue_on_error` is set) when it raises.
+
+        Args:
+            handler (Callable): Async function called with each incoming message.
+            logger (Logger): Logger instance.
+        """
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+
+        async def _callback(message: AbstractIncomingMessage):
+            await self._handle(message, handler, logger)
+
+        await self.listen(_callback, logger)
+
+    async def _flush_batch(self, logger: Logger):
+        async with self._batch_lock:
+            batch, self._batch = self._batch, []
+            if (
+                self._batch_timer is not None
+                and self._batch_timer is not asyncio.current_task()
+            ):
+                self._batch_timer.cancel()
+            self._batch_timer = None
+            if not batch:
+                return
+
+            # Every earlier delivery on the channel is already settled, so the
+            # whole batch can be acked or nacked with the last delivery tag.
+            last_message = batch[-1][0]
+            self.in_flight += len(batch)
+            self._in_flight_messages.inc(len(batch))
+            start = time.perf_counter()
+            try:
+                seen = await self._seen(
+                    list({m.message_id for m, _ in batch if m.message_id}), logger
+                )
+                payloads, message_ids = [], []
+                for message, payload in batch:
+                    if message.message_id:
+                        if message.message_id in seen:
+                            continue
+                        seen.add(message.message_id)
+                        message_ids.append(message.message_id)
+                    payloads.append(payload)
+                duplicates = len(batch) - len(payloads)
+                if payloads:
+                    await self._batch_handler(payloads)
+            except Exception:
+                logger.exception(
+                    f"Error handling batch of {len(batch)} messages from queue: "
+                    f"{self.queue_name}"
+                )
+                await last_message.nack(multiple=True, requeue=self.requeue_on_error)
+                self._nacked_messages.inc(len(batch))
+            else:
+                await last_message.ack(multiple=True)
+                self._acked_messages.inc(len(payloads))
+                if duplicates:
+                    self._duplicate_messages.inc(duplicates)
+                    logger.info(
+                        f"Skipped {duplicates} duplicate messages from queue: "
+                        f"{self.queue_name}"
+                    )
+                await self._mark_processed(message_ids, logger)
+            finally:
+                self._handler_seconds.observe(time.perf_counter() - start)
+                self.in_flight -= len(batch)
+                self._in_flight_messages.dec(len(batch))
+
+    async def _flush_batch_after(self, delay: float, logger: Logger):
+        await asyncio.sleep(delay)
+        await self._flush_batch(logger)
+
+    async def consume_batch(
+        self,
+        handler: Callable[[list], Awaitable[None]],
+        logger: Logger,
+        batch_size: int = 100,
+        batch_timeout_ms: int = 500,
+    ):
+        """
+        Consume messages in batches until `stop` is called.
+
+        Messages are decoded once, with the serializer matching their content
+        type, and accumulated until `batch_size` messages are
+        waiting or `batch_timeout_ms` passed since the first message of the batch.
+        The handler is called with the list of decoded payloads and the whole
+        batch is acked together once it returns, or nacked when it raises.
+        Messages that cannot be decoded are rejected without requeueing, already
+        processed messages are left out of the batch when a dedupe store is set.
+
+        Args:
+            handler (Callable): Async function called with a list of payloads.
+            logger (Logger): Logger instance.
+            batch_size (int): Maximum number of messages in one batch.
+            batch_timeout_ms (int): Maximum time to wait for a batch to fill up.
+        """
+        if self._default_prefetch:
+            self.prefetch_count = max(self.prefetch_count, batch_size)
+        elif self.prefetch_count < batch_size:
+            logger.warning(
+                f"prefetch_count ({self.prefetch_count}) is lower than batch_size "
+                f"({batch_size}), batches will only be flushed by the timeout"
+            )
+        self._batch_handler = handler
+
+        async def _callback(message: AbstractIncomingMessage):
+            try:
+                payload = decode_body(message.body, message.content_type)
+            except ValueError:
+                logger.error(
+                    f"Rejecting undecodable message {message.message_id} from "
+                    f"queue: {self.queue_name}"
+                )
+                await message.reject(requeue=False)
+                self._rejected_messages.inc()
+                return
+
+            self._batch.append((message, payload))
+            if len(self._batch) >= batch_size:
+                task = asyncio.current_task()
+                self._tasks.add(task)
+                try:
+                    await self._flush_batch(logger)
+                finally:
+                    self._tasks.discard(task)
+            elif self._batch_timer is None:
+                self._batch_timer = asyncio.create_task(
+                    self._flush_batch_after(batch_timeout_ms / 1000, logger)
+                )
+
+        await self.listen(_callback, logger)
+
+    async def stop(self, logger: Logger, timeout: float | None = 30):
+        """
+        Stop consuming and drain the messages being handled.
+
+        New deliveries are cancelled first, then the running handlers get `timeout`
+        seconds to finish before the connection is closed. Unacknowledged messages
+        are redelivered by the broker. The listener stays stopped, a later
+        `consume` returns right away instead of reconnecting.
+
+        Args:
+            logger (Logger): Logger instance.
+            timeout (float | None): Seconds to wait for in-flight handlers.
+        """
+        if self._queue is not None and self._consumer_tag is not None:
+            await self._queue.cancel(self._consumer_tag)
+            self._consumer_tag = None
+
+        if self._batch_handler is not None:
+            await self._flush_batch(logger)
+
+        if self._tasks:
+            logger.info(
+                f"Draining {len(self._tasks)} in-flight messages on queue: "
+                f"{self.queue_name}"
+            )
+            _, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+            if pending:
+                logger.warning(
+                    f"{len(pending)} messages were not processed before shutdown "
+                    f"on queue: {self.queue_name}"
+                )
+                for task in pending:
+                    task.cancel()
+
+        if self.connection and not self.connection.is_closed:
+            await self.connection.close()
+        self.connection = None
+        self.channel = None
+        self._queue = None
 
-        await asyncio.Future()  # Keep the listener running
+        self._stopped.set()
+        logger.info(f"Stopped listening on queue: {self.queue_name}")
@@ -1,12 +1,41 @@
 import asyncio
 import datetime
 import json
+import logging
+import time
+import uuid
+from collections.abc import Callable, Iterable
 from json import JSONEncoder
 from logging import Logger
 
 import aio_pika
 
+from finances_shared import metrics
 from finances_shared.params import RabbitMQParams
+from finances_shared.rabbitmq.channel_pool import ChannelPool, ChannelPoolStats
+from finances_shared.rabbitmq.dedupe import content_message_id
+from finances_shared.serializers import Serializer, get_serializer
+
+_publish_seconds = metrics.histogram(
+    "finances_rabbitmq_publish_seconds",
+    "Time until the broker confirmed a published message",
+    ("queue",),
+)
+_published_messages = metrics.counter(
+    "finances_rabbitmq_published_messages",
+    "Messages confirmed by the broker",
+    ("queue",),
+)
+_publish_errors = metrics.counter(
+    "finances_rabbitmq_publish_errors",
+    "Messages the broker rejected or that failed to publish",
+    ("queue",),
+)
+_lock_wait_seconds = metrics.histogram(
+    "finances_rabbitmq_producer_lock_wait_seconds",
+    "Time spent waiting for the producer channel lock",
+    ("queue",),
+)
 
 
 class DatetimeEncoder(JSONEncoder):
@@ -44,51 +73,401 @@ class RabbitMQProducer:
         await producer.send_message(message, logger)
         return {"status": "Message sent"}
     ```
+
+    For high volume publishing use `send_many`, which pipelines the publishes on
+    the channel and only waits for the publisher confirms, or start the background
+    batching mode and `enqueue` messages from anywhere in the application:
+    ```python
+    await producer.send_many(statements, logger)
+
+    producer.start_batching(logger)
+    await producer.enqueue(statement)  # resolves once the broker confirmed it
+    await producer.stop_batching()
+    ```
+
+    Producers shared by many concurrent requests can be backed by a bounded pool of
+    channels instead of the single lock-guarded channel:
+    ```python
+    producer = RabbitMQProducer("your_queue_name", pool_size=8)
+    ...
+    producer.pool_stats()
+    ```
+
+    Every message gets a random message id by default. A listener with a dedupe
+    store then only skips redeliveries of the same message, two identical but
+    legitimate messages, e.g. equal payments on the same day, are both
+    processed. Set `content_message_ids` to derive the id from the queue and the
+    body, so republishing the same payload is skipped as well, or derive it from
+    a natural key when the body of the same entity can differ between publishes:
+    ```python
+    producer = RabbitMQProducer("statements", content_message_ids=True)
+    producer = RabbitMQProducer(
+        "statements",
+        message_id=lambda s: f"{s['account_iban']}:{s['date']}:{s['amount']}",
+    )
+    ```
     """
 
-    def __init__(self, queue_name: str):
+    def __init__(
+        self,
+        queue_name: str,
+        max_in_flight: int = 256,
+        batch_size: int = 100,
+        batch_interval: float = 0.05,
+        pool_size: int | None = None,
+        serializer: Serializer | None = None,
+        message_id: Callable[[dict], str] | None = None,
+        content_message_ids: bool = False,
+    ):
+        """
+        Args:
+            queue_name (str): The name of the queue to publish to.
+            max_in_flight (int): Maximum number of unconfirmed publishes at a time.
+            batch_size (int): Maximum number of messages coalesced into one batch
+                in the background batching mode.
+            batch_interval (float): Maximum seconds to wait for a batch to fill up
+                in the background batching mode.
+            pool_size (int | None): When set, publishes check out a channel from a
+                pool of this many channels instead of sharing one channel.
+            serializer (Serializer | None): Serializer for the message bodies, its
+                content type is set on the messages. Defaults to the fastest
+                available JSON serializer.
+            message_id (Callable[[dict], str] | None): Derives the message id from
+                the message. Defaults to a random id.
+            content_message_ids (bool): Without `message_id`, use a hash of the
+                queue name and the body as the message id instead of a random one.
+        """
         self.queue_name = queue_name
         self.connection = None
         self.channel = None
+        self.max_in_flight = max_in_flight
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.pool_size = pool_size
+        self.pool: ChannelPool | None = None
+        self.serializer = serializer or get_serializer()
+        self.message_id = message_id
+        self.content_message_ids = content_message_ids
+        self._params: RabbitMQParams | None = None
         self._lock = asyncio.Lock()
+        self._batch_queue: asyncio.Queue | None = None
+        self._batch_task: asyncio.Task | None = None
+        self._publish_seconds = _publish_seconds.labels(queue_name)
+        self._published_messages = _published_messages.labels(queue_name)
+        self._publish_errors = _publish_errors.labels(queue_name)
+        self._lock_wait_seconds = _lock_wait_seconds.labels(queue_name)
 
     async def connect(self, params: RabbitMQParams, logger: Logger):
+        self._params = params
+        if self.pool is not None:
+            # On a reconnect, release the channels of the previous connection
+            await self.pool.close()
+            self.pool = None
         self.connection = await aio_pika.connect_robust(
             params.connection_string(), heartbeat=30
         )
 
-        self.channel = await self.connection.channel()
-        await self.channel.declare_queue(self.queue_name, durable=True)
+        if self.pool_size:
+            self.pool = ChannelPool(self.connection, self.pool_size)
+            async with self.pool.acquire() as channel:
+                await channel.declare_queue(self.queue_name, durable=True)
+        else:
+            self.channel = await self.connection.channel(publisher_confirms=True)
+            await self.channel.declare_queue(self.queue_name, durable=True)
         logger.info(f"Connected to RabbitMQ on queue: {self.queue_name}")
 
+    async def _ensure_connected(self, logger: Logger):
+        if self.connection and not self.connection.is_closed:
+            return
+        if self._params is None:
+            raise RuntimeError(
+                "RabbitMQ producer is not connected. Call connect() first."
+            )
+        await self.connect(self._params, logger)
+
+    def _build_message(self, message: dict) -> aio_pika.Message:
+        body = self.serializer.dumps(message)
+        if self.message_id is not None:
+            message_id = self.message_id(message)
+        elif self.content_message_ids:
+            message_id = content_message_id(self.queue_name, body)
+        else:
+            message_id = uuid.uuid4().hex
+        return aio_pika.Message(
+            body=body,
+            content_type=self.serializer.content_type,
+            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+            message_id=message_id,
+        )
+
+    async def _publish(self, message: aio_pika.Message):
+        # With publisher confirms enabled this resolves once the broker acked it
+        start = time.perf_counter()
+        try:
+            if self.pool is not None:
+                async with self.pool.acquire() as channel:
+                    confirmation = await channel.default_exchange.publish(
+                        message, routing_key=self.queue_name
+                    )
+            else:
+                confirmation = await self.channel.default_exchange.publish(
+                    message, routing_key=self.queue_name
+                )
+        except Exception:
+            self._publish_errors.inc()
+            raise
+        self._publish_seconds.observe(time.perf_counter() - start)
+        self._published_messages.inc()
+        return confirmation
+
     async def send_message(self, message: dict, logger: Logger):
-        if not self.connection or self.connection.is_closed:
-            await self.connect(logger)
-
-        message_json = json.dumps(message, cls=DatetimeEncoder)
-        async with self._lock:
-            await self.channel.default_exchange.publish(
-                aio_pika.Message(
-                    body=message_json.encode(),
-                    delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
-                ),
-                routing_key=self.queue_name,
+        await self._ensure_connected(logger)
+
+        rabbitmq_message = self._build_message(message)
+        if self.pool is not None:
+            await self._publish(rabbitmq_message)
+        else:
+            lock_wait_start = time.perf_counter()
+            async with self._lock:
+                self._lock_wait_seconds.observe(time.perf_counter() - lock_wait_start)
+                await self._publish(rabbitmq_message)
+        logger.info(
+            json.dumps(
+                {
+                    "size": len(rabbitmq_message.body),
+                    "status": "sending",
+                    "queue": self.queue_name,
+                }
             )
-            logger.info(
+        )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
                 json.dumps(
                     {
-                        "message": message_json,
+                        "message": message,
                         "status": "sending",
                         "queue": self.queue_name,
+                    },
+                    default=str,
+                )
+            )
+
+    def pool_stats(self) -> ChannelPoolStats | None:
+        """
+        Get the channel pool statistics.
+
+        Returns:
+            ChannelPoolStats | None: The pool statistics, or None if the producer
+                is not backed by a channel pool.
+        """
+        if self.pool is None:
+            return None
+        return self.pool.stats()
+
+    async def send_many(
+        self,
+        messages: Iterable[dict],
+        logger: Logger,
+        max_in_flight: int | None = None,
+    ) -> int:
+        """
+        Publish many messages without waiting for each broker round trip.
+
+        The publishes are pipelined on the channel and at most `max_in_flight`
+        publisher confirms are outstanding at a time. No new messages are
+        published after the first failure, the ones already in flight are still
+        awaited before the error is raised.
+
+        Args:
+            messages (Iterable[dict]): The messages to publish.
+            logger (Logger): Logger instance.
+            max_in_flight (int | None): Overrides the producer's `max_in_flight`.
+
+        Returns:
+            int: The number of messages confirmed by the broker.
+
+        Raises:
+            aio_pika.exceptions.DeliveryError: If the broker rejected a message.
+        """
+        await self._ensure_connected(logger)
+
+        in_flight = asyncio.Semaphore(max_in_flight or self.max_in_flight)
+        pending: set[asyncio.Task] = set()
+        errors: list[BaseException] = []
+        confirmed = 0
+
+        def _on_done(task: asyncio.Task):
+            nonlocal confirmed
+            pending.discard(task)
+            in_flight.release()
+            if task.cancelled():
+                return
+            # Retrieving the exception here also keeps asyncio from reporting
+            # it as never retrieved
+            error = task.exception()
+            if error is None:
+                confirmed += 1
+            else:
+                errors.append(error)
+
+        try:
+            for message in messages:
+                await in_flight.acquire()
+                if errors:
+                    in_flight.release()
+                    break
+                task = asyncio.create_task(self._publish(self._build_message(message)))
+                pending.add(task)
+                task.add_done_callback(_on_done)
+            # The done callbacks run before gather returns, they were added first
+            await asyncio.gather(*pending, return_exceptions=True)
+        except BaseException:
+            for task in pending:
+                task.cancel()
+            raise
+
+        if errors:
+            logger.error(
+                json.dumps(
+                    {
+                        "count": confirmed,
+                        "failed": len(errors),
+                        "status": "failed",
+                        "queue": self.queue_name,
+                    }
+                )
+            )
+            raise errors[0]
+
+        logger.info(
+            json.dumps({"count": confirmed, "status": "sent", "queue": self.queue_name})
+        )
+        return confirmed
+
+    def start_batching(self, logger: Logger):
+        """
+        Start the background batching mode.
+
+        Messages passed to `enqueue` are coalesced until `batch_size` messages are
+        waiting or `batch_interval` seconds passed, then published with `send_many`.
+
+        Args:
+            logger (Logger): Logger instance.
+        """
+        if self._batch_task is not None:
+            return
+        self._batch_queue = asyncio.Queue()
+        self._batch_task = asyncio.create_task(self._batch_loop(logger))
+
+    async def enqueue(self, message: dict):
+        """
+        Queue a message for the background batching mode.
+
+        Args:
+            message (dict): The message to publish.
+
+        Returns:
+            The broker confirmation once the batch containing the message was sent.
+        """
+        if self._batch_queue is None:
+            raise RuntimeError("Batching is not started. Call start_batching() first.")
+        future = asyncio.get_running_loop().create_future()
+        await self._batch_queue.put((message, future))
+        return await future
+
+    async def stop_batching(self):
+        """Flush the messages waiting for a batch and stop the batching mode."""
+        if self._batch_task is None:
+            return
+        await self._batch_queue.put(None)
+        await self._batch_task
+        self._batch_task = None
+        self._batch_queue = None
+
+    async def _collect_batch(self) -> tuple[list, bool]:
+        batch = []
+        item = await self._batch_queue.get()
+        if item is None:
+            return batch, True
+        batch.append(item)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._batch_queue.get(), timeout)
+            except TimeoutError:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _batch_loop(self, logger: Logger):
+        stopping = False
+        while not stopping:
+            batch, stopping = await self._collect_batch()
+            if not batch:
+                continue
+            try:
+                await self._ensure_connected(logger)
+            except Exception as e:
+                results = [e] * len(batch)
+            else:
+                # Built one by one, a message that can not be serialized only
+                # fails its own future
+                built: list[aio_pika.Message | Exception] = []
+                for message, _ in batch:
+                    try:
+                        built.append(self._build_message(message))
+                    except Exception as e:
+                        built.append(e)
+                published = iter(
+                    await asyncio.gather(
+                        *(
+                            self._publish(message)
+                            for message in built
+                            if not isinstance(message, Exception)
+                        ),
+                        return_exceptions=True,
+                    )
+                )
+                results = [
+                    message if isinstance(message, Exception) else next(published)
+                    for message in built
+                ]
+
+            failed = 0
+            for (_, future), result in zip(batch, results):
+                if isinstance(result, BaseException):
+                    failed += 1
+                    if not future.done():
+                        future.set_exception(result)
+                elif not future.done():
+                    future.set_result(result)
+            logger.info(
+                json.dumps(
+                    {
+                        "count": len(batch) - failed,
+                        "failed": failed,
+                        "status": "sent",
+                        "queue": self.queue_name,
                     }
                 )
             )
 
     async def close(self):
+        await self.stop_batching()
         if self.connection and not self.connection.is_closed:
+            if self.pool is not None:
+                await self.pool.close()
             await self.connection.close()
             self.connection = None
             self.channel = None
+            self.pool = None
             print("RabbitMQ connection closed.")
         else:
             print("RabbitMQ connection is already closed or was never opened.")
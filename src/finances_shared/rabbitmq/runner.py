@@ -0,0 +1,304 @@
+import asyncio
+import multiprocessing
+import os
+import signal
+import time
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from logging import Logger
+from multiprocessing.connection import wait
+from multiprocessing.process import BaseProcess
+from typing import Any, TypeVar
+
+from finances_shared.db import init_db
+from finances_shared.logger import add_global_log_context, get_logger
+from finances_shared.params import RabbitMQParams
+from finances_shared.rabbitmq.listener import RabbitMQListener
+
+T = TypeVar("T")
+
+
+@dataclass
+class WorkerContext:
+    """What a worker process of `ConsumerRunner` hands to its entry point"""
+
+    index: int
+    listener: RabbitMQListener
+    logger: Logger
+    executor: ProcessPoolExecutor | None = None
+
+    async def run_cpu_bound(self, function: Callable[..., T], *args: Any) -> T:
+        """
+        Run a CPU-bound function in the worker's process pool.
+
+        Without a pool (`cpu_workers=0`) the function runs inline, blocking the
+        event loop of the worker.
+
+        Args:
+            function (Callable[..., T]): A picklable, module level function.
+            *args (Any): Its picklable arguments.
+
+        Returns:
+            T: The return value of the function.
+        """
+        if self.executor is None:
+            return function(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(function, *args))
+
+
+WorkerMain = Callable[[WorkerContext], Awaitable[None]]
+ListenerFactory = Callable[..., RabbitMQListener]
+
+
+async def _run_worker(
+    index: int,
+    main: WorkerMain,
+    queue_name: str,
+    listener_factory: ListenerFactory,
+    listener_kwargs: dict[str, Any],
+    params: RabbitMQParams | None,
+    cpu_workers: int,
+    shutdown_timeout: float,
+    with_db: bool,
+    logger_name: str,
+):
+    logger = get_logger(logger_name)
+    add_global_log_context(worker=index, pid=os.getpid())
+
+    if with_db:
+        init_db(logger)
+    listener = listener_factory(queue_name, **listener_kwargs)
+    await listener.connect(params or RabbitMQParams.from_env(logger), logger)
+
+    stopping: asyncio.Task | None = None
+
+    def _on_sigterm():
+        nonlocal stopping
+        if stopping is None:
+            stopping = asyncio.create_task(
+                listener.stop(logger, timeout=shutdown_timeout)
+            )
+
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGTERM, _on_sigterm)
+
+    executor = None
+    if cpu_workers:
+        executor = ProcessPoolExecutor(
+            cpu_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    try:
+        await main(WorkerContext(index, listener, logger, executor))
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        loop.remove_signal_handler(signal.SIGTERM)
+        if stopping is None:
+            await listener.stop(logger, timeout=shutdown_timeout)
+        else:
+            await stopping
+
+
+def _worker_process(index: int, *args: Any):
+    # Ctrl+C reaches the whole process group, the workers wait for the SIGTERM
+    # of the supervisor instead so the shutdown is coordinated.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(_run_worker(index, *args))
+
+
+class ConsumerRunner:
+    """
+    Runs a `RabbitMQListener` in several worker processes to use multiple cores.
+
+    Every worker is a separate process with its own event loop, RabbitMQ
+    connection, listener and database engine, created from the environment like
+    in a single process service. The supervisor restarts workers that crash, a
+    worker whose entry point returns is done and is not restarted. SIGTERM/SIGINT
+    are forwarded to all workers, each worker then stops consuming and drains its
+    in-flight messages before exiting.
+
+    The entry point is called in every worker with a `WorkerContext` and must be
+    a module level async function, since it is sent to the spawned processes:
+    ```python
+    async def worker_main(ctx: WorkerContext):
+        async def handle(message: AbstractIncomingMessage):
+            rows = await ctx.run_cpu_bound(parse_csv, message.body)
+            ...
+
+        await ctx.listener.consume(handle, ctx.logger)
+
+    if __name__ == "__main__":
+        runner = ConsumerRunner(
+            worker_main,
+            "statements",
+            workers=4,
+            cpu_workers=2,
+            listener_kwargs={"prefetch_count": 50},
+        )
+        sys.exit(runner.run())
+    ```
+    """
+
+    def __init__(
+        self,
+        main: WorkerMain,
+        queue_name: str,
+        workers: int | None = None,
+        cpu_workers: int = 0,
+        listener_factory: ListenerFactory = RabbitMQListener,
+        listener_kwargs: dict[str, Any] | None = None,
+        params: RabbitMQParams | None = None,
+        shutdown_timeout: float = 30.0,
+        restart_delay: float = 1.0,
+        max_restarts: int = 10,
+        restart_window: float = 60.0,
+        with_db: bool = True,
+        logger_name: str = "consumer",
+    ):
+        """
+        Args:
+            main (WorkerMain): Async entry point of every worker.
+            queue_name (str): The queue the listeners consume from.
+            workers (int | None): Number of worker processes, defaults to the
+                number of CPUs.
+            cpu_workers (int): Size of the process pool of every worker for
+                `WorkerContext.run_cpu_bound`, no pool when 0.
+            listener_factory (ListenerFactory): Creates the listener of every
+                worker from the queue name and `listener_kwargs`, must be
+                picklable like `main`.
+            listener_kwargs (dict[str, Any] | None): Keyword arguments of
+                `listener_factory`, e.g. `prefetch_count`.
+            params (RabbitMQParams | None): Connection parameters of the
+                listeners, read from the environment in every worker when not set.
+            shutdown_timeout (float): Seconds the workers get to drain their
+                in-flight messages before they are killed.
+            restart_delay (float): Seconds to wait before restarting a worker.
+            max_restarts (int): Maximum number of restarts within
+                `restart_window`, the runner gives up when it is exceeded.
+            restart_window (float): Seconds over which the restarts are counted.
+            with_db (bool): Initialize the database engine in every worker.
+            logger_name (str): Name of the logger of the supervisor and workers.
+        """
+        self.main = main
+        self.queue_name = queue_name
+        self.workers = workers or os.cpu_count() or 1
+        self.cpu_workers = cpu_workers
+        self.listener_factory = listener_factory
+        self.listener_kwargs = listener_kwargs or {}
+        self.params = params
+        self.shutdown_timeout = shutdown_timeout
+        self.restart_delay = restart_delay
+        self.max_restarts = max_restarts
+        self.restart_window = restart_window
+        self.with_db = with_db
+        self.logger = get_logger(logger_name)
+        self._logger_name = logger_name
+        # Spawned workers start from a clean interpreter, nothing like open
+        # connections or the log queue thread is inherited from the supervisor.
+        self._context = multiprocessing.get_context("spawn")
+        self._processes: dict[int, BaseProcess] = {}
+        self._restarts: list[float] = []
+        self._stopping = False
+
+    def _start_worker(self, index: int):
+        process = self._context.Process(
+            target=_worker_process,
+            args=(
+                index,
+                self.main,
+                self.queue_name,
+                self.listener_factory,
+                self.listener_kwargs,
+                self.params,
+                self.cpu_workers,
+                self.shutdown_timeout,
+                self.with_db,
+                self._logger_name,
+            ),
+            name=f"{self.queue_name}-worker-{index}",
+        )
+        process.start()
+        self._processes[index] = process
+        self.logger.info(f"Started worker {index} with pid {process.pid}")
+
+    def _request_stop(self, signum: int, frame: Any):
+        self._stopping = True
+
+    def _restart_allowed(self) -> bool:
+        now = time.monotonic()
+        self._restarts = [t for t in self._restarts if now - t < self.restart_window]
+        if len(self._restarts) >= self.max_restarts:
+            return False
+        self._restarts.append(now)
+        return True
+
+    def _stop_workers(self):
+        alive = [process for process in self._processes.values() if process.is_alive()]
+        self.logger.info(f"Stopping {len(alive)} workers")
+        for process in alive:
+            process.terminate()  # SIGTERM, the worker drains and exits
+
+        deadline = time.monotonic() + self.shutdown_timeout + 5
+        for process in alive:
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                self.logger.warning(f"Killing worker {process.name}")
+                process.kill()
+                process.join()
+
+    def run(self) -> int:
+        """
+        Start the workers and supervise them until SIGTERM or SIGINT, or until
+        every worker is done.
+
+        Returns:
+            int: The exit code, 0 after a requested shutdown or when all workers
+                returned and 1 when workers crashed more than `max_restarts` times
+                in `restart_window`.
+        """
+        previous_handlers = {
+            signum: signal.signal(signum, self._request_stop)
+            for signum in (signal.SIGTERM, signal.SIGINT)
+        }
+        exit_code = 0
+        try:
+            for index in range(self.workers):
+                self._start_worker(index)
+
+            while not self._stopping and self._processes:
+                # Wake up when a worker exits, or regularly to notice the stop
+                # request. The exit is checked on the process itself, a child of
+                # the worker may still hold its sentinel open.
+                wait([p.sentinel for p in self._processes.values()], timeout=1.0)
+                for index, process in list(self._processes.items()):
+                    if self._stopping or process.is_alive():
+                        continue
+                    process.join()
+                    if process.exitcode == 0:
+                        self.logger.info(f"Worker {index} is done")
+                        del self._processes[index]
+                        continue
+                    self.logger.error(
+                        f"Worker {index} exited with code {process.exitcode}"
+                    )
+                    if not self._restart_allowed():
+                        self.logger.error(
+                            f"Workers restarted {self.max_restarts} times within "
+                            f"{self.restart_window}s, giving up"
+                        )
+                        self._stopping = True
+                        exit_code = 1
+                        break
+                    time.sleep(self.restart_delay)
+                    if self._stopping:
+                        break
+                    self._start_worker(index)
+        finally:
+            self._stop_workers()
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+        self.logger.info("All workers stopped")
+        return exit_code
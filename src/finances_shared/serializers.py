@@ -0,0 +1,155 @@
+import datetime
+import decimal
+import json
+import uuid
+from typing import Any, Protocol
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+
+JSON_CONTENT_TYPE = "application/json"
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+
+
+class Serializer(Protocol):
+    """Encodes and decodes message payloads for a single content type"""
+
+    content_type: str
+
+    def dumps(self, obj: Any) -> bytes: ...
+
+    def loads(self, data: bytes) -> Any: ...
+
+
+def _default(obj: Any) -> Any:
+    """Fallback for the types the backends can not encode natively"""
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+
+class JsonSerializer:
+    """JSON serializer using the standard library"""
+
+    content_type = JSON_CONTENT_TYPE
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, default=_default, separators=(",", ":")).encode()
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class OrjsonSerializer:
+    """JSON serializer using orjson, which encodes datetimes and UUIDs natively"""
+
+    content_type = JSON_CONTENT_TYPE
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError(
+                "orjson is not installed. Install finances-shared[fast] to use it."
+            )
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+class MsgpackSerializer:
+    """
+    Compact binary serializer using msgpack.
+
+    Datetimes, UUIDs and Decimals are encoded as strings like the JSON serializers,
+    so a payload decodes to the same values whichever content type it was sent as.
+    """
+
+    content_type = MSGPACK_CONTENT_TYPE
+
+    def __init__(self):
+        if msgpack is None:
+            raise ImportError(
+                "msgpack is not installed. Install finances-shared[fast] to use it."
+            )
+
+    def dumps(self, obj: Any) -> bytes:
+        return msgpack.packb(obj, default=_default)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data)
+
+
+def _fastest_json_serializer() -> Serializer:
+    if orjson is not None:
+        return OrjsonSerializer()
+    return JsonSerializer()
+
+
+_serializers: dict[str, Serializer] = {JSON_CONTENT_TYPE: _fastest_json_serializer()}
+if msgpack is not None:
+    _serializers[MSGPACK_CONTENT_TYPE] = MsgpackSerializer()
+
+
+def register_serializer(serializer: Serializer) -> None:
+    """
+    Register a serializer to decode messages with its content type.
+
+    Args:
+        serializer (Serializer): The serializer, replaces any registered serializer
+            with the same content type.
+    """
+    _serializers[serializer.content_type] = serializer
+
+
+def get_serializer(content_type: str | None = None) -> Serializer:
+    """
+    Get the serializer for a content type.
+
+    Args:
+        content_type (str | None): The content type of the message. Messages without
+            a content type are treated as JSON.
+
+    Returns:
+        Serializer: The registered serializer for the content type.
+
+    Raises:
+        ValueError: If no serializer is registered for the content type.
+    """
+    serializer = _serializers.get(content_type or JSON_CONTENT_TYPE)
+    if serializer is None:
+        raise ValueError(f"No serializer registered for content type: {content_type}")
+    return serializer
+
+
+def decode_body(body: bytes, content_type: str | None = None) -> Any:
+    """
+    Decode a message body with the serializer matching its content type.
+
+    Args:
+        body (bytes): The raw message body.
+        content_type (str | None): The content type of the message.
+
+    Returns:
+        Any: The decoded payload.
+
+    Raises:
+        ValueError: If the content type is unknown or the body can not be decoded.
+    """
+    try:
+        return get_serializer(content_type).loads(body)
+    except TypeError as e:
+        raise ValueError(f"Could not decode message body: {e}") from e
@@ -0,0 +1,202 @@
+import uuid
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from finances_shared.dtos import StatementDTO
+
+STATEMENT_NATURAL_KEY = (
+    "account_iban",
+    "date",
+    "amount",
+    "counterparty_iban",
+    "counterparty_name",
+)
+
+_STATEMENT_COLUMNS = (
+    "id",
+    "date",
+    "interest_date",
+    "amount",
+    "account_iban",
+    "account_name",
+    "counterparty_iban",
+    "counterparty_name",
+    "description",
+)
+
+_STAGING_TABLE = "_statements_staging"
+
+# Ids given for a natural key that another staged or stored statement already
+# uses with that id, inserting them would violate the primary key or leave two
+# statements sharing an id
+_CONFLICTING_IDS = text(f"""
+    SELECT DISTINCT staging.id
+    FROM {_STAGING_TABLE} AS staging
+    JOIN (
+        SELECT id, {", ".join(STATEMENT_NATURAL_KEY)}
+        FROM statements
+        WHERE id IN (SELECT id FROM {_STAGING_TABLE})
+        UNION ALL
+        SELECT id, {", ".join(STATEMENT_NATURAL_KEY)}
+        FROM {_STAGING_TABLE}
+    ) AS other ON other.id = staging.id
+    WHERE ({", ".join(f"staging.{column}" for column in STATEMENT_NATURAL_KEY)})
+        IS DISTINCT FROM
+        ({", ".join(f"other.{column}" for column in STATEMENT_NATURAL_KEY)})
+    ORDER BY staging.id
+    LIMIT 10
+    """)
+
+# The sub-statements share one snapshot, so `existing` counts the natural keys
+# stored before the upsert. `xmax` can not be returned from a partitioned table
+# to tell inserts and updates apart.
+_UPSERT_STATEMENTS = text(f"""
+    WITH existing AS (
+        SELECT count(*) AS updated
+        FROM (
+            SELECT DISTINCT {", ".join(STATEMENT_NATURAL_KEY)} FROM {_STAGING_TABLE}
+        ) AS staging
+        WHERE EXISTS (
+            SELECT 1
+            FROM statements
+            WHERE statements.account_iban = staging.account_iban
+                AND statements.date = staging.date
+                AND statements.amount = staging.amount
+                AND statements.counterparty_iban IS NOT DISTINCT FROM staging.counterparty_iban
+                AND statements.counterparty_name IS NOT DISTINCT FROM staging.counterparty_name
+        )
+    ), upserted AS (
+        INSERT INTO statements ({", ".join(_STATEMENT_COLUMNS)})
+        SELECT DISTINCT ON ({", ".join(STATEMENT_NATURAL_KEY)})
+            {", ".join(_STATEMENT_COLUMNS)}
+        FROM {_STAGING_TABLE}
+        ORDER BY {", ".join(STATEMENT_NATURAL_KEY)}
+        ON CONFLICT ON CONSTRAINT uq_statements_natural_key DO UPDATE SET
+            interest_date = EXCLUDED.interest_date,
+            account_name = EXCLUDED.account_name,
+            description = EXCLUDED.description
+        RETURNING id, account_iban, date, amount, counterparty_iban, counterparty_name
+    ), tagged AS (
+        INSERT INTO tags_to_statement (tag_id, statement_id, statement_date)
+        SELECT DISTINCT tags.id, upserted.id, upserted.date
+        FROM upserted
+        JOIN {_STAGING_TABLE} AS staging
+            ON staging.account_iban = upserted.account_iban
+            AND staging.date = upserted.date
+            AND staging.amount = upserted.amount
+            AND staging.counterparty_iban IS NOT DISTINCT FROM upserted.counterparty_iban
+            AND staging.counterparty_name IS NOT DISTINCT FROM upserted.counterparty_name
+        CROSS JOIN LATERAL unnest(staging.tags) AS tag_name
+        JOIN tags ON tags.name = tag_name
+        ON CONFLICT DO NOTHING
+        RETURNING 1
+    )
+    SELECT
+        count(*) - (SELECT updated FROM existing) AS inserted,
+        (SELECT updated FROM existing) AS updated,
+        (SELECT count(*) FROM tagged) AS tagged
+    FROM upserted
+    """)
+
+
+@dataclass
+class BulkUpsertResult:
+    """Number of rows written by `bulk_upsert_statements`"""
+
+    inserted: int
+    updated: int
+    tagged: int
+
+
+def _statement_records(
+    statements: Iterable[dict[str, Any] | StatementDTO],
+) -> Iterator[tuple[Any, ...]]:
+    for statement in statements:
+        if isinstance(statement, StatementDTO):
+            yield statement.to_row()
+            continue
+        yield (
+            statement.get("id") or uuid.uuid4(),
+            statement["date"],
+            statement["interest_date"],
+            statement["amount"],
+            statement["account_iban"],
+            statement.get("account_name", ""),
+            statement.get("counterparty_iban"),
+            statement.get("counterparty_name"),
+            statement.get("description"),
+            list(statement.get("tags") or ()),
+        )
+
+
+async def bulk_upsert_statements(
+    session: AsyncSession, statements: Iterable[dict[str, Any] | StatementDTO]
+) -> BulkUpsertResult:
+    """
+    Insert or update many statements in a few round trips.
+
+    The rows are streamed with COPY into a temporary staging table and merged into
+    `statements` on the natural key (account_iban, date, amount, counterparty_iban,
+    counterparty_name): new statements are inserted, existing ones get their
+    interest date, account name and description updated. Duplicates within the
+    input are collapsed. An explicit `id` only applies to new statements, existing
+    ones keep theirs. Tag names listed under the optional `tags` key are linked
+    through `tags_to_statement` in the same statement, unknown tag names are
+    ignored.
+
+    The caller owns the transaction, the changes are visible after commit.
+
+    Args:
+        session (AsyncSession): Session bound to the asyncpg engine from `init_db`.
+        statements (Iterable[dict[str, Any] | StatementDTO]): The statements, as
+            `StatementDTO` or as dicts with the columns of `Statements` as keys and
+            an optional `tags` list of tag names.
+
+    Returns:
+        BulkUpsertResult: The number of inserted and updated statements and the
+            number of new tag links.
+
+    Raises:
+        ValueError: If an explicit `id` is already used by a statement with a
+            different natural key, in the database or in the input.
+
+    Example:
+        >>> async with get_db_session() as session:
+        ...     result = await bulk_upsert_statements(session, rows)
+        ...     await session.commit()
+    """
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    driver_connection = raw_connection.driver_connection
+
+    await session.execute(text(f"DROP TABLE IF EXISTS {_STAGING_TABLE}"))
+    await session.execute(
+        text(
+            f"CREATE TEMP TABLE {_STAGING_TABLE} "
+            "(LIKE statements INCLUDING DEFAULTS, tags text[]) ON COMMIT DROP"
+        )
+    )
+    await driver_connection.copy_records_to_table(
+        _STAGING_TABLE,
+        records=_statement_records(statements),
+        columns=[*_STATEMENT_COLUMNS, "tags"],
+    )
+
+    conflicting = (await session.execute(_CONFLICTING_IDS)).scalars().all()
+    if conflicting:
+        await session.execute(text(f"DROP TABLE {_STAGING_TABLE}"))
+        raise ValueError(
+            "Statement ids already used for a different natural key: "
+            + ", ".join(str(statement_id) for statement_id in conflicting)
+        )
+
+    row = (await session.execute(_UPSERT_STATEMENTS)).one()
+    await session.execute(text(f"DROP TABLE {_STAGING_TABLE}"))
+
+    return BulkUpsertResult(
+        inserted=row.inserted, updated=row.updated, tagged=row.tagged
+    )
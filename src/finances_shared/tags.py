@@ -0,0 +1,188 @@
+import time
+import uuid
+from collections.abc import Iterable, Mapping
+
+from sqlalchemy import ARRAY, any_, bindparam, select, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from finances_shared.models import Tags
+from finances_shared.models.models import tags_to_statement_table
+
+_UUID_ARRAY = ARRAY(UUID(as_uuid=True))
+
+_ASSIGN_TAGS = text("""
+    WITH assigned AS (
+        INSERT INTO tags_to_statement (tag_id, statement_id, statement_date)
+        SELECT links.tag_id, statements.id, statements.date
+        FROM unnest(:tag_ids, :statement_ids) AS links (tag_id, statement_id)
+        JOIN statements ON statements.id = links.statement_id
+        ON CONFLICT DO NOTHING
+        RETURNING 1
+    )
+    SELECT count(*) FROM assigned
+    """).bindparams(
+    bindparam("tag_ids", type_=_UUID_ARRAY),
+    bindparam("statement_ids", type_=_UUID_ARRAY),
+)
+
+
+class TagCache:
+    """
+    In-process map of tag names to tag ids.
+
+    The `tags` table is small and rarely changes, so it is loaded in one query and
+    reloaded after `ttl` seconds or when an unknown tag name is requested. Names
+    that are still unknown after a reload are remembered until the next scheduled
+    reload, so they do not reload the table on every lookup.
+
+    Usage:
+    ```python
+    tag_cache = TagCache()
+    tag_ids = await tag_cache.get_ids(session, ["groceries", "rent"])
+    ```
+    """
+
+    def __init__(self, ttl: float = 300.0):
+        """
+        Args:
+            ttl (float): Seconds the loaded tags are served from the cache.
+        """
+        self.ttl = ttl
+        self._ids: dict[str, uuid.UUID] = {}
+        self._missing: set[str] = set()
+        self._expires_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    async def load(self, session: AsyncSession) -> int:
+        """
+        Load every tag in one query.
+
+        Args:
+            session (AsyncSession): The database session.
+
+        Returns:
+            int: The number of cached tags.
+        """
+        result = await session.execute(select(Tags.name, Tags.id))
+        self._ids = {row.name: row.id for row in result}
+        self._missing = set()
+        self._expires_at = time.monotonic() + self.ttl
+        return len(self._ids)
+
+    async def get_ids(
+        self, session: AsyncSession, names: Iterable[str]
+    ) -> dict[str, uuid.UUID]:
+        """
+        Get the ids of tag names.
+
+        Args:
+            session (AsyncSession): The database session used to (re)load the tags.
+            names (Iterable[str]): The tag names.
+
+        Returns:
+            dict[str, uuid.UUID]: The ids by name, unknown names are left out.
+        """
+        names = set(names)
+        unknown = names - self._ids.keys()
+        expired = self._expires_at <= time.monotonic()
+        if expired or not unknown <= self._missing:
+            # Only the reload after the ttl or `invalidate` forgets unknown names
+            missing = set() if expired else self._missing
+            await self.load(session)
+            self._missing = (missing | names) - self._ids.keys()
+        return {name: self._ids[name] for name in names if name in self._ids}
+
+    def invalidate(self) -> None:
+        """Reload the tags on the next lookup."""
+        self._expires_at = 0.0
+
+
+_default_cache = TagCache()
+
+
+async def assign_tags(
+    session: AsyncSession,
+    tags_by_statement: Mapping[uuid.UUID, Iterable[str]],
+    cache: TagCache | None = None,
+) -> int:
+    """
+    Link tags to many statements in one `INSERT ... SELECT`.
+
+    The tag names are resolved through the tag cache and the links are sent as
+    two arrays, so the round trips do not grow with the number of statements.
+    Existing links are kept, unknown tag names and statement ids are ignored. The
+    caller owns the transaction.
+
+    Args:
+        session (AsyncSession): The database session.
+        tags_by_statement (Mapping[uuid.UUID, Iterable[str]]): The tag names to
+            assign by statement id.
+        cache (TagCache | None): The tag cache, defaults to the shared module cache.
+
+    Returns:
+        int: The number of new links.
+
+    Example:
+        >>> async with get_db_session() as session:
+        ...     await assign_tags(session, {statement.id: ["groceries"]})
+        ...     await session.commit()
+    """
+    tags_by_statement = {
+        statement_id: list(names) for statement_id, names in tags_by_statement.items()
+    }
+    tag_ids = await (cache if cache is not None else _default_cache).get_ids(
+        session, (name for names in tags_by_statement.values() for name in names)
+    )
+
+    links = {
+        (tag_ids[name], statement_id)
+        for statement_id, names in tags_by_statement.items()
+        for name in names
+        if name in tag_ids
+    }
+    if not links:
+        return 0
+
+    link_tag_ids, link_statement_ids = zip(*links)
+    return await session.scalar(
+        _ASSIGN_TAGS,
+        {"tag_ids": list(link_tag_ids), "statement_ids": list(link_statement_ids)},
+    )
+
+
+async def get_statement_tags(
+    session: AsyncSession, statement_ids: Iterable[uuid.UUID]
+) -> dict[uuid.UUID, list[Tags]]:
+    """
+    Get the tags of many statements in one query.
+
+    Args:
+        session (AsyncSession): The database session.
+        statement_ids (Iterable[uuid.UUID]): The statement ids.
+
+    Returns:
+        dict[uuid.UUID, list[Tags]]: The tags by statement id. Every requested id
+            is present, statements without tags map to an empty list.
+    """
+    statement_ids = list(dict.fromkeys(statement_ids))
+    tags_by_statement: dict[uuid.UUID, list[Tags]] = {
+        statement_id: [] for statement_id in statement_ids
+    }
+    if not statement_ids:
+        return tags_by_statement
+
+    result = await session.execute(
+        select(tags_to_statement_table.c.statement_id, Tags)
+        .join(Tags, Tags.id == tags_to_statement_table.c.tag_id)
+        .where(
+            tags_to_statement_table.c.statement_id
+            == any_(bindparam("statement_ids", statement_ids, type_=_UUID_ARRAY))
+        )
+        .order_by(tags_to_statement_table.c.statement_id, Tags.name)
+    )
+    for statement_id, tag in result:
+        tags_by_statement[statement_id].append(tag)
+    return tags_by_statement
@@ -0,0 +1,22 @@
+import pytest
+
+
+@pytest.fixture
+def report(request, capsys):
+    """Print a table of benchmark results, also while pytest captures output"""
+
+    def _report(columns: tuple[str, ...], rows: list[tuple]):
+        cells = [columns] + [
+            tuple(
+                f"{value:,.1f}" if isinstance(value, float) else str(value)
+                for value in row
+            )
+            for row in rows
+        ]
+        widths = [max(len(row[i]) for row in cells) for i in range(len(columns))]
+        with capsys.disabled():
+            print(f"\n\n{request.node.name}")
+            for row in cells:
+                print("  ".join(cell.rjust(width) for cell, width in zip(row, widths)))
+
+    return _report
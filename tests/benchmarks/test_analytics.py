@@ -0,0 +1,103 @@
+import time
+from collections import defaultdict
+
+import pytest
+
+from finances_shared.analytics import (
+    monthly_sums,
+    running_balance,
+    tag_sums,
+    top_counterparties,
+)
+from finances_shared.models import Statements, Tags
+from tests.test_analytics import synthetic_statements, to_arrays
+
+pytest.importorskip("numpy")
+
+pytestmark = pytest.mark.benchmark
+
+STATEMENTS = 100_000
+
+
+def _orm_statements(statements: list[dict]) -> list[Statements]:
+    tags = {}
+    return [
+        Statements(
+            date=statement["date"],
+            amount=statement["amount"],
+            account_iban=statement["account"][0],
+            account_name=statement["account"][1],
+            counterparty_iban=(statement["counterparty"] or (None, None))[0],
+            counterparty_name=(statement["counterparty"] or (None, None))[1],
+            tags=[tags.setdefault(tag, Tags(id=tag)) for tag in statement["tags"]],
+        )
+        for statement in statements
+    ]
+
+
+def _loop_running_balance(statements: list[Statements]) -> list[int]:
+    balance = defaultdict(int)
+    balances = []
+    for statement in statements:
+        key = (statement.account_iban, statement.account_name)
+        balance[key] += statement.amount
+        balances.append(balance[key])
+    return balances
+
+
+def _loop_monthly_sums(statements: list[Statements]) -> dict:
+    sums = defaultdict(lambda: [0, 0])
+    for statement in statements:
+        key = (
+            statement.date.strftime("%Y-%m"),
+            statement.account_iban,
+            statement.account_name,
+        )
+        sums[key][0] += statement.amount
+        sums[key][1] += 1
+    return sums
+
+
+def _loop_tag_sums(statements: list[Statements]) -> dict:
+    sums = defaultdict(lambda: [0, 0])
+    for statement in statements:
+        for tag in statement.tags:
+            sums[tag.id][0] += statement.amount
+            sums[tag.id][1] += 1
+    return sums
+
+
+def _loop_top_counterparties(statements: list[Statements], n: int = 10) -> list:
+    sums = defaultdict(lambda: [0, 0])
+    for statement in statements:
+        if statement.counterparty_iban is None and statement.counterparty_name is None:
+            continue
+        key = (statement.counterparty_iban, statement.counterparty_name)
+        sums[key][0] += statement.amount
+        sums[key][1] += 1
+    return sorted(sums.items(), key=lambda item: -abs(item[1][0]))[:n]
+
+
+def _elapsed_ms(function, data) -> float:
+    start = time.perf_counter()
+    function(data)
+    return (time.perf_counter() - start) * 1000
+
+
+def test_arrays_vs_orm_loop(report):
+    statements = synthetic_statements(STATEMENTS)
+    orm_statements = _orm_statements(statements)
+    arrays = to_arrays(statements)
+
+    rows = []
+    for name, loop, vectorized in (
+        ("running_balance", _loop_running_balance, running_balance),
+        ("monthly_sums", _loop_monthly_sums, monthly_sums),
+        ("tag_sums", _loop_tag_sums, tag_sums),
+        ("top_counterparties", _loop_top_counterparties, top_counterparties),
+    ):
+        loop_ms = min(_elapsed_ms(loop, orm_statements) for _ in range(3))
+        arrays_ms = min(_elapsed_ms(vectorized, arrays) for _ in range(3))
+        rows.append((name, loop_ms, arrays_ms, loop_ms / arrays_ms))
+
+    report(("aggregate", "ORM loop ms", "arrays ms", "speedup"), rows)
@@ -0,0 +1,102 @@
+import time
+import tracemalloc
+
+import pytest
+
+from finances_shared.dtos import StatementDTO, dump_statements, load_statements
+from finances_shared.models import Statements
+from finances_shared.serializers import get_serializer, msgpack
+from tests.test_dtos import DATE
+
+pytestmark = pytest.mark.benchmark
+
+STATEMENTS = 50_000
+
+
+def _dict(index: int) -> dict:
+    return {
+        "date": DATE,
+        "interest_date": DATE,
+        "amount": -index,
+        "account_iban": "NL00BANK0123456789",
+        "account_name": "Checking",
+        "counterparty_iban": f"NL99SHOP{index % 50}",
+        "counterparty_name": f"Shop {index % 50}",
+        "description": "Card payment",
+        "tags": ["groceries"],
+    }
+
+
+def _build(factory) -> tuple[list, float, int]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    objects = [factory(index) for index in range(STATEMENTS)]
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return objects, elapsed, peak
+
+
+def test_statement_memory(report):
+    factories = {
+        "dict": _dict,
+        "StatementDTO.from_dict": lambda index: StatementDTO.from_dict(_dict(index)),
+        "Statements (ORM)": lambda index: Statements(
+            **{key: value for key, value in _dict(index).items() if key != "tags"}
+        ),
+    }
+    rows = []
+    for name, factory in factories.items():
+        _, elapsed, peak = _build(factory)
+        rows.append((name, peak / STATEMENTS, STATEMENTS / elapsed))
+
+    report(("representation", "bytes/statement", "built/sec"), rows)
+
+
+def test_statement_wire_throughput(report):
+    dicts = [_dict(index) for index in range(STATEMENTS)]
+    dtos = [StatementDTO.from_dict(data) for data in dicts]
+    content_types = ["application/json"]
+    if msgpack is not None:
+        content_types.append("application/msgpack")
+
+    rows = []
+    for content_type in content_types:
+        serializer = get_serializer(content_type)
+
+        start = time.perf_counter()
+        body = serializer.dumps(dicts)
+        dumped = time.perf_counter() - start
+        start = time.perf_counter()
+        [StatementDTO.from_dict(data) for data in serializer.loads(body)]
+        loaded = time.perf_counter() - start
+        rows.append(
+            (
+                content_type,
+                "dicts",
+                len(body) / STATEMENTS,
+                STATEMENTS / dumped,
+                STATEMENTS / loaded,
+            )
+        )
+
+        start = time.perf_counter()
+        body = dump_statements(dtos, serializer)
+        dumped = time.perf_counter() - start
+        start = time.perf_counter()
+        load_statements(body, content_type)
+        loaded = time.perf_counter() - start
+        rows.append(
+            (
+                content_type,
+                "to_wire",
+                len(body) / STATEMENTS,
+                STATEMENTS / dumped,
+                STATEMENTS / loaded,
+            )
+        )
+
+    report(
+        ("content type", "format", "bytes/statement", "dumps/sec", "loads/sec"),
+        rows,
+    )
@@ -0,0 +1,60 @@
+import asyncio
+import logging
+import statistics
+import time
+
+import pytest
+
+from finances_shared.rabbitmq.listener import RabbitMQListener
+from tests.fakes import FakeIncomingMessage, FakeQueue, connect_listener
+
+pytestmark = pytest.mark.benchmark
+
+logger = logging.getLogger("tests.benchmarks.listener")
+
+MESSAGES = 2_000
+# Simulated I/O of the handler, e.g. a database write
+HANDLER_DELAY = 0.002
+
+
+@pytest.mark.parametrize("max_in_flight", [None, 10])
+async def test_consume_latency_and_throughput_by_prefetch(report, max_in_flight):
+    rows = []
+    for prefetch_count in (1, 10, 50, 200):
+        queue = FakeQueue()
+        listener = RabbitMQListener(
+            "bench", prefetch_count=prefetch_count, max_in_flight=max_in_flight
+        )
+        connect_listener(listener, queue)
+
+        async def handle(message):
+            await asyncio.sleep(HANDLER_DELAY)
+
+        for index in range(MESSAGES):
+            queue.put(FakeIncomingMessage(b"{}", message_id=str(index)))
+
+        start = time.perf_counter()
+        consuming = asyncio.create_task(listener.consume(handle, logger))
+        await queue.wait_settled(MESSAGES, timeout=60)
+        elapsed = time.perf_counter() - start
+        await listener.stop(logger)
+        await consuming
+
+        # From the delivery until the ack, the time a message spends prefetched
+        # but waiting for a free handler slot included
+        latencies = [m.settled_at - m.delivered_at for m in queue.settled]
+        quantiles = statistics.quantiles(latencies, n=100)
+        rows.append(
+            (
+                prefetch_count,
+                listener.max_in_flight,
+                MESSAGES / elapsed,
+                quantiles[49] * 1000,
+                quantiles[98] * 1000,
+            )
+        )
+
+    report(
+        ("prefetch", "max in flight", "msgs/sec", "p50 ms", "p99 ms"),
+        rows,
+    )
@@ -0,0 +1,63 @@
+import logging
+import time
+
+import pytest
+
+from finances_shared.logger import CustomJsonFormatter, FastJsonFormatter, _log_format
+
+pytestmark = pytest.mark.benchmark
+
+RECORDS = 20_000
+
+
+def _records() -> dict[str, logging.LogRecord]:
+    logger = logging.getLogger("tests.benchmarks.formatters")
+    context = {"request_id": "abc", "queue": "statements", "worker": 3}
+    return {
+        "string": logger.makeRecord(
+            logger.name,
+            logging.INFO,
+            __file__,
+            1,
+            "Sent %d statements to %s",
+            (100, "statements"),
+            None,
+            extra=context,
+        ),
+        "dict": logger.makeRecord(
+            logger.name,
+            logging.INFO,
+            __file__,
+            1,
+            {"size": 2048, "status": "sending", "queue": "statements"},
+            None,
+            None,
+            extra=context,
+        ),
+    }
+
+
+def test_formatter_throughput(report):
+    rows = []
+    for kind, record in _records().items():
+        baseline = None
+        for name, formatter in (
+            ("CustomJsonFormatter", CustomJsonFormatter(_log_format)),
+            ("FastJsonFormatter", FastJsonFormatter()),
+        ):
+            start = time.perf_counter()
+            for _ in range(RECORDS):
+                formatter.format(record)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            rows.append(
+                (
+                    kind,
+                    name,
+                    elapsed / RECORDS * 1e6,
+                    RECORDS / elapsed,
+                    baseline / elapsed,
+                )
+            )
+
+    report(("message", "formatter", "µs/record", "records/sec", "speedup"), rows)
@@ -0,0 +1,65 @@
+import logging
+import time
+
+import pytest
+
+from finances_shared import logger as logger_module
+from finances_shared.logger import FastJsonFormatter, get_logger
+from finances_shared.rabbitmq.producer import RabbitMQProducer
+from tests.benchmarks.test_producer_throughput import _statement
+from tests.fakes import FakeExchange, connect_producer
+
+pytestmark = pytest.mark.benchmark
+
+MESSAGES = 5_000
+
+
+@pytest.fixture
+def log_file(tmp_path, monkeypatch):
+    """Write the log output to a file instead of the console"""
+    path = tmp_path / "producer.log"
+    stream = path.open("w")
+
+    def _file_handler() -> logging.StreamHandler:
+        handler = logging.StreamHandler(stream)
+        handler.setLevel(logging.INFO)
+        handler.setFormatter(FastJsonFormatter())
+        return handler
+
+    monkeypatch.setattr(logger_module, "_get_stream_handler", _file_handler)
+    yield path
+    logger_module.stop_log_queue()
+    stream.close()
+
+
+async def _send(producer_logger: logging.Logger) -> float:
+    producer = connect_producer(RabbitMQProducer("bench-logging"), FakeExchange())
+    messages = [_statement(index) for index in range(MESSAGES)]
+    start = time.perf_counter()
+    for message in messages:
+        await producer.send_message(message, producer_logger)
+    return time.perf_counter() - start
+
+
+async def test_producer_throughput_sync_vs_queued_logging(log_file, report):
+    rows = []
+    for mode, overflow in (("sync", None), ("queued", "drop"), ("queued", "block")):
+        if overflow is not None:
+            logger_module.start_log_queue(overflow=overflow)
+        producer_logger = get_logger(
+            "tests.benchmarks.logging", queued=overflow is not None
+        )
+        producer_logger.propagate = False
+
+        elapsed = await _send(producer_logger)
+        dropped = logger_module._queue_handler.dropped if overflow else 0
+        # Time until the background thread has written every queued record
+        start = time.perf_counter()
+        logger_module.stop_log_queue()
+        drained = time.perf_counter() - start
+
+        rows.append(
+            (mode, overflow or "-", MESSAGES / elapsed, drained * 1000, dropped)
+        )
+
+    report(("logging", "overflow", "msgs/sec", "drain ms", "dropped"), rows)
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import time
+
+import pytest
+
+from finances_shared import metrics
+from finances_shared.rabbitmq.listener import RabbitMQListener
+from finances_shared.rabbitmq.producer import RabbitMQProducer
+from finances_shared.serializers import get_serializer
+from tests.benchmarks.test_producer_throughput import _statement
+from tests.fakes import (
+    FakeExchange,
+    FakeIncomingMessage,
+    FakeQueue,
+    connect_listener,
+    connect_producer,
+)
+
+pytestmark = pytest.mark.benchmark
+
+logger = logging.getLogger("tests.benchmarks.metrics")
+logger.setLevel(logging.WARNING)
+
+OPERATIONS = 200_000
+MESSAGES = 10_000
+ROUNDS = 5
+
+
+class _NoopMetric:
+    """Child metric that records nothing, the baseline of the overhead"""
+
+    def inc(self, amount: float = 1.0) -> None:
+        pass
+
+    def dec(self, amount: float = 1.0) -> None:
+        pass
+
+    def observe(self, value: float) -> None:
+        pass
+
+
+def _disable_metrics(instance, names: tuple[str, ...]):
+    for name in names:
+        setattr(instance, name, _NoopMetric())
+    return instance
+
+
+def _per_operation(operation) -> float:
+    start = time.perf_counter()
+    for _ in range(OPERATIONS):
+        operation()
+    return (time.perf_counter() - start) / OPERATIONS * 1e9
+
+
+def test_metric_operation_cost(report):
+    registry = metrics.MetricsRegistry()
+    counter = registry.counter("bench", "Benchmark", ("queue",))
+    histogram = registry.histogram("bench_seconds", "Benchmark", ("queue",))
+    counter_child = counter.labels("statements")
+    histogram_child = histogram.labels("statements")
+    noop = _NoopMetric()
+
+    rows = [
+        ("no-op inc", _per_operation(noop.inc)),
+        ("counter child inc", _per_operation(counter_child.inc)),
+        ("counter labels().inc", _per_operation(lambda: counter.labels("q").inc())),
+        ("histogram observe", _per_operation(lambda: histogram_child.observe(0.02))),
+        ("perf_counter", _per_operation(time.perf_counter)),
+    ]
+    report(("operation", "ns/op"), rows)
+
+
+async def _publish(instrumented: bool) -> float:
+    producer = connect_producer(RabbitMQProducer("bench-metrics"), FakeExchange())
+    if not instrumented:
+        _disable_metrics(
+            producer,
+            (
+                "_publish_seconds",
+                "_published_messages",
+                "_publish_errors",
+                "_lock_wait_seconds",
+            ),
+        )
+    messages = [_statement(index) for index in range(MESSAGES)]
+    start = time.perf_counter()
+    for message in messages:
+        await producer.send_message(message, logger)
+    return time.perf_counter() - start
+
+
+async def _consume(instrumented: bool) -> float:
+    queue = FakeQueue()
+    listener = RabbitMQListener("bench-metrics", prefetch_count=100)
+    if not instrumented:
+        _disable_metrics(
+            listener,
+            (
+                "_in_flight_messages",
+                "_acked_messages",
+                "_nacked_messages",
+                "_rejected_messages",
+                "_duplicate_messages",
+                "_handler_seconds",
+            ),
+        )
+    connect_listener(listener, queue)
+    body = get_serializer().dumps(_statement(0))
+    for index in range(MESSAGES):
+        queue.put(FakeIncomingMessage(body, message_id=str(index)))
+
+    async def handle(message):
+        pass
+
+    start = time.perf_counter()
+    consuming = asyncio.create_task(listener.consume(handle, logger))
+    await queue.wait_settled(MESSAGES, timeout=60)
+    elapsed = time.perf_counter() - start
+    await listener.stop(logger)
+    await consuming
+    return elapsed
+
+
+async def test_metrics_overhead_on_the_message_path(report):
+    rows = []
+    for path, run in (("publish", _publish), ("consume", _consume)):
+        # Best of a few alternating rounds, so warm up and noise hit both
+        baseline = instrumented = float("inf")
+        for _ in range(ROUNDS):
+            baseline = min(baseline, await run(instrumented=False))
+            instrumented = min(instrumented, await run(instrumented=True))
+        rows.append(
+            (
+                path,
+                MESSAGES / baseline,
+                MESSAGES / instrumented,
+                (instrumented - baseline) / MESSAGES * 1e6,
+                (instrumented / baseline - 1) * 100,
+            )
+        )
+
+    report(
+        ("path", "no-op msgs/sec", "metrics msgs/sec", "µs/msg", "overhead %"),
+        rows,
+    )
@@ -0,0 +1,64 @@
+import asyncio
+import logging
+import time
+
+import pytest
+
+from finances_shared.rabbitmq.producer import RabbitMQProducer
+from tests.fakes import FakeExchange, connect_producer
+
+pytestmark = pytest.mark.benchmark
+
+logger = logging.getLogger("tests.benchmarks.producer")
+
+MESSAGES = 2_000
+# Simulated broker round trip until the publisher confirm arrives
+CONFIRM_DELAY = 0.0005
+
+
+def _statement(index: int) -> dict:
+    return {
+        "date": "2025-06-01T12:00:00+00:00",
+        "amount": -index,
+        "account_iban": "NL00BANK0123456789",
+        "counterparty_name": f"Shop {index % 50}",
+        "description": "Card payment",
+    }
+
+
+async def test_send_many_throughput_by_batch_size(report):
+    messages = [_statement(index) for index in range(MESSAGES)]
+    rows = []
+
+    producer = connect_producer(
+        RabbitMQProducer("bench"), FakeExchange(confirm_delay=CONFIRM_DELAY)
+    )
+    start = time.perf_counter()
+    for message in messages:
+        await producer.send_message(message, logger)
+    elapsed = time.perf_counter() - start
+    rows.append(("send_message", 1, MESSAGES / elapsed))
+
+    for batch_size in (1, 10, 100, 500, 2_000):
+        producer = connect_producer(
+            RabbitMQProducer("bench"), FakeExchange(confirm_delay=CONFIRM_DELAY)
+        )
+        start = time.perf_counter()
+        for offset in range(0, MESSAGES, batch_size):
+            await producer.send_many(messages[offset : offset + batch_size], logger)
+        elapsed = time.perf_counter() - start
+        rows.append(("send_many", batch_size, MESSAGES / elapsed))
+
+    for batch_size in (10, 100, 500):
+        producer = connect_producer(
+            RabbitMQProducer("bench", batch_size=batch_size),
+            FakeExchange(confirm_delay=CONFIRM_DELAY),
+        )
+        producer.start_batching(logger)
+        start = time.perf_counter()
+        await asyncio.gather(*(producer.enqueue(message) for message in messages))
+        elapsed = time.perf_counter() - start
+        await producer.stop_batching()
+        rows.append(("enqueue", batch_size, MESSAGES / elapsed))
+
+    report(("mode", "batch size", "msgs/sec"), rows)
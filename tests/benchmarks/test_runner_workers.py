@@ -0,0 +1,97 @@
+import asyncio
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from finances_shared.params import RabbitMQParams
+from finances_shared.rabbitmq.runner import ConsumerRunner, WorkerContext
+from finances_shared.serializers import decode_body, get_serializer
+from tests.fakes import FakeRabbitMQListener
+
+pytestmark = pytest.mark.benchmark
+
+MESSAGES = 400
+# Pure Python work per message, about a millisecond of CPU time
+WORK_ROUNDS = 20_000
+WORKERS = (1, 2, 4)
+# Directory the workers write their consume times to
+BENCH_DIR = "FINANCES_BENCH_RUNNER_DIR"
+
+
+def _cpu_work(body: bytes) -> int:
+    """Module level, so it can run in the process pool of a worker"""
+    rounds = decode_body(body)["rounds"]
+    return sum(i * i for i in range(rounds))
+
+
+async def _worker_main(ctx: WorkerContext):
+    """Consume the worker's share of the queue and record when it ran"""
+    queue = ctx.listener.fake_queue
+    if ctx.executor is not None:
+        # Start the pool processes before timing, like long running workers
+        await asyncio.gather(
+            *(ctx.run_cpu_bound(abs, index) for index in range(os.cpu_count() or 1))
+        )
+
+    async def handle(message):
+        await ctx.run_cpu_bound(_cpu_work, message.body)
+
+    start = time.monotonic()
+    consuming = asyncio.create_task(ctx.listener.consume(handle, ctx.logger))
+    await queue.wait_settled(ctx.listener.messages, timeout=300)
+    end = time.monotonic()
+    await ctx.listener.stop(ctx.logger)
+    await consuming
+    (Path(os.environ[BENCH_DIR]) / str(ctx.index)).write_text(f"{start} {end}")
+
+
+def _throughput(
+    directory: Path, workers: int, cpu_workers: int, prefetch_count: int
+) -> float:
+    """Messages per second of a `ConsumerRunner` from the first to the last ack"""
+    runner = ConsumerRunner(
+        _worker_main,
+        "bench-runner",
+        workers=workers,
+        cpu_workers=cpu_workers,
+        listener_factory=FakeRabbitMQListener,
+        listener_kwargs={
+            "messages": MESSAGES // workers,
+            "body": get_serializer().dumps({"rounds": WORK_ROUNDS}),
+            "prefetch_count": prefetch_count,
+        },
+        params=RabbitMQParams("localhost", 5672, "guest", "guest"),
+        with_db=False,
+        logger_name="tests.benchmarks.runner",
+    )
+    assert runner.run() == 0
+
+    times = [
+        tuple(map(float, path.read_text().split())) for path in directory.iterdir()
+    ]
+    for path in directory.iterdir():
+        path.unlink()
+    elapsed = max(end for _, end in times) - min(start for start, _ in times)
+    return MESSAGES // workers * workers / elapsed
+
+
+def test_throughput_by_worker_processes(report, tmp_path, monkeypatch):
+    monkeypatch.setenv(BENCH_DIR, str(tmp_path))
+    rows = [
+        (workers, os.cpu_count(), _throughput(tmp_path, workers, 0, 10))
+        for workers in WORKERS
+    ]
+
+    report(("workers", "cpus", "msgs/sec"), rows)
+
+
+def test_throughput_by_cpu_workers(report, tmp_path, monkeypatch):
+    monkeypatch.setenv(BENCH_DIR, str(tmp_path))
+    rows = [
+        (cpu_workers, os.cpu_count(), _throughput(tmp_path, 1, cpu_workers, 50))
+        for cpu_workers in (0, *WORKERS)
+    ]
+
+    report(("cpu_workers", "cpus", "msgs/sec"), rows)
@@ -0,0 +1,99 @@
+import json
+import timeit
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from finances_shared.rabbitmq.producer import DatetimeEncoder
+from finances_shared.serializers import (
+    JsonSerializer,
+    MsgpackSerializer,
+    OrjsonSerializer,
+    msgpack,
+    orjson,
+)
+
+pytestmark = pytest.mark.benchmark
+
+ROUNDS = 20_000
+
+
+def _statement(index: int) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "date": datetime(2025, 6, 1, 12, index % 60, tzinfo=timezone.utc),
+        "interest_date": datetime(2025, 6, 2, tzinfo=timezone.utc),
+        "amount": -1250 - index,
+        "account_iban": "NL00BANK0123456789",
+        "account_name": "Checking",
+        "counterparty_iban": "NL99SHOP0987654321",
+        "counterparty_name": f"Shop {index % 50}",
+        "description": "Card payment 1234 ABC Amsterdam",
+        "tags": ["groceries", "card"],
+    }
+
+
+def _statement_native(index: int) -> dict:
+    # What the new serializers accept without converting the fields first
+    statement = _statement(index)
+    statement["id"] = uuid.UUID(statement["id"])
+    statement["exchange_rate"] = Decimal("1.0825")
+    return statement
+
+
+class _LegacyJson:
+    """`json.dumps` with the pure-Python `DatetimeEncoder` hook of before"""
+
+    def dumps(self, obj):
+        return json.dumps(obj, cls=DatetimeEncoder).encode()
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+def _backends():
+    backends = [("json + DatetimeEncoder", _LegacyJson()), ("json", JsonSerializer())]
+    if orjson is not None:
+        backends.append(("orjson", OrjsonSerializer()))
+    if msgpack is not None:
+        backends.append(("msgpack", MsgpackSerializer()))
+    return backends
+
+
+@pytest.mark.parametrize("batch", [1, 100])
+def test_serializer_throughput_by_backend(report, batch):
+    rows = []
+    for name, serializer in _backends():
+        if isinstance(serializer, _LegacyJson):
+            payload = [_statement(index) for index in range(batch)]
+        else:
+            payload = [_statement_native(index) for index in range(batch)]
+        if batch == 1:
+            payload = payload[0]
+        body = serializer.dumps(payload)
+        rounds = max(ROUNDS // batch, 100)
+
+        dumps = timeit.timeit(
+            lambda serializer=serializer, payload=payload: serializer.dumps(payload),
+            number=rounds,
+        )
+        loads = timeit.timeit(
+            lambda serializer=serializer, body=body: serializer.loads(body),
+            number=rounds,
+        )
+        rows.append(
+            (
+                name,
+                len(body),
+                dumps / rounds * 1_000_000,
+                loads / rounds * 1_000_000,
+                rounds * batch / (dumps + loads),
+            )
+        )
+
+    report(
+        ("backend", "bytes", "dumps us", "loads us", "statements/sec"),
+        rows,
+    )
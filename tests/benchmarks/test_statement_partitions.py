@@ -0,0 +1,99 @@
+import os
+import time
+from datetime import date, datetime, timezone
+
+import pytest
+from sqlalchemy import text
+
+from finances_shared.partitions import create_statement_partition
+
+pytestmark = pytest.mark.benchmark
+
+ROWS = int(os.getenv("BENCH_STATEMENT_ROWS", "2000000"))
+MONTHS = 36
+FIRST_MONTH = date(2001, 1, 1)
+REPEAT = 5
+
+MONTH_TOTAL = """
+    SELECT account_iban, sum(amount), count(*) FROM {table}
+    WHERE date >= '2002-06-01 00:00:00+00' AND date < '2002-07-01 00:00:00+00'
+    GROUP BY account_iban
+"""
+
+
+async def _seed(session):
+    for index in range(MONTHS):
+        year, month = divmod(FIRST_MONTH.month - 1 + index, 12)
+        await create_statement_partition(
+            session, date(FIRST_MONTH.year + year, month + 1, 1)
+        )
+    await session.execute(
+        text(
+            "INSERT INTO accounts (id, name, iban, nickname) "
+            "VALUES (gen_random_uuid(), 'Checking', 'NL00BENCH', 'partitions-bench')"
+        )
+    )
+    await session.execute(
+        text("""
+            INSERT INTO statements
+                (id, date, interest_date, amount, account_iban, account_name,
+                 counterparty_name)
+            SELECT
+                gen_random_uuid(),
+                d,
+                d,
+                (n % 20000) - 10000,
+                'NL00BENCH',
+                'Checking',
+                'Shop ' || (n % 500)
+            FROM generate_series(1, :rows) AS n,
+                LATERAL (
+                    SELECT CAST(:start AS timestamptz)
+                        + (n::float / :rows) * interval '1 month' * :months AS d
+                ) AS dates
+            """),
+        {
+            "rows": ROWS,
+            "months": MONTHS,
+            "start": datetime(
+                FIRST_MONTH.year, FIRST_MONTH.month, 1, tzinfo=timezone.utc
+            ),
+        },
+    )
+    # The single heap table statements was before the partitioning
+    await session.execute(
+        text(
+            "CREATE TEMP TABLE statements_heap ON COMMIT DROP AS "
+            "SELECT * FROM statements WHERE account_iban = 'NL00BENCH'"
+        )
+    )
+    await session.execute(text("ANALYZE statements"))
+    await session.execute(text("ANALYZE statements_heap"))
+
+
+async def _time_query(session, table: str) -> float:
+    query = text(MONTH_TOTAL.format(table=table))
+    await session.execute(query)  # warm up the cache
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        await session.execute(query)
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+async def test_month_query_on_partitioned_vs_heap_table(report, pg_session):
+    start = time.perf_counter()
+    await _seed(pg_session)
+    seed_seconds = time.perf_counter() - start
+
+    rows = [("heap, no index", await _time_query(pg_session, "statements_heap"))]
+    await pg_session.execute(
+        text("CREATE INDEX ix_statements_heap_date ON statements_heap (date)")
+    )
+    await pg_session.execute(text("ANALYZE statements_heap"))
+    rows.append(("heap, date index", await _time_query(pg_session, "statements_heap")))
+    rows.append(("partitioned by month", await _time_query(pg_session, "statements")))
+
+    report(
+        ("table", "one month total ms"),
+        rows + [(f"seeded {ROWS:,} rows in", f"{seed_seconds:.1f}s")],
+    )
@@ -0,0 +1,244 @@
+import asyncio
+import time
+from collections.abc import Callable
+
+import aio_pika
+from aio_pika.exceptions import DeliveryError
+from aio_pika.message import ProcessContext
+
+from finances_shared.rabbitmq.listener import RabbitMQListener
+
+
+class FakeExchange:
+    """
+    In-process stand-in for the default exchange of a channel with publisher
+    confirms: every publish resolves after `confirm_delay` seconds, like the
+    broker round trip.
+    """
+
+    def __init__(
+        self,
+        confirm_delay: float = 0.0,
+        reject: Callable[[aio_pika.Message], bool] | None = None,
+    ):
+        """
+        Args:
+            confirm_delay (float): Seconds until a publish is confirmed.
+            reject (Callable[[aio_pika.Message], bool] | None): Messages it returns
+                True for are nacked with a `DeliveryError`.
+        """
+        self.confirm_delay = confirm_delay
+        self.reject = reject
+        self.published: list[aio_pika.Message] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def publish(self, message: aio_pika.Message, routing_key: str):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.confirm_delay)
+        finally:
+            self.in_flight -= 1
+        if self.reject is not None and self.reject(message):
+            raise DeliveryError(None, None)
+        self.published.append(message)
+        return "ack"
+
+
+class FakeChannel:
+    def __init__(self, exchange: FakeExchange | None = None):
+        self.default_exchange = exchange or FakeExchange()
+        self.is_closed = False
+
+    async def declare_queue(self, name: str, durable: bool = False):
+        return None
+
+    async def close(self):
+        self.is_closed = True
+
+
+class FakeConnection:
+    def __init__(self, exchange: FakeExchange | None = None):
+        self.exchange = exchange or FakeExchange()
+        self.channels: list[FakeChannel] = []
+        self.is_closed = False
+
+    async def channel(self, publisher_confirms: bool = False) -> FakeChannel:
+        channel = FakeChannel(self.exchange)
+        self.channels.append(channel)
+        return channel
+
+    async def close(self):
+        self.is_closed = True
+        for channel in self.channels:
+            channel.is_closed = True
+
+
+def connect_producer(producer, exchange: FakeExchange):
+    """Wire a `RabbitMQProducer` to a fake exchange instead of a broker"""
+    producer.connection = FakeConnection()
+    producer.channel = FakeChannel(exchange)
+    return producer
+
+
+class FakeIncomingMessage:
+    """Delivered message settled through the `FakeQueue` it came from"""
+
+    def __init__(
+        self,
+        body: bytes,
+        content_type: str | None = "application/json",
+        message_id: str | None = None,
+    ):
+        self.body = body
+        self.content_type = content_type
+        self.message_id = message_id
+        self.redelivered = False
+        self.processed = False
+        self.outcome: str | None = None
+        self.requeue: bool | None = None
+        self.delivered_at: float | None = None
+        self.settled_at: float | None = None
+        self.queue: "FakeQueue | None" = None
+
+    def process(self, requeue: bool = False, ignore_processed: bool = False):
+        return ProcessContext(
+            self,
+            requeue=requeue,
+            reject_on_redelivered=False,
+            ignore_processed=ignore_processed,
+        )
+
+    async def ack(self, multiple: bool = False):
+        self.queue.settle(self, "ack", multiple)
+
+    async def nack(self, multiple: bool = False, requeue: bool = True):
+        self.queue.settle(self, "nack", multiple, requeue)
+
+    async def reject(self, requeue: bool = False):
+        self.queue.settle(self, "reject", False, requeue)
+
+
+class FakeQueue:
+    """
+    In-process queue delivering its messages like the broker: every delivery
+    runs the consumer callback in its own task, and at most `prefetch_count`
+    messages are unacknowledged at a time.
+    """
+
+    def __init__(self):
+        self.prefetch_count: int | None = None
+        self.settled: list[FakeIncomingMessage] = []
+        self._backlog: list[FakeIncomingMessage] = []
+        self._unacked: list[FakeIncomingMessage] = []
+        self._waiters: list[asyncio.Future] = []
+        self._dispatcher: asyncio.Task | None = None
+        self._callback = None
+        self._deliveries: set[asyncio.Task] = set()
+
+    def put(self, message: FakeIncomingMessage):
+        message.queue = self
+        self._backlog.append(message)
+        self._notify()
+
+    def _notify(self):
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    async def _wait_for(self, predicate: Callable[[], bool]):
+        while not predicate():
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            await waiter
+
+    def settle(
+        self,
+        message: FakeIncomingMessage,
+        outcome: str,
+        multiple: bool,
+        requeue: bool = False,
+    ):
+        if message.processed:
+            raise RuntimeError(f"Message {message.message_id} is already settled")
+        index = self._unacked.index(message)
+        settled = self._unacked[: index + 1] if multiple else [message]
+        for delivery in settled:
+            self._unacked.remove(delivery)
+            delivery.processed = True
+            delivery.outcome = outcome
+            delivery.requeue = requeue
+            delivery.settled_at = time.perf_counter()
+            self.settled.append(delivery)
+        self._notify()
+
+    async def _dispatch(self):
+        while True:
+            await self._wait_for(
+                lambda: bool(self._backlog)
+                and (
+                    not self.prefetch_count or len(self._unacked) < self.prefetch_count
+                )
+            )
+            message = self._backlog.pop(0)
+            self._unacked.append(message)
+            message.delivered_at = time.perf_counter()
+            delivery = asyncio.create_task(self._callback(message))
+            self._deliveries.add(delivery)
+            delivery.add_done_callback(self._deliveries.discard)
+
+    async def consume(self, callback) -> str:
+        self._callback = callback
+        self._dispatcher = asyncio.create_task(self._dispatch())
+        return "consumer-tag"
+
+    async def cancel(self, consumer_tag: str):
+        self._dispatcher.cancel()
+
+    async def wait_settled(self, count: int, timeout: float = 5.0):
+        """Wait until `count` messages were acked, nacked or rejected"""
+        async with asyncio.timeout(timeout):
+            await self._wait_for(lambda: len(self.settled) >= count)
+
+
+class FakeListenerChannel:
+    def __init__(self, queue: FakeQueue):
+        self.queue = queue
+
+    async def set_qos(self, prefetch_count: int):
+        self.queue.prefetch_count = prefetch_count
+
+    async def declare_queue(self, name: str, durable: bool = False):
+        return self.queue
+
+    async def get_queue(self, name: str):
+        return self.queue
+
+
+def connect_listener(listener, queue: FakeQueue):
+    """Wire a `RabbitMQListener` to a fake queue instead of a broker"""
+    listener.connection = FakeConnection()
+    listener.channel = FakeListenerChannel(queue)
+    queue.prefetch_count = listener.prefetch_count
+    return listener
+
+
+class FakeRabbitMQListener(RabbitMQListener):
+    """
+    Listener that `connect`s to a `FakeQueue` holding `messages` deliveries of
+    `body`, e.g. as the listener factory of `ConsumerRunner` workers.
+    """
+
+    def __init__(
+        self, queue_name: str, messages: int = 0, body: bytes = b"{}", **kwargs
+    ):
+        super().__init__(queue_name, **kwargs)
+        self.messages = messages
+        self.fake_queue = FakeQueue()
+        for index in range(messages):
+            self.fake_queue.put(FakeIncomingMessage(body, message_id=str(index)))
+
+    async def connect(self, params, logger):
+        connect_listener(self, self.fake_queue)
@@ -0,0 +1,20 @@
+import json
+
+from sqlalchemy import text
+
+
+async def explain(session, query: str, params: dict) -> dict:
+    """Get the root node of the JSON query plan of `query`"""
+    result = await session.execute(text(f"EXPLAIN (FORMAT JSON) {query}"), params)
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+def plan_values(plan: dict, key: str) -> set[str]:
+    """Collect the values of `key`, e.g. "Relation Name", in every plan node"""
+    values = {plan[key]} if key in plan else set()
+    for child in plan.get("Plans", []):
+        values |= plan_values(child, key)
+    return values
@@ -0,0 +1,216 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from finances_shared.accounts import (
+    AccountCache,
+    get_alias_tree,
+    rebuild_account_closure,
+)
+
+
+async def _add_account(session, name: str, iban: str, parent_id=None) -> uuid.UUID:
+    account_id = uuid.uuid4()
+    await session.execute(
+        text(
+            "INSERT INTO accounts (id, name, iban, nickname, parent_id) "
+            "VALUES (:id, :name, :iban, :nickname, :parent_id)"
+        ),
+        {
+            "id": account_id,
+            "name": name,
+            "iban": iban,
+            "nickname": f"accounts-test-{name}-{iban}",
+            "parent_id": parent_id,
+        },
+    )
+    return account_id
+
+
+async def test_resolve_returns_the_root_account(pg_session):
+    root_id = await _add_account(pg_session, "Checking", "NL01TEST")
+    child_id = await _add_account(pg_session, "Joint", "NL02TEST", root_id)
+    await _add_account(pg_session, "Card", "NL03TEST", child_id)
+    cache = AccountCache()
+
+    account = await cache.resolve(pg_session, "NL03TEST", "Card")
+
+    assert (account.id, account.iban, account.name) == (root_id, "NL01TEST", "Checking")
+    assert await cache.resolve(pg_session, "NL03TEST", "Card") is account
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+async def test_resolve_caches_unknown_accounts(pg_session, query_count):
+    cache = AccountCache()
+
+    for _ in range(3):
+        assert await cache.resolve(pg_session, "NL99UNKNOWN", "Nobody") is None
+
+    assert len(query_count) == 1
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+async def test_unknown_accounts_expire_with_the_ttl(pg_session, query_count):
+    cache = AccountCache(ttl=0)
+    assert await cache.resolve(pg_session, "NL04TEST", "Savings") is None
+
+    account_id = await _add_account(pg_session, "Savings", "NL04TEST")
+
+    assert (await cache.resolve(pg_session, "NL04TEST", "Savings")).id == account_id
+    assert cache.misses == 2
+
+
+async def test_invalidate_drops_unknown_accounts(pg_session):
+    cache = AccountCache()
+    assert await cache.resolve(pg_session, "NL05TEST", "Holiday") is None
+    account_id = await _add_account(pg_session, "Holiday", "NL05TEST")
+
+    cache.invalidate([("NL05TEST", "Holiday")])
+
+    assert (await cache.resolve(pg_session, "NL05TEST", "Holiday")).id == account_id
+
+
+async def test_resolve_stops_at_cyclic_parent_chains(pg_session):
+    first_id = await _add_account(pg_session, "First", "NL06TEST")
+    second_id = await _add_account(pg_session, "Second", "NL06TEST", first_id)
+    await pg_session.execute(
+        text("UPDATE accounts SET parent_id = :parent_id WHERE id = :id"),
+        {"id": first_id, "parent_id": second_id},
+    )
+
+    with pytest.raises(ValueError, match="cyclic"):
+        await AccountCache().resolve(pg_session, "NL06TEST", "Second")
+    assert await get_alias_tree(pg_session, "NL06TEST", "Second") == []
+
+
+async def test_warm_up_skips_cyclic_parent_chains(pg_session):
+    first_id = await _add_account(pg_session, "First", "NL07TEST")
+    second_id = await _add_account(pg_session, "Second", "NL07TEST", first_id)
+    await _add_account(pg_session, "Card", "NL07TEST", second_id)
+    root_id = await _add_account(pg_session, "Checking", "NL08TEST")
+    await _add_account(pg_session, "Joint", "NL08TEST", root_id)
+    await pg_session.execute(
+        text("UPDATE accounts SET parent_id = :parent_id WHERE id = :id"),
+        {"id": first_id, "parent_id": second_id},
+    )
+    cache = AccountCache()
+
+    cached = await cache.warm_up(pg_session)
+
+    assert cached == len(cache)
+    assert cache.get("NL08TEST", "Joint").id == root_id
+    for name in ("First", "Second", "Card"):
+        assert cache.get("NL07TEST", name) is None
+    with pytest.raises(ValueError, match="cyclic"):
+        await cache.resolve(pg_session, "NL07TEST", "Card")
+
+
+async def _closure(
+    session, ids: list[uuid.UUID]
+) -> set[tuple[uuid.UUID, uuid.UUID, int]]:
+    result = await session.execute(
+        text(
+            "SELECT ancestor_id, descendant_id, depth FROM account_closure "
+            "WHERE descendant_id = ANY(:ids)"
+        ),
+        {"ids": ids},
+    )
+    return {tuple(row) for row in result}
+
+
+async def test_closure_follows_inserts_and_moves(pg_session):
+    root_id = await _add_account(pg_session, "Root", "NL07TEST")
+    child_id = await _add_account(pg_session, "Child", "NL07TEST", root_id)
+    leaf_id = await _add_account(pg_session, "Leaf", "NL07TEST", child_id)
+    # A child before its parent in the same statement
+    other_id, other_child_id = uuid.uuid4(), uuid.uuid4()
+    await pg_session.execute(
+        text("""
+            INSERT INTO accounts (id, name, iban, nickname, parent_id)
+            VALUES
+                (:child_id, 'Other child', 'NL07TEST', 'closure-other-child', :id),
+                (:id, 'Other', 'NL07TEST', 'closure-other', :root_id)
+            """),
+        {"id": other_id, "child_id": other_child_id, "root_id": root_id},
+    )
+    ids = [root_id, child_id, leaf_id, other_id, other_child_id]
+
+    assert (root_id, other_child_id, 2) in await _closure(pg_session, ids)
+    assert (root_id, leaf_id, 2) in await _closure(pg_session, ids)
+
+    # Move the child with its leaf below the other account
+    await pg_session.execute(
+        text("UPDATE accounts SET parent_id = :parent_id WHERE id = :id"),
+        {"id": child_id, "parent_id": other_id},
+    )
+    closure = await _closure(pg_session, ids)
+
+    assert {(a, d) for a, d, _ in closure if d == leaf_id} == {
+        (leaf_id, leaf_id),
+        (child_id, leaf_id),
+        (other_id, leaf_id),
+        (root_id, leaf_id),
+    }
+    await rebuild_account_closure(pg_session)
+    assert await _closure(pg_session, ids) == closure
+
+
+async def test_closure_cuts_parent_cycles(pg_session):
+    first_id = await _add_account(pg_session, "First", "NL08TEST")
+    second_id = await _add_account(pg_session, "Second", "NL08TEST", first_id)
+
+    await pg_session.execute(
+        text("UPDATE accounts SET parent_id = :parent_id WHERE id = :id"),
+        {"id": first_id, "parent_id": second_id},
+    )
+
+    # The parent link closing the cycle is left out
+    assert await _closure(pg_session, [first_id, second_id]) == {
+        (first_id, first_id, 0),
+        (first_id, second_id, 1),
+        (second_id, second_id, 0),
+    }
+
+
+async def test_concurrent_account_inserts(database_url):
+    engine = create_async_engine(database_url, poolclass=NullPool)
+    ids = [uuid.uuid4(), uuid.uuid4()]
+    insert = text(
+        "INSERT INTO accounts (id, name, iban, nickname) "
+        "VALUES (:id, 'Concurrent', :iban, :nickname)"
+    )
+    try:
+        async with engine.connect() as first, engine.connect() as second:
+            await first.execute(
+                insert, {"id": ids[0], "iban": "NL09TEST", "nickname": str(ids[0])}
+            )
+            # The second insert runs while the first transaction is still open
+            concurrent = asyncio.create_task(
+                second.execute(
+                    insert,
+                    {"id": ids[1], "iban": "NL10TEST", "nickname": str(ids[1])},
+                )
+            )
+            await asyncio.sleep(0.1)
+            await first.commit()
+            await concurrent
+            await second.commit()
+
+            result = await first.execute(
+                text(
+                    "SELECT count(*) FROM account_closure "
+                    "WHERE descendant_id = ANY(:ids)"
+                ),
+                {"ids": ids},
+            )
+            assert result.scalar() == 2
+    finally:
+        async with engine.begin() as connection:
+            await connection.execute(
+                text("DELETE FROM accounts WHERE id = ANY(:ids)"), {"ids": ids}
+            )
+        await engine.dispose()
@@ -0,0 +1,105 @@
+from datetime import date, datetime, timezone
+
+import pytest
+from sqlalchemy import text
+
+from finances_shared.aggregates import (
+    MonthlyTotal,
+    get_monthly_totals,
+    refresh_monthly_totals,
+)
+from finances_shared.statements import bulk_upsert_statements
+from finances_shared.tags import TagCache
+
+JANUARY = date(2004, 1, 1)
+FEBRUARY = date(2004, 2, 1)
+
+
+@pytest.fixture
+async def seeded_session(pg_session):
+    await pg_session.execute(text("""
+            INSERT INTO accounts (id, name, iban, nickname)
+            VALUES (gen_random_uuid(), 'Checking', 'NL00TOTALS', 'totals-test')
+            """))
+    await pg_session.execute(text("""
+            INSERT INTO tags (id, name)
+            VALUES
+                (gen_random_uuid(), 'totals-test-groceries'),
+                (gen_random_uuid(), 'totals-test-shared')
+            """))
+    return pg_session
+
+
+async def _add(session, day: datetime, amount: int, tags: tuple[str, ...] = ()):
+    await bulk_upsert_statements(
+        session,
+        [
+            {
+                "date": day,
+                "interest_date": day,
+                "amount": amount,
+                "account_iban": "NL00TOTALS",
+                "account_name": "Checking",
+                "tags": list(tags),
+            }
+        ],
+    )
+
+
+async def _totals(session) -> list[tuple[date, int, int]]:
+    """Totals of the untagged statements by month"""
+    totals = await get_monthly_totals(
+        session, account_iban="NL00TOTALS", tag_ids=[None]
+    )
+    return [(total.month, total.total, total.count) for total in totals]
+
+
+async def test_refresh_recomputes_only_the_given_months(seeded_session):
+    await _add(seeded_session, datetime(2004, 1, 10, tzinfo=timezone.utc), 100)
+    await _add(seeded_session, datetime(2004, 2, 10, tzinfo=timezone.utc), 200)
+    await refresh_monthly_totals(seeded_session, [JANUARY, FEBRUARY])
+
+    await _add(seeded_session, datetime(2004, 1, 31, 23, tzinfo=timezone.utc), 10)
+    await _add(seeded_session, datetime(2004, 2, 11, tzinfo=timezone.utc), 20)
+    await refresh_monthly_totals(seeded_session, [date(2004, 1, 15)])
+
+    assert await _totals(seeded_session) == [(JANUARY, 110, 2), (FEBRUARY, 200, 1)]
+
+
+async def test_second_refresh_is_idempotent(seeded_session):
+    await _add(seeded_session, datetime(2004, 1, 10, tzinfo=timezone.utc), 100)
+    await _add(seeded_session, datetime(2004, 1, 11, tzinfo=timezone.utc), -40)
+
+    first = await refresh_monthly_totals(seeded_session, [JANUARY])
+    totals = await _totals(seeded_session)
+    second = await refresh_monthly_totals(seeded_session, [JANUARY])
+
+    assert first == second == 1
+    assert await _totals(seeded_session) == totals == [(JANUARY, 60, 2)]
+
+
+async def test_statements_count_under_each_of_their_tags(seeded_session):
+    tags = await TagCache().get_ids(
+        seeded_session, ["totals-test-groceries", "totals-test-shared"]
+    )
+    day = datetime(2004, 1, 10, tzinfo=timezone.utc)
+    await _add(
+        seeded_session, day, 100, ("totals-test-groceries", "totals-test-shared")
+    )
+    await _add(seeded_session, day, 30, ("totals-test-shared",))
+    await _add(seeded_session, day, 5)
+    await refresh_monthly_totals(seeded_session, [JANUARY])
+
+    totals = await get_monthly_totals(seeded_session, account_iban="NL00TOTALS")
+
+    assert sorted(totals, key=lambda total: (total.total, total.count)) == [
+        MonthlyTotal(JANUARY, "NL00TOTALS", "Checking", None, 5, 1),
+        MonthlyTotal(
+            JANUARY, "NL00TOTALS", "Checking", tags["totals-test-groceries"], 100, 1
+        ),
+        MonthlyTotal(
+            JANUARY, "NL00TOTALS", "Checking", tags["totals-test-shared"], 130, 2
+        ),
+    ]
+    # The statement with two tags is in both of their totals
+    assert sum(total.total for total in totals) == 235
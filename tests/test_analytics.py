@@ -0,0 +1,156 @@
+import random
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from finances_shared.analytics import (
+    StatementArrays,
+    monthly_sums,
+    running_balance,
+    tag_sums,
+    top_counterparties,
+)
+
+np = pytest.importorskip("numpy")
+
+START = datetime(2024, 11, 20, tzinfo=timezone.utc)
+ACCOUNTS = [(f"NL0{n}TEST", name) for n in range(3) for name in ("Checking", "Card")]
+COUNTERPARTIES = [(f"NL99SHOP{n}", f"Shop {n}") for n in range(20)]
+TAG_IDS = [uuid.UUID(int=n) for n in range(1, 6)]
+
+
+def synthetic_statements(count: int, seed: int = 0) -> list[dict]:
+    """Statements ordered by date, with the columns `load_statement_arrays` reads"""
+    generator = random.Random(seed)
+    statements = []
+    date = START
+    for _ in range(count):
+        date += timedelta(minutes=generator.randrange(1, 240))
+        statements.append(
+            {
+                "date": date,
+                "amount": generator.randrange(-50_000, 20_000),
+                "account": generator.choice(ACCOUNTS),
+                "counterparty": (
+                    None
+                    if generator.random() < 0.1
+                    else generator.choice(COUNTERPARTIES)
+                ),
+                "tags": generator.sample(TAG_IDS, generator.randrange(0, 3)),
+            }
+        )
+    return statements
+
+
+def to_arrays(statements: list[dict]) -> StatementArrays:
+    """Encode the statements like `load_statement_arrays` does"""
+    accounts = list(dict.fromkeys(s["account"] for s in statements))
+    counterparties = list(
+        dict.fromkeys(s["counterparty"] for s in statements if s["counterparty"])
+    )
+    tag_ids = list(dict.fromkeys(t for s in statements for t in s["tags"]))
+    tag_links = [
+        (row, tag_ids.index(tag))
+        for row, statement in enumerate(statements)
+        for tag in statement["tags"]
+    ]
+    return StatementArrays(
+        date=np.array(
+            [s["date"].replace(tzinfo=None) for s in statements],
+            dtype="datetime64[us]",
+        ),
+        amount=np.array([s["amount"] for s in statements], dtype=np.int64),
+        account=np.array(
+            [accounts.index(s["account"]) for s in statements], dtype=np.int32
+        ),
+        counterparty=np.array(
+            [
+                counterparties.index(s["counterparty"]) if s["counterparty"] else -1
+                for s in statements
+            ],
+            dtype=np.int32,
+        ),
+        accounts=accounts,
+        counterparties=counterparties,
+        tag_rows=np.array([row for row, _ in tag_links], dtype=np.int64),
+        tag_codes=np.array([code for _, code in tag_links], dtype=np.int32),
+        tag_ids=tag_ids,
+    )
+
+
+@pytest.fixture(scope="module")
+def statements() -> list[dict]:
+    return synthetic_statements(1_000)
+
+
+def test_running_balance(statements):
+    balance = defaultdict(int)
+    expected = []
+    for statement in statements:
+        balance[statement["account"]] += statement["amount"]
+        expected.append(balance[statement["account"]])
+
+    assert running_balance(to_arrays(statements)).tolist() == expected
+
+
+def test_running_balance_of_a_single_account():
+    arrays = to_arrays(
+        [
+            {"date": START, "amount": amount, "account": ACCOUNTS[0]}
+            | {"counterparty": None, "tags": []}
+            for amount in (100, -30, 5)
+        ]
+    )
+
+    assert running_balance(arrays).tolist() == [100, 70, 75]
+
+
+def test_monthly_sums(statements):
+    arrays = to_arrays(statements)
+    expected = defaultdict(lambda: [0, 0])
+    for statement in statements:
+        month = statement["date"].strftime("%Y-%m")
+        key = (month, arrays.accounts.index(statement["account"]))
+        expected[key][0] += statement["amount"]
+        expected[key][1] += 1
+
+    months, accounts, sums, counts = monthly_sums(arrays)
+
+    result = {
+        (str(month), int(account)): [int(total), int(count)]
+        for month, account, total, count in zip(months, accounts, sums, counts)
+    }
+    assert result == dict(expected)
+    assert list(zip(months, accounts)) == sorted(zip(months, accounts))
+
+
+def test_tag_sums(statements):
+    arrays = to_arrays(statements)
+    expected_sums = defaultdict(int)
+    expected_counts = defaultdict(int)
+    for statement in statements:
+        for tag in statement["tags"]:
+            expected_sums[tag] += statement["amount"]
+            expected_counts[tag] += 1
+
+    sums, counts = tag_sums(arrays)
+
+    assert dict(zip(arrays.tag_ids, sums.tolist())) == expected_sums
+    assert dict(zip(arrays.tag_ids, counts.tolist())) == expected_counts
+
+
+def test_top_counterparties(statements):
+    totals = defaultdict(lambda: [0, 0])
+    for statement in statements:
+        if statement["counterparty"] is not None:
+            totals[statement["counterparty"]][0] += statement["amount"]
+            totals[statement["counterparty"]][1] += 1
+    expected = sorted(
+        ((key, total, count) for key, (total, count) in totals.items()),
+        key=lambda item: -abs(item[1]),
+    )
+
+    assert top_counterparties(to_arrays(statements), n=5) == expected[:5]
+    assert top_counterparties(to_arrays(statements), n=100) == expected
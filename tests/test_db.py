@@ -0,0 +1,118 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from finances_shared import db
+
+
+class _FakeSession:
+    """Session of a fake engine, `connection` fails when the engine is down"""
+
+    def __init__(self, engine: str, down: bool = False):
+        self.engine = engine
+        self.down = down
+        self.closed = False
+
+    async def connection(self):
+        if self.down:
+            raise OSError(f"Connection to {self.engine} refused")
+
+    async def close(self):
+        self.closed = True
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+def _replica(name: str, down: bool = False) -> db._Replica:
+    return db._Replica(
+        name=name,
+        engine=SimpleNamespace(name=name),
+        session_factory=lambda: _FakeSession(name, down),
+    )
+
+
+@pytest.fixture
+def primary(monkeypatch):
+    monkeypatch.setattr(db, "_async_session", lambda: _FakeSession("primary"))
+    monkeypatch.setattr(db, "_replicas", [])
+    monkeypatch.setattr(db, "_replica_index", 0)
+    monkeypatch.setattr(db, "_replica_ejection_seconds", 30.0)
+
+
+async def _engines(count: int, readonly: bool = True) -> list[str]:
+    engines = []
+    for _ in range(count):
+        async with db.get_db_session(readonly=readonly) as session:
+            engines.append(session.engine)
+    return engines
+
+
+async def test_readonly_sessions_are_distributed_round_robin(primary):
+    db._replicas.extend([_replica("replica-0"), _replica("replica-1")])
+
+    assert await _engines(4) == ["replica-0", "replica-1"] * 2
+    assert await _engines(1, readonly=False) == ["primary"]
+
+
+async def test_unreachable_replicas_are_ejected(primary):
+    db._replicas.extend([_replica("replica-0", down=True), _replica("replica-1")])
+
+    assert await _engines(3) == ["replica-1"] * 3
+    assert db._replicas[0].ejected_until > time.monotonic()
+    assert db._replicas[1].healthy
+
+
+async def test_ejected_replicas_rejoin_after_the_ejection_time(primary, monkeypatch):
+    monkeypatch.setattr(db, "_replica_ejection_seconds", 0.0)
+    replica = _replica("replica-0", down=True)
+    db._replicas.append(replica)
+
+    assert await _engines(1) == ["primary"]
+    replica.session_factory = lambda: _FakeSession("replica-0")
+    assert await _engines(1) == ["replica-0"]
+
+
+def test_disconnects_eject_the_replica_and_query_errors_do_not(primary):
+    replica = _replica("replica-0")
+    listener = db._ejection_listener(replica)
+
+    listener(SimpleNamespace(is_disconnect=False, original_exception=ValueError()))
+    assert replica.healthy
+
+    listener(SimpleNamespace(is_disconnect=True, original_exception=OSError()))
+    assert not replica.healthy
+
+
+async def test_reads_fall_back_to_the_primary(primary):
+    db._replicas.extend([_replica("replica-0", down=True), _replica("replica-1")])
+    db._eject_replica(db._replicas[1], OSError())
+
+    assert await _engines(2) == ["primary"] * 2
+
+
+async def test_errors_of_the_caller_are_raised_unchanged(primary):
+    errors = db._session_errors.labels("false")
+    before = errors.value
+
+    with pytest.raises(KeyError):
+        async with db.get_db_session():
+            raise KeyError("statement")
+
+    assert errors.value == before
+
+
+async def test_errors_opening_the_session_are_counted(primary, monkeypatch):
+    monkeypatch.setattr(db, "_async_session", lambda: _FakeSession("primary", True))
+    errors = db._session_errors.labels("false")
+    before = errors.value
+
+    with pytest.raises(RuntimeError, match="Connection to primary refused"):
+        async with db.get_db_session():
+            pass
+
+    assert errors.value == before + 1
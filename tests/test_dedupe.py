@@ -0,0 +1,54 @@
+from contextlib import asynccontextmanager
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import text
+
+from finances_shared.rabbitmq import dedupe
+from finances_shared.rabbitmq.dedupe import PostgresDedupeStore
+
+
+@pytest.fixture
+def stores(pg_session, monkeypatch):
+    """Stores of two workers, sharing the rolled back session of the test"""
+
+    @asynccontextmanager
+    async def get_db_session():
+        yield pg_session
+
+    monkeypatch.setattr(dedupe, "get_db_session", get_db_session)
+    return PostgresDedupeStore("dedupe-test"), PostgresDedupeStore("dedupe-test")
+
+
+async def test_processed_ids_are_seen_by_every_worker(stores):
+    first, second = stores
+
+    assert await first.seen(["a", "b"]) == set()
+    await first.mark(["a"])
+
+    assert await second.seen(["a", "b"]) == {"a"}
+    # Marking again is not an error
+    await second.mark(["a", "b"])
+    assert await first.seen(["a", "b"]) == {"a", "b"}
+
+
+async def test_ids_are_scoped_to_the_queue(stores):
+    first, _ = stores
+    await first.mark(["a"])
+
+    assert await PostgresDedupeStore("dedupe-other").seen(["a"]) == set()
+
+
+async def test_prune_forgets_expired_ids(stores, pg_session):
+    first, _ = stores
+    await first.mark(["old", "new"])
+    await pg_session.execute(text("""
+            UPDATE processed_messages
+            SET processed_at = now() - interval '8 days'
+            WHERE queue = 'dedupe-test' AND message_id = 'old'
+            """))
+
+    assert await first.prune(timedelta(days=7)) == 1
+
+    # A new worker does not have the ids in its local cache
+    assert await PostgresDedupeStore("dedupe-test").seen(["old", "new"]) == {"new"}
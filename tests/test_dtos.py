@@ -0,0 +1,115 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from finances_shared.dtos import (
+    AccountDTO,
+    StatementDTO,
+    TagDTO,
+    dump_statements,
+    load_statements,
+)
+from finances_shared.serializers import (
+    JsonSerializer,
+    MsgpackSerializer,
+    OrjsonSerializer,
+    msgpack,
+    orjson,
+)
+
+DATE = datetime(2025, 6, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+
+serializers = [JsonSerializer]
+if orjson is not None:
+    serializers.append(OrjsonSerializer)
+if msgpack is not None:
+    serializers.append(MsgpackSerializer)
+
+
+def _statements() -> list[StatementDTO]:
+    return [
+        StatementDTO(
+            date=DATE,
+            interest_date=DATE.replace(hour=0, minute=0, second=0, microsecond=0),
+            amount=-1250,
+            account_iban="NL00TEST",
+            account_name="Checking",
+            counterparty_iban="NL99SHOP",
+            counterparty_name="Shop – ümlaut",
+            description="Card payment",
+            tags=("groceries", "shared"),
+        ),
+        StatementDTO(
+            date=DATE, interest_date=DATE, amount=100_000, account_iban="NL00TEST"
+        ),
+    ]
+
+
+@pytest.fixture(params=serializers, ids=lambda serializer: serializer.__name__)
+def serializer(request):
+    return request.param()
+
+
+def test_statements_survive_the_wire(serializer):
+    statements = _statements()
+
+    body = dump_statements(statements, serializer)
+
+    assert load_statements(body, serializer.content_type) == statements
+
+
+def test_accounts_and_tags_survive_the_wire(serializer):
+    parent = AccountDTO(iban="NL00TEST", name="Checking", nickname="main")
+    dtos = [
+        parent,
+        AccountDTO(iban="NL00TEST", name="Card", nickname="card", parent_id=parent.id),
+        TagDTO(name="groceries", color="#00ff00"),
+        TagDTO(name="rent"),
+    ]
+
+    for dto in dtos:
+        values = serializer.loads(serializer.dumps(dto.to_wire()))
+        assert type(dto).from_wire(values) == dto
+
+
+def test_wire_format_is_positional():
+    statement = _statements()[1]
+
+    assert JsonSerializer().loads(dump_statements([statement])) == [
+        [
+            str(statement.id),
+            DATE.isoformat(),
+            DATE.isoformat(),
+            100_000,
+            "NL00TEST",
+            "",
+            None,
+            None,
+            None,
+            [],
+        ]
+    ]
+
+
+def test_from_dict_matches_the_wire_format():
+    statement = _statements()[0]
+    data = {
+        "id": str(statement.id),
+        "date": statement.date.isoformat(),
+        "interest_date": statement.interest_date.isoformat(),
+        "amount": statement.amount,
+        "account_iban": statement.account_iban,
+        "account_name": statement.account_name,
+        "counterparty_iban": statement.counterparty_iban,
+        "counterparty_name": statement.counterparty_name,
+        "description": statement.description,
+        "tags": list(statement.tags),
+    }
+
+    assert StatementDTO.from_dict(data) == statement
+
+
+@pytest.mark.parametrize("body", [b"[[1, 2]]", b"[1]", b'{"id": 1}'])
+def test_load_statements_rejects_malformed_bodies(body):
+    with pytest.raises(ValueError):
+        load_statements(body)
@@ -0,0 +1,112 @@
+import uuid
+from datetime import date, datetime, timezone
+
+import pytest
+from sqlalchemy import text
+
+from finances_shared.partitions import create_statement_partition
+from tests.plans import explain, plan_values
+
+# The seeded statements span two weeks, the lookups select a single day of them
+START = datetime(2001, 6, 1, tzinfo=timezone.utc)
+DAY_START = datetime(2001, 6, 3, tzinfo=timezone.utc)
+DAY_END = datetime(2001, 6, 4, tzinfo=timezone.utc)
+
+
+async def _used_indexes(session, query: str, params: dict) -> set[str]:
+    plan = await explain(session, query, params)
+    # The indexes of the partitions are named after their partition, report the
+    # index of the partitioned table they belong to instead
+    used = set()
+    for name in plan_values(plan, "Index Name"):
+        root = await session.scalar(
+            text(
+                "SELECT coalesce(pg_partition_root(CAST(:name AS regclass)), "
+                "CAST(:name AS regclass))::text"
+            ),
+            {"name": name},
+        )
+        used.add(root)
+    return used
+
+
+@pytest.fixture
+async def seeded_session(pg_session):
+    # Rolled back inserts of earlier runs leave statements_default and its
+    # indexes bloated, which changes the plans. A partition created in this
+    # transaction starts out empty.
+    await create_statement_partition(pg_session, date(2001, 6, 1))
+    # Sub-accounts share the IBAN of their bank account, so the natural key
+    # index leading with account_iban alone is not selective for them
+    await pg_session.execute(text("""
+            INSERT INTO accounts (id, name, iban, nickname)
+            SELECT gen_random_uuid(), name, 'NL0' || n || 'TEST', 'test-' || n || name
+            FROM unnest(ARRAY['Checking', 'Savings', 'Holiday', 'Taxes']) AS name,
+                generate_series(0, 4) AS n
+            UNION ALL
+            SELECT gen_random_uuid(), 'Shop ' || n, 'NL99SHOP' || n, 'shop-' || n
+            FROM generate_series(0, 49) AS n
+            """))
+    await pg_session.execute(
+        text("""
+            INSERT INTO statements
+                (id, date, interest_date, amount, account_iban, account_name,
+                 counterparty_iban, counterparty_name)
+            SELECT
+                gen_random_uuid(),
+                CAST(:start AS timestamptz) + make_interval(mins => n * 10),
+                CAST(:start AS timestamptz),
+                n,
+                'NL0' || n % 5 || 'TEST',
+                (ARRAY['Checking', 'Savings', 'Holiday', 'Taxes'])[n / 5 % 4 + 1],
+                'NL99SHOP' || n % 50,
+                'Shop ' || n % 50
+            FROM generate_series(1, 2000) AS n
+            """),
+        {"start": START},
+    )
+    await pg_session.execute(text("ANALYZE statements"))
+    await pg_session.execute(text("ANALYZE tags_to_statement"))
+    # The seeded tables are tiny, only an unusable index should make the planner
+    # fall back to a sequential scan
+    await pg_session.execute(text("SET LOCAL enable_seqscan = off"))
+    return pg_session
+
+
+@pytest.mark.parametrize(
+    ("query", "params", "index"),
+    [
+        (
+            "SELECT id, date FROM statements "
+            "WHERE date >= :start AND date < :end ORDER BY date DESC, id DESC",
+            {"start": DAY_START, "end": DAY_END},
+            "ix_statements_date_id",
+        ),
+        (
+            "SELECT date, amount FROM statements "
+            "WHERE account_iban = :iban AND account_name = :name "
+            "AND date >= :start AND date < :end",
+            {
+                "iban": "NL00TEST",
+                "name": "Checking",
+                "start": DAY_START,
+                "end": DAY_END,
+            },
+            "ix_statements_account_date",
+        ),
+        (
+            "SELECT id FROM statements "
+            "WHERE counterparty_iban = :iban AND counterparty_name = :name",
+            {"iban": "NL99SHOP7", "name": "Shop 7"},
+            "ix_statements_counterparty",
+        ),
+        (
+            "SELECT tag_id FROM tags_to_statement WHERE statement_id = :id",
+            {"id": uuid.uuid4()},
+            "ix_tags_to_statement_statement_id_tag_id",
+        ),
+    ],
+    ids=["date-range", "source-account", "counterparty", "tags-by-statement"],
+)
+async def test_lookup_uses_index(seeded_session, query, params, index):
+    assert await _used_indexes(seeded_session, query, params) == {index}
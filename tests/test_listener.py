@@ -0,0 +1,261 @@
+import asyncio
+import logging
+
+from finances_shared.rabbitmq.dedupe import MemoryDedupeStore
+from finances_shared.rabbitmq.listener import (
+    DEFAULT_PREFETCH_COUNT,
+    RabbitMQListener,
+    _consumed_messages,
+)
+from finances_shared.serializers import get_serializer
+from tests.fakes import FakeIncomingMessage, FakeQueue, connect_listener
+
+logger = logging.getLogger("tests.listener")
+
+
+def _message(index: int, message_id: str | None = None) -> FakeIncomingMessage:
+    return FakeIncomingMessage(
+        get_serializer().dumps({"index": index}), message_id=message_id
+    )
+
+
+def _listen(listener: RabbitMQListener, queue: FakeQueue, messages: int):
+    connect_listener(listener, queue)
+    for index in range(messages):
+        queue.put(_message(index, message_id=str(index)))
+
+
+async def test_consume_acks_handled_and_requeues_failed_messages():
+    queue = FakeQueue()
+    listener = RabbitMQListener("consume", prefetch_count=5)
+    _listen(listener, queue, 4)
+
+    async def handle(message):
+        if message.message_id == "2":
+            raise ValueError("bad statement")
+
+    consuming = asyncio.create_task(listener.consume(handle, logger))
+    await queue.wait_settled(4)
+    await listener.stop(logger)
+    await consuming
+
+    outcomes = {m.message_id: (m.outcome, m.requeue) for m in queue.settled}
+    assert outcomes == {
+        "0": ("ack", False),
+        "1": ("ack", False),
+        "2": ("reject", True),
+        "3": ("ack", False),
+    }
+    assert _consumed_messages.labels("consume", "ack").value == 3
+    assert _consumed_messages.labels("consume", "nack").value == 1
+
+
+async def test_consume_rejects_failed_messages_without_requeue():
+    queue = FakeQueue()
+    listener = RabbitMQListener("consume-reject", requeue_on_error=False)
+    _listen(listener, queue, 1)
+
+    async def handle(message):
+        raise ValueError("bad statement")
+
+    consuming = asyncio.create_task(listener.consume(handle, logger))
+    await queue.wait_settled(1)
+    await listener.stop(logger)
+    await consuming
+
+    assert (queue.settled[0].outcome, queue.settled[0].requeue) == ("reject", False)
+
+
+async def test_consume_bounds_running_handlers():
+    queue = FakeQueue()
+    listener = RabbitMQListener("consume-bounded", prefetch_count=10, max_in_flight=3)
+    _listen(listener, queue, 30)
+    running = peak = 0
+
+    async def handle(message):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.001)
+        running -= 1
+
+    consuming = asyncio.create_task(listener.consume(handle, logger))
+    await queue.wait_settled(30)
+    await listener.stop(logger)
+    await consuming
+
+    assert peak == 3
+    assert all(message.outcome == "ack" for message in queue.settled)
+
+
+async def test_consume_without_prefetch_count_uses_the_default():
+    queue = FakeQueue()
+    listener = RabbitMQListener("consume-default-prefetch")
+    _listen(listener, queue, 30)
+    queue.prefetch_count = None  # As if the broker had no QoS yet
+    running = peak = 0
+
+    async def handle(message):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.001)
+        running -= 1
+
+    consuming = asyncio.create_task(listener.consume(handle, logger))
+    await queue.wait_settled(30)
+    await listener.stop(logger)
+    await consuming
+
+    assert queue.prefetch_count == DEFAULT_PREFETCH_COUNT
+    assert peak == DEFAULT_PREFETCH_COUNT
+
+
+def test_prefetch_count_defaults_to_max_in_flight():
+    listener = RabbitMQListener("consume-max-in-flight", max_in_flight=4)
+
+    assert (listener.prefetch_count, listener.max_in_flight) == (4, 4)
+
+
+async def test_stop_drains_in_flight_messages():
+    queue = FakeQueue()
+    listener = RabbitMQListener("consume-drain", prefetch_count=4)
+    _listen(listener, queue, 10)
+    started = asyncio.Event()
+
+    async def handle(message):
+        started.set()
+        await asyncio.sleep(0.05)
+
+    consuming = asyncio.create_task(listener.consume(handle, logger))
+    await started.wait()
+    await listener.stop(logger, timeout=5)
+
+    # Only the prefetched messages were delivered, all of them were finished
+    assert [message.outcome for message in queue.settled] == ["ack"] * 4
+    assert listener.in_flight == 0
+    assert listener.connection is None
+    await asyncio.wait_for(consuming, 1)
+
+
+async def test_stop_cancels_handlers_after_the_timeout():
+    queue = FakeQueue()
+    listener = RabbitMQListener("consume-timeout", prefetch_count=2)
+    _listen(listener, queue, 2)
+    started = asyncio.Event()
+
+    async def handle(message):
+        started.set()
+        await asyncio.sleep(10)
+
+    consuming = asyncio.create_task(listener.consume(handle, logger))
+    await started.wait()
+    await listener.stop(logger, timeout=0.01)
+    await asyncio.wait_for(consuming, 1)
+
+    # Unsettled messages are redelivered by the broker once the channel closes
+    assert listener.in_flight == 0
+    assert all(message.outcome != "ack" for message in queue.settled)
+
+
+async def test_consume_skips_processed_messages():
+    queue = FakeQueue()
+    store = MemoryDedupeStore()
+    await store.mark(["1"])
+    listener = RabbitMQListener("consume-dedupe", dedupe=store)
+    _listen(listener, queue, 3)
+    handled = []
+
+    async def handle(message):
+        handled.append(message.message_id)
+
+    consuming = asyncio.create_task(listener.consume(handle, logger))
+    await queue.wait_settled(3)
+    await listener.stop(logger)
+    await consuming
+
+    assert sorted(handled) == ["0", "2"]
+    assert all(message.outcome == "ack" for message in queue.settled)
+    assert await store.seen(["0", "1", "2"]) == {"0", "1", "2"}
+    assert _consumed_messages.labels("consume-dedupe", "duplicate").value == 1
+
+
+async def test_consume_batch_acks_the_whole_batch():
+    queue = FakeQueue()
+    listener = RabbitMQListener("consume-batch", prefetch_count=10)
+    _listen(listener, queue, 7)
+    batches = []
+
+    async def handle_batch(payloads):
+        batches.append([payload["index"] for payload in payloads])
+
+    consuming = asyncio.create_task(
+        listener.consume_batch(handle_batch, logger, batch_size=5, batch_timeout_ms=10)
+    )
+    await queue.wait_settled(7)
+    await listener.stop(logger)
+    await consuming
+
+    assert batches == [[0, 1, 2, 3, 4], [5, 6]]
+    assert [message.outcome for message in queue.settled] == ["ack"] * 7
+
+
+async def test_consume_batch_prefetches_a_batch_by_default():
+    queue = FakeQueue()
+    listener = RabbitMQListener("consume-batch-prefetch")
+    _listen(listener, queue, 25)
+    batches = []
+
+    async def handle_batch(payloads):
+        batches.append(len(payloads))
+
+    consuming = asyncio.create_task(
+        listener.consume_batch(handle_batch, logger, batch_size=25)
+    )
+    await queue.wait_settled(25)
+    await listener.stop(logger)
+    await consuming
+
+    assert queue.prefetch_count == 25
+    assert batches == [25]
+
+
+async def test_consume_batch_rejects_undecodable_messages():
+    queue = FakeQueue()
+    listener = RabbitMQListener("consume-batch-invalid")
+    connect_listener(listener, queue)
+    queue.put(FakeIncomingMessage(b"not json", message_id="broken"))
+    queue.put(_message(1, message_id="1"))
+    batches = []
+
+    async def handle_batch(payloads):
+        batches.append(payloads)
+
+    consuming = asyncio.create_task(
+        listener.consume_batch(handle_batch, logger, batch_timeout_ms=10)
+    )
+    await queue.wait_settled(2)
+    await listener.stop(logger)
+    await consuming
+
+    outcomes = {m.message_id: (m.outcome, m.requeue) for m in queue.settled}
+    assert outcomes == {"broken": ("reject", False), "1": ("ack", False)}
+    assert batches == [[{"index": 1}]]
+
+
+async def test_stop_before_consume_keeps_the_listener_stopped():
+    queue = FakeQueue()
+    listener = RabbitMQListener("consume-stopped")
+    _listen(listener, queue, 1)
+    handled = []
+
+    async def handle(message):
+        handled.append(message.message_id)
+
+    # SIGTERM between connect() and consume()
+    await listener.stop(logger)
+    await asyncio.wait_for(listener.consume(handle, logger), 1)
+
+    assert listener.connection is None
+    assert queue._dispatcher is None
+    assert handled == []
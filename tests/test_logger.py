@@ -0,0 +1,267 @@
+import asyncio
+import io
+import json
+import logging
+import queue
+import sys
+from datetime import datetime, timezone
+
+import pytest
+
+from finances_shared.logger import (
+    BoundedQueueHandler,
+    CustomJsonFormatter,
+    FastJsonFormatter,
+    RateLimitFilter,
+    SamplingFilter,
+    _log_format,
+    add_global_log_context,
+    add_log_context,
+    context_filter,
+    log_context,
+)
+
+
+def _record(msg, *args, exc_info=None) -> logging.LogRecord:
+    return logging.getLogger("tests.logger").makeRecord(
+        "tests.logger", logging.INFO, __file__, 42, msg, args, exc_info
+    )
+
+
+def _error_info():
+    try:
+        raise ValueError("bad statement")
+    except ValueError:
+        return sys.exc_info()
+
+
+@pytest.mark.parametrize(
+    "record",
+    [
+        _record("Sent %d statements to %s", 3, "statements"),
+        _record({"size": 120, "status": "sending", "queue": "statements"}),
+        _record("Could not send", exc_info=_error_info()),
+    ],
+    ids=["percent-args", "dict", "exception"],
+)
+def test_queued_records_format_like_sync_records(record):
+    formatter = FastJsonFormatter()
+    handler = BoundedQueueHandler(queue.Queue())
+
+    sync = json.loads(formatter.format(logging.makeLogRecord(record.__dict__)))
+    queued = json.loads(formatter.format(handler.prepare(record)))
+
+    assert queued == sync
+    assert list(queued) == list(sync)
+
+
+def test_queued_dict_messages_keep_their_keys():
+    handler = BoundedQueueHandler(queue.Queue())
+    record = handler.prepare(_record({"size": 120, "status": "sending"}))
+
+    output = json.loads(FastJsonFormatter().format(record))
+
+    assert output["message"] == ""
+    assert (output["size"], output["status"]) == (120, "sending")
+
+
+def test_full_queue_drops_records():
+    handler = BoundedQueueHandler(queue.Queue(maxsize=2), overflow="drop")
+    for index in range(5):
+        handler.handle(_record("Statement %d", index))
+
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_full_queue_blocks_before_dropping():
+    handler = BoundedQueueHandler(
+        queue.Queue(maxsize=1), overflow="block", block_timeout=0.01
+    )
+    handler.handle(_record("first"))
+    handler.handle(_record("second"))
+
+    assert handler.dropped == 1
+    assert handler.queue.get_nowait().getMessage() == "first"
+
+
+def test_stream_output_of_queued_logger(monkeypatch):
+    from finances_shared import logger as logger_module
+
+    stream = io.StringIO()
+    monkeypatch.setattr(
+        logger_module,
+        "_get_stream_handler",
+        lambda: _stream_handler(stream),
+    )
+    queued_logger = logger_module.get_logger("tests.logger.queued", queued=True)
+    try:
+        queued_logger.info({"count": 2, "status": "sent"})
+        queued_logger.info("Sent %d statements", 2)
+    finally:
+        logger_module.stop_log_queue()
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [(line["message"], line.get("count")) for line in lines] == [
+        ("", 2),
+        ("Sent 2 statements", None),
+    ]
+
+
+def _stream_handler(stream) -> logging.Handler:
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(FastJsonFormatter())
+    return handler
+
+
+def test_stopped_log_queue_detaches_from_its_loggers(monkeypatch):
+    from finances_shared import logger as logger_module
+
+    stream = io.StringIO()
+    monkeypatch.setattr(
+        logger_module,
+        "_get_stream_handler",
+        lambda: _stream_handler(stream),
+    )
+    queued_logger = logger_module.get_logger("tests.logger.stopped", queued=True)
+    queue_handler = logger_module.start_log_queue()
+    logger_module.stop_log_queue()
+
+    queued_logger.info("Written after the queue stopped")
+
+    assert queue_handler not in queued_logger.handlers
+    assert json.loads(stream.getvalue())["message"] == (
+        "Written after the queue stopped"
+    )
+
+
+class _Records(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records: list[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord):
+        self.records.append(record)
+
+
+@pytest.fixture
+def context_logger(monkeypatch):
+    """Logger with the context filter, the global context is restored after"""
+    monkeypatch.setattr(
+        context_filter, "_global_context", context_filter._global_context
+    )
+    logger = logging.getLogger("tests.logger.context")
+    handler = _Records()
+    logger.addHandler(handler)
+    logger.addFilter(context_filter)
+    yield logger, handler.records
+    logger.removeHandler(handler)
+    logger.removeFilter(context_filter)
+
+
+async def test_log_context_is_isolated_between_tasks(context_logger):
+    logger, records = context_logger
+
+    async def handle(request_id: str):
+        add_log_context(request_id=request_id)
+        # Let the other task set its context before logging
+        await asyncio.sleep(0)
+        logger.warning("Handling %s", request_id)
+
+    await asyncio.gather(handle("first"), handle("second"))
+    logger.warning("Done")
+
+    assert [(r.getMessage(), getattr(r, "request_id", None)) for r in records] == [
+        ("Handling first", "first"),
+        ("Handling second", "second"),
+        ("Done", None),
+    ]
+
+
+async def test_global_log_context_is_shared_by_every_task(context_logger):
+    logger, records = context_logger
+
+    async def start():
+        add_global_log_context(service="statements", worker=1)
+        add_log_context(request_id="start")
+
+    await asyncio.create_task(start())
+    with log_context(worker=2):
+        logger.warning("Handling")
+
+    [record] = records
+    assert (record.service, record.worker) == ("statements", 2)
+    assert not hasattr(record, "request_id")
+
+
+@pytest.mark.parametrize(
+    "record",
+    [
+        _record("Sent %d statements to %s", 3, "statements"),
+        _record({"size": 120, "status": "sending", "queue": "statements"}),
+        _record("Could not send", exc_info=_error_info()),
+    ],
+    ids=["percent-args", "dict", "exception"],
+)
+def test_fast_formatter_matches_custom_formatter(record):
+    fields = {
+        **record.__dict__,
+        "request_id": "abc",
+        "attempt": 2,
+        "sent_at": datetime(2025, 6, 1, 12, tzinfo=timezone.utc),
+    }
+    custom = CustomJsonFormatter(_log_format).format(logging.makeLogRecord(fields))
+    fast = FastJsonFormatter().format(logging.makeLogRecord(fields))
+
+    assert list(json.loads(fast).items()) == list(json.loads(custom).items())
+
+
+def _throttled(log_filter: logging.Filter, records: list[logging.LogRecord]):
+    """The records the filter keeps"""
+    return [record for record in records if log_filter.filter(record)]
+
+
+def _records(count: int, level: int = logging.INFO, lineno: int = 42):
+    return [
+        logging.getLogger("tests.logger").makeRecord(
+            "tests.logger", level, __file__, lineno, "Record %d", (index,), None
+        )
+        for index in range(count)
+    ]
+
+
+def test_sampling_keeps_every_nth_record_of_a_call_site():
+    sampling = SamplingFilter(0.25)
+
+    kept = _throttled(sampling, _records(12))
+
+    assert [record.args[0] for record in kept] == [0, 4, 8]
+    assert [getattr(record, "suppressed", 0) for record in kept] == [0, 3, 3]
+    # Another call site is sampled on its own
+    assert len(_throttled(sampling, _records(4, lineno=43))) == 1
+
+
+@pytest.mark.parametrize(
+    "log_filter",
+    [SamplingFilter(0.1), RateLimitFilter(1, clock=lambda: 0.0)],
+    ids=["sampling", "rate-limit"],
+)
+def test_warnings_always_pass_the_throttle_filters(log_filter):
+    warnings = _records(5, logging.WARNING) + _records(5, logging.ERROR)
+
+    assert _throttled(log_filter, warnings) == warnings
+
+
+def test_rate_limit_allows_a_burst_then_refills_at_the_rate():
+    now = 100.0
+    rate_limit = RateLimitFilter(rate=2, burst=3, clock=lambda: now)
+
+    assert len(_throttled(rate_limit, _records(5))) == 3
+
+    now += 1.0  # two tokens
+    kept = _throttled(rate_limit, _records(5))
+    assert len(kept) == 2
+    assert kept[0].suppressed == 2
+
+    now += 10.0  # refills up to the burst only
+    assert len(_throttled(rate_limit, _records(5))) == 3
@@ -0,0 +1,61 @@
+import pytest
+
+from finances_shared import metrics
+
+
+@pytest.fixture
+def registry(monkeypatch) -> metrics.MetricsRegistry:
+    registry = metrics.MetricsRegistry()
+    monkeypatch.setattr(metrics, "registry", registry)
+    return registry
+
+
+def test_render_prometheus_counters_have_the_total_suffix(registry):
+    metrics.counter("jobs", "Finished jobs").inc(3)
+    metrics.counter("messages", "Messages", ("queue",)).labels("statements").inc()
+
+    assert metrics.render_prometheus() == (
+        "# HELP jobs Finished jobs\n"
+        "# TYPE jobs counter\n"
+        "jobs_total 3\n"
+        "# HELP messages Messages\n"
+        "# TYPE messages counter\n"
+        'messages_total{queue="statements"} 1\n'
+    )
+
+
+def test_render_prometheus_histogram_buckets_are_cumulative(registry):
+    seconds = metrics.histogram(
+        "publish_seconds", "Publish latency", ("queue",), buckets=(1.0, 0.5, 2.5)
+    ).labels("statements")
+    for value in (0.125, 0.5, 0.75, 3):
+        seconds.observe(value)
+
+    assert metrics.render_prometheus() == (
+        "# HELP publish_seconds Publish latency\n"
+        "# TYPE publish_seconds histogram\n"
+        'publish_seconds_bucket{queue="statements",le="0.5"} 2\n'
+        'publish_seconds_bucket{queue="statements",le="1"} 3\n'
+        'publish_seconds_bucket{queue="statements",le="2.5"} 3\n'
+        'publish_seconds_bucket{queue="statements",le="+Inf"} 4\n'
+        'publish_seconds_sum{queue="statements"} 4.375\n'
+        'publish_seconds_count{queue="statements"} 4\n'
+    )
+
+
+def test_render_prometheus_escapes_label_values(registry):
+    metrics.gauge("in_flight", "In flight", ("queue",)).labels(
+        'C:\\queues\n"statements"'
+    ).set(2.5)
+
+    assert metrics.render_prometheus().splitlines()[-1] == (
+        'in_flight{queue="C:\\\\queues\\n\\"statements\\""} 2.5'
+    )
+
+
+def test_registry_rejects_a_name_of_another_type(registry):
+    metrics.counter("jobs", "Finished jobs")
+
+    with pytest.raises(ValueError):
+        metrics.gauge("jobs", "Finished jobs")
+    assert metrics.counter("jobs", "Finished jobs") is metrics.counter("jobs", "")
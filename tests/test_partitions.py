@@ -0,0 +1,81 @@
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+
+from finances_shared.partitions import (
+    STATEMENTS_DEFAULT_PARTITION,
+    create_statement_partition,
+    statement_partition_name,
+)
+from tests.plans import explain, plan_values
+
+# Far enough in the past that the migration did not create these partitions
+MONTHS = [date(2001, 5, 1), date(2001, 6, 1), date(2001, 7, 1)]
+
+
+async def _seed(session, months: list[date], per_month: int = 20):
+    await session.execute(
+        text(
+            "INSERT INTO accounts (id, name, iban, nickname) "
+            "VALUES (gen_random_uuid(), 'Checking', 'NL00TEST', 'partitions-test')"
+        )
+    )
+    for month in months:
+        await session.execute(
+            text("""
+                INSERT INTO statements
+                    (id, date, interest_date, amount, account_iban, account_name)
+                SELECT
+                    gen_random_uuid(),
+                    CAST(:start AS timestamptz) + make_interval(hours => n),
+                    CAST(:start AS timestamptz),
+                    n,
+                    'NL00TEST',
+                    'Checking'
+                FROM generate_series(1, :count) AS n
+                """),
+            {
+                "start": datetime(month.year, month.month, 1, tzinfo=timezone.utc),
+                "count": per_month,
+            },
+        )
+
+
+async def _rows_per_partition(session) -> dict[str, int]:
+    result = await session.execute(
+        text(
+            "SELECT tableoid::regclass::text, count(*) FROM statements "
+            "WHERE account_iban = 'NL00TEST' GROUP BY 1"
+        )
+    )
+    return dict(result.all())
+
+
+async def test_create_statement_partition_moves_rows_out_of_the_default(pg_session):
+    await _seed(pg_session, MONTHS)
+    assert await _rows_per_partition(pg_session) == {STATEMENTS_DEFAULT_PARTITION: 60}
+
+    assert await create_statement_partition(pg_session, date(2001, 6, 15))
+    assert not await create_statement_partition(pg_session, MONTHS[1])
+
+    assert await _rows_per_partition(pg_session) == {
+        STATEMENTS_DEFAULT_PARTITION: 40,
+        "statements_y2001m06": 20,
+    }
+
+
+async def test_month_filter_prunes_to_one_partition(pg_session):
+    await _seed(pg_session, MONTHS)
+    for month in MONTHS:
+        await create_statement_partition(pg_session, month)
+
+    plan = await explain(
+        pg_session,
+        "SELECT * FROM statements WHERE date >= :start AND date < :end",
+        {
+            "start": datetime(2001, 6, 1, tzinfo=timezone.utc),
+            "end": datetime(2001, 7, 1, tzinfo=timezone.utc),
+        },
+    )
+
+    assert plan_values(plan, "Relation Name") == {statement_partition_name(MONTHS[1])}
@@ -0,0 +1,181 @@
+import asyncio
+import gc
+import logging
+
+import aio_pika
+import pytest
+from aio_pika.exceptions import DeliveryError
+
+from finances_shared.params import RabbitMQParams
+from finances_shared.rabbitmq.producer import (
+    RabbitMQProducer,
+    _publish_errors,
+    _published_messages,
+)
+from finances_shared.serializers import decode_body
+from tests.fakes import FakeConnection, FakeExchange, connect_producer
+
+logger = logging.getLogger("tests.producer")
+
+
+def _statements(count: int) -> list[dict]:
+    return [{"index": index, "amount": index * 100} for index in range(count)]
+
+
+async def test_send_many_publishes_every_message():
+    exchange = FakeExchange()
+    producer = connect_producer(RabbitMQProducer("send-many"), exchange)
+
+    count = await producer.send_many(_statements(10), logger)
+
+    assert count == 10
+    assert [decode_body(m.body, m.content_type) for m in exchange.published] == (
+        _statements(10)
+    )
+
+
+async def test_send_many_bounds_unconfirmed_publishes():
+    exchange = FakeExchange(confirm_delay=0.001)
+    producer = connect_producer(RabbitMQProducer("send-many-bounded"), exchange)
+
+    assert await producer.send_many(_statements(50), logger, max_in_flight=4) == 50
+    assert exchange.max_in_flight == 4
+
+
+async def test_send_many_raises_when_a_publish_is_rejected():
+    queue = "send-many-rejected"
+    exchange = FakeExchange(
+        confirm_delay=0.001,
+        reject=lambda message: decode_body(message.body)["index"] == 1,
+    )
+    producer = connect_producer(RabbitMQProducer(queue), exchange)
+    loop = asyncio.get_running_loop()
+    unretrieved = []
+    loop.set_exception_handler(lambda loop, context: unretrieved.append(context))
+
+    # The rejected publish finishes long before the last message is handed out
+    with pytest.raises(DeliveryError):
+        await producer.send_many(_statements(6), logger, max_in_flight=2)
+
+    assert len(exchange.published) == _published_messages.labels(queue).value
+    assert _publish_errors.labels(queue).value == 1
+    assert len(exchange.published) < 6
+    assert not any(
+        task.get_coro().__name__ == "_publish" for task in asyncio.all_tasks()
+    )
+    gc.collect()
+    loop.set_exception_handler(None)
+    assert unretrieved == []
+
+
+async def test_send_many_returns_the_confirmed_count():
+    exchange = FakeExchange()
+    producer = connect_producer(RabbitMQProducer("send-many-count"), exchange)
+
+    assert await producer.send_many(iter(_statements(3)), logger) == 3
+    assert await producer.send_many([], logger) == 0
+
+
+async def test_enqueue_resolves_once_the_batch_is_confirmed():
+    exchange = FakeExchange(confirm_delay=0.001)
+    producer = connect_producer(
+        RabbitMQProducer("batching", batch_size=4, batch_interval=0.01), exchange
+    )
+    producer.start_batching(logger)
+
+    confirmations = await asyncio.gather(
+        *(producer.enqueue(message) for message in _statements(10))
+    )
+    await producer.stop_batching()
+
+    assert confirmations == ["ack"] * 10
+    assert len(exchange.published) == 10
+
+
+async def test_enqueue_fails_for_rejected_messages_only():
+    exchange = FakeExchange(
+        reject=lambda message: decode_body(message.body)["index"] == 2
+    )
+    producer = connect_producer(RabbitMQProducer("batching-rejected"), exchange)
+    producer.start_batching(logger)
+
+    results = await asyncio.gather(
+        *(producer.enqueue(message) for message in _statements(4)),
+        return_exceptions=True,
+    )
+    await producer.stop_batching()
+
+    assert isinstance(results[2], DeliveryError)
+    assert [result for i, result in enumerate(results) if i != 2] == ["ack"] * 3
+
+
+async def test_enqueue_fails_for_unserializable_messages_only(recwarn):
+    exchange = FakeExchange()
+    producer = connect_producer(RabbitMQProducer("batching-unserializable"), exchange)
+    producer.start_batching(logger)
+    messages = _statements(4)
+    messages[2]["amount"] = object()
+
+    results = await asyncio.gather(
+        *(producer.enqueue(message) for message in messages),
+        return_exceptions=True,
+    )
+    await producer.stop_batching()
+    gc.collect()
+
+    assert isinstance(results[2], TypeError)
+    assert [result for i, result in enumerate(results) if i != 2] == ["ack"] * 3
+    assert not [w for w in recwarn if "never awaited" in str(w.message)]
+
+
+async def test_reconnect_closes_the_previous_channel_pool(monkeypatch):
+    connections = []
+
+    async def connect_robust(url, heartbeat):
+        connections.append(FakeConnection())
+        return connections[-1]
+
+    monkeypatch.setattr(aio_pika, "connect_robust", connect_robust)
+    producer = RabbitMQProducer("reconnect-pool", pool_size=2)
+    await producer.connect(RabbitMQParams("localhost", 5672, "guest", "guest"), logger)
+    await producer.send_message({"index": 0}, logger)
+    previous_pool = producer.pool
+
+    await connections[0].close()
+    await producer.send_message({"index": 1}, logger)
+
+    assert len(connections) == 2
+    assert producer.pool is not previous_pool
+    assert previous_pool.stats().size == 0
+    assert len(connections[1].exchange.published) == 1
+
+
+@pytest.mark.parametrize(
+    ("options", "same_id"),
+    [({}, False), ({"content_message_ids": True}, True)],
+    ids=["random", "content"],
+)
+async def test_identical_messages_get_message_ids(options, same_id):
+    exchange = FakeExchange()
+    producer = connect_producer(RabbitMQProducer("message-ids", **options), exchange)
+
+    await producer.send_many([{"amount": 100}, {"amount": 100}], logger)
+
+    first, second = (message.message_id for message in exchange.published)
+    assert (first == second) is same_id
+
+
+async def test_message_ids_from_a_natural_key():
+    exchange = FakeExchange()
+    producer = connect_producer(
+        RabbitMQProducer(
+            "message-ids-key",
+            message_id=lambda message: f"statement:{message['index']}",
+            content_message_ids=True,
+        ),
+        exchange,
+    )
+
+    await producer.send_many(_statements(2), logger)
+
+    assert [m.message_id for m in exchange.published] == ["statement:0", "statement:1"]
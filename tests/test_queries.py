@@ -0,0 +1,109 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import InvalidRequestError
+
+from finances_shared.models import Statements
+from finances_shared.queries import get_statements, get_statements_page
+
+STATEMENTS = 60
+START = datetime(2001, 7, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+async def seeded_session(pg_session):
+    await pg_session.execute(text("""
+            INSERT INTO accounts (id, name, iban, nickname)
+            VALUES
+                (gen_random_uuid(), 'Checking', 'NL00QUERY', 'queries-test-checking'),
+                (gen_random_uuid(), 'Shop', 'NL99QUERY', 'queries-test-shop')
+            """))
+    await pg_session.execute(
+        text("""
+            INSERT INTO statements
+                (id, date, interest_date, amount, account_iban, account_name,
+                 counterparty_iban, counterparty_name)
+            SELECT
+                gen_random_uuid(),
+                CAST(:start AS timestamptz) + make_interval(hours => n),
+                CAST(:start AS timestamptz),
+                n,
+                'NL00QUERY',
+                'Checking',
+                'NL99QUERY',
+                'Shop'
+            FROM generate_series(1, :count) AS n
+            """),
+        {"start": START, "count": STATEMENTS},
+    )
+    await pg_session.execute(text("""
+            INSERT INTO tags (id, name)
+            VALUES
+                (gen_random_uuid(), 'queries-test-groceries'),
+                (gen_random_uuid(), 'queries-test-shopping')
+            """))
+    await pg_session.execute(text("""
+            INSERT INTO tags_to_statement (tag_id, statement_id, statement_date)
+            SELECT tags.id, statements.id, statements.date
+            FROM tags CROSS JOIN statements
+            WHERE tags.name LIKE 'queries-test-%'
+                AND statements.account_iban = 'NL00QUERY'
+            """))
+    return pg_session
+
+
+def _touch(statements: list[Statements], load: str):
+    """Access what the preset promises to load, anything else raises"""
+    for statement in statements:
+        if load in ("list", "detail"):
+            assert statement.source_account.nickname == "queries-test-checking"
+            assert statement.destination_account.nickname == "queries-test-shop"
+        if load == "detail":
+            assert len(statement.tags) == 2
+
+
+@pytest.mark.parametrize("limit", [5, 50])
+@pytest.mark.parametrize(("load", "queries"), [("rows", 1), ("list", 1), ("detail", 2)])
+async def test_presets_use_a_fixed_number_of_queries(
+    seeded_session, query_count, load, queries, limit
+):
+    query_count.clear()
+
+    statements = await get_statements(
+        seeded_session, Statements.account_iban == "NL00QUERY", load=load, limit=limit
+    )
+    _touch(statements, load)
+
+    assert len(statements) == limit
+    assert len(query_count) == queries
+
+
+@pytest.mark.parametrize(("load", "queries"), [("rows", 1), ("list", 1), ("detail", 2)])
+async def test_pages_use_a_fixed_number_of_queries(
+    seeded_session, query_count, load, queries
+):
+    query_count.clear()
+    page = await get_statements_page(
+        seeded_session, Statements.account_iban == "NL00QUERY", limit=25, load=load
+    )
+    page = await get_statements_page(
+        seeded_session,
+        Statements.account_iban == "NL00QUERY",
+        after=page.next_cursor,
+        limit=25,
+        load=load,
+    )
+    _touch(page.statements, load)
+
+    assert len(page.statements) == 25
+    assert len(query_count) == 2 * queries
+
+
+async def test_rows_preset_raises_instead_of_lazy_loading(seeded_session):
+    (statement,) = await get_statements(
+        seeded_session, Statements.account_iban == "NL00QUERY", load="rows", limit=1
+    )
+
+    with pytest.raises(InvalidRequestError, match="lazy='raise'"):
+        statement.tags
@@ -0,0 +1,147 @@
+import asyncio
+import os
+import signal
+import threading
+import time
+from pathlib import Path
+
+from finances_shared.params import RabbitMQParams
+from finances_shared.rabbitmq.runner import ConsumerRunner, WorkerContext, _run_worker
+from tests.fakes import FakeRabbitMQListener
+
+PARAMS = RabbitMQParams("localhost", 5672, "guest", "guest")
+# Directory the spawned workers of a test write their progress to
+RUNNER_DIR = "FINANCES_TEST_RUNNER_DIR"
+
+
+def _runner(main, workers: int = 1, **kwargs) -> ConsumerRunner:
+    return ConsumerRunner(
+        main,
+        "runner-test",
+        workers=workers,
+        listener_factory=FakeRabbitMQListener,
+        params=PARAMS,
+        restart_delay=0,
+        with_db=False,
+        logger_name="tests.runner",
+        **kwargs,
+    )
+
+
+async def _noop(message):
+    pass
+
+
+async def _crash(ctx: WorkerContext):
+    raise RuntimeError("worker crashed")
+
+
+async def _finish(ctx: WorkerContext):
+    pass
+
+
+async def _consume_slowly(ctx: WorkerContext):
+    directory = Path(os.environ[RUNNER_DIR])
+
+    async def handle(message):
+        (directory / "started").touch()
+        await asyncio.sleep(0.5)
+        (directory / "done").touch()
+
+    await ctx.listener.consume(handle, ctx.logger)
+
+
+async def test_run_worker_connects_the_listener_for_main():
+    contexts = []
+
+    async def main(ctx: WorkerContext):
+        contexts.append(ctx)
+        consuming = asyncio.create_task(ctx.listener.consume(_noop, ctx.logger))
+        await ctx.listener.fake_queue.wait_settled(3)
+        await ctx.listener.stop(ctx.logger)
+        await consuming
+
+    await _run_worker(
+        3,
+        main,
+        "runner-test",
+        FakeRabbitMQListener,
+        {"messages": 3, "prefetch_count": 2},
+        PARAMS,
+        0,
+        1.0,
+        False,
+        "tests.runner",
+    )
+
+    [ctx] = contexts
+    assert ctx.index == 3
+    assert ctx.listener.prefetch_count == 2
+    assert [m.outcome for m in ctx.listener.fake_queue.settled] == ["ack"] * 3
+    assert ctx.listener.connection is None
+
+
+async def test_run_worker_drains_in_flight_messages_on_sigterm():
+    contexts = []
+
+    async def main(ctx: WorkerContext):
+        contexts.append(ctx)
+
+        async def handle(message):
+            os.kill(os.getpid(), signal.SIGTERM)
+            await asyncio.sleep(0.1)
+
+        # Returns once the SIGTERM handler stopped the listener
+        await ctx.listener.consume(handle, ctx.logger)
+
+    await _run_worker(
+        0,
+        main,
+        "runner-test",
+        FakeRabbitMQListener,
+        {"messages": 3, "prefetch_count": 1},
+        PARAMS,
+        0,
+        1.0,
+        False,
+        "tests.runner",
+    )
+
+    # The message being handled was acked, the others were never delivered
+    [ctx] = contexts
+    assert [(m.message_id, m.outcome) for m in ctx.listener.fake_queue.settled] == [
+        ("0", "ack")
+    ]
+
+
+def test_run_does_not_restart_finished_workers():
+    runner = _runner(_finish, workers=2, max_restarts=1)
+
+    assert runner.run() == 0
+    assert runner._restarts == []
+
+
+def test_run_gives_up_when_the_restart_budget_is_spent():
+    runner = _runner(_crash, max_restarts=2)
+
+    assert runner.run() == 1
+    assert len(runner._restarts) == 2
+
+
+def test_run_forwards_sigterm_and_waits_for_the_drain(tmp_path, monkeypatch):
+    monkeypatch.setenv(RUNNER_DIR, str(tmp_path))
+    runner = _runner(_consume_slowly, listener_kwargs={"messages": 1})
+
+    def _terminate_when_started():
+        deadline = time.monotonic() + 30
+        while not (tmp_path / "started").exists():
+            if time.monotonic() > deadline:
+                return
+            time.sleep(0.01)
+        os.kill(os.getpid(), signal.SIGTERM)
+
+    threading.Thread(target=_terminate_when_started, daemon=True).start()
+
+    assert runner.run() == 0
+    assert (tmp_path / "done").exists()
+    assert runner._restarts == []
@@ -0,0 +1,63 @@
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from finances_shared.serializers import (
+    JSON_CONTENT_TYPE,
+    MSGPACK_CONTENT_TYPE,
+    JsonSerializer,
+    MsgpackSerializer,
+    OrjsonSerializer,
+    decode_body,
+    get_serializer,
+    msgpack,
+    orjson,
+)
+
+STATEMENT_ID = uuid.UUID("6f1c1c1e-8d5a-4c39-9f0e-7d8a1b2c3d4e")
+DATE = datetime(2025, 6, 1, 12, 30, tzinfo=timezone.utc)
+
+json_serializers = [JsonSerializer]
+if orjson is not None:
+    json_serializers.append(OrjsonSerializer)
+
+
+@pytest.mark.parametrize("serializer_class", json_serializers)
+def test_json_serializers_encode_datetime_uuid_and_decimal(serializer_class):
+    serializer = serializer_class()
+    payload = {"id": STATEMENT_ID, "date": DATE, "rate": Decimal("1.0825")}
+
+    assert serializer.content_type == JSON_CONTENT_TYPE
+    assert serializer.loads(serializer.dumps(payload)) == {
+        "id": str(STATEMENT_ID),
+        "date": "2025-06-01T12:30:00+00:00",
+        "rate": "1.0825",
+    }
+
+
+@pytest.mark.skipif(msgpack is None, reason="msgpack is not installed")
+def test_msgpack_decodes_like_the_json_serializers():
+    serializer = MsgpackSerializer()
+    payload = {"id": STATEMENT_ID, "date": DATE, "amount": -1250}
+    body = serializer.dumps(payload)
+
+    assert serializer.content_type == MSGPACK_CONTENT_TYPE
+    assert decode_body(body, MSGPACK_CONTENT_TYPE) == {
+        "id": str(STATEMENT_ID),
+        "date": "2025-06-01T12:30:00+00:00",
+        "amount": -1250,
+    }
+    assert decode_body(body, MSGPACK_CONTENT_TYPE) == decode_body(
+        JsonSerializer().dumps(payload)
+    )
+
+
+def test_decode_body_selects_the_serializer_by_content_type():
+    body = get_serializer().dumps({"amount": 1})
+
+    assert decode_body(body) == {"amount": 1}
+    assert decode_body(body, JSON_CONTENT_TYPE) == {"amount": 1}
+    with pytest.raises(ValueError):
+        decode_body(body, "application/x-unknown")
@@ -0,0 +1,160 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import text
+
+from finances_shared.dtos import StatementDTO
+from finances_shared.statements import bulk_upsert_statements
+
+DATE = datetime(2002, 3, 4, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+async def seeded_session(pg_session):
+    await pg_session.execute(text("""
+            INSERT INTO accounts (id, name, iban, nickname)
+            VALUES
+                (gen_random_uuid(), 'Checking', 'NL00UPSERT', 'upsert-test-checking'),
+                (gen_random_uuid(), 'Shop', 'NL99UPSERT', 'upsert-test-shop')
+            """))
+    await pg_session.execute(text("""
+            INSERT INTO tags (id, name)
+            VALUES
+                (gen_random_uuid(), 'upsert-test-groceries'),
+                (gen_random_uuid(), 'upsert-test-shopping')
+            """))
+    return pg_session
+
+
+def _statement(amount: int, **values) -> dict:
+    return {
+        "date": DATE,
+        "interest_date": DATE,
+        "amount": amount,
+        "account_iban": "NL00UPSERT",
+        "account_name": "Checking",
+        "counterparty_iban": "NL99UPSERT",
+        "counterparty_name": "Shop",
+        **values,
+    }
+
+
+async def _rows(session) -> list:
+    result = await session.execute(text("""
+            SELECT id, amount, counterparty_iban, description
+            FROM statements
+            WHERE account_iban = 'NL00UPSERT'
+            ORDER BY amount, counterparty_iban NULLS FIRST
+            """))
+    return result.all()
+
+
+async def _tags(session) -> set[tuple[int, str]]:
+    result = await session.execute(text("""
+            SELECT statements.amount, tags.name
+            FROM tags_to_statement
+            JOIN statements ON statements.id = tags_to_statement.statement_id
+            JOIN tags ON tags.id = tags_to_statement.tag_id
+            WHERE statements.account_iban = 'NL00UPSERT'
+            """))
+    return {tuple(row) for row in result}
+
+
+async def test_counts_inserted_and_updated_statements(seeded_session):
+    await bulk_upsert_statements(seeded_session, [_statement(1), _statement(2)])
+
+    result = await bulk_upsert_statements(
+        seeded_session,
+        [_statement(2, description="updated"), StatementDTO(**_statement(3))],
+    )
+
+    assert (result.inserted, result.updated) == (1, 1)
+    assert [(row.amount, row.description) for row in await _rows(seeded_session)] == [
+        (1, None),
+        (2, "updated"),
+        (3, None),
+    ]
+
+
+async def test_duplicates_in_the_input_are_collapsed(seeded_session):
+    result = await bulk_upsert_statements(
+        seeded_session, [_statement(1), _statement(1), _statement(1)]
+    )
+
+    assert (result.inserted, result.updated) == (1, 0)
+    assert len(await _rows(seeded_session)) == 1
+
+
+async def test_empty_input_writes_nothing(seeded_session):
+    result = await bulk_upsert_statements(seeded_session, [])
+
+    assert (result.inserted, result.updated, result.tagged) == (0, 0, 0)
+
+
+async def test_null_counterparties_match_on_the_natural_key(seeded_session):
+    statement = _statement(1, counterparty_iban=None, counterparty_name=None)
+    await bulk_upsert_statements(seeded_session, [statement])
+
+    result = await bulk_upsert_statements(
+        seeded_session, [{**statement, "description": "updated"}]
+    )
+
+    assert (result.inserted, result.updated) == (0, 1)
+    assert [
+        (row.counterparty_iban, row.description) for row in await _rows(seeded_session)
+    ] == [(None, "updated")]
+
+
+async def test_links_known_tags(seeded_session):
+    result = await bulk_upsert_statements(
+        seeded_session,
+        [
+            _statement(1, tags=["upsert-test-groceries", "upsert-test-unknown"]),
+            _statement(2, tags=["upsert-test-groceries", "upsert-test-shopping"]),
+        ],
+    )
+
+    assert result.tagged == 3
+    assert await _tags(seeded_session) == {
+        (1, "upsert-test-groceries"),
+        (2, "upsert-test-groceries"),
+        (2, "upsert-test-shopping"),
+    }
+
+    # Links that already exist are not counted again
+    result = await bulk_upsert_statements(
+        seeded_session, [_statement(1, tags=["upsert-test-groceries"])]
+    )
+    assert result.tagged == 0
+
+
+async def test_existing_statements_keep_their_id(seeded_session):
+    await bulk_upsert_statements(seeded_session, [_statement(1)])
+    [existing] = await _rows(seeded_session)
+
+    await bulk_upsert_statements(seeded_session, [_statement(1, id=uuid.uuid4())])
+
+    assert [row.id for row in await _rows(seeded_session)] == [existing.id]
+
+
+async def test_rejects_an_id_used_for_another_natural_key(seeded_session):
+    await bulk_upsert_statements(seeded_session, [_statement(1)])
+    [existing] = await _rows(seeded_session)
+
+    with pytest.raises(ValueError, match=str(existing.id)):
+        await bulk_upsert_statements(seeded_session, [_statement(2, id=existing.id)])
+
+    assert [row.amount for row in await _rows(seeded_session)] == [1]
+
+
+async def test_rejects_an_id_used_twice_in_the_input(seeded_session):
+    statement_id = uuid.uuid4()
+
+    with pytest.raises(ValueError, match=str(statement_id)):
+        await bulk_upsert_statements(
+            seeded_session,
+            [_statement(1, id=statement_id), _statement(2, id=statement_id)],
+        )
+
+    assert await _rows(seeded_session) == []
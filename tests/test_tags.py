@@ -0,0 +1,132 @@
+import uuid
+
+import pytest
+from sqlalchemy import text
+
+from finances_shared.tags import TagCache, assign_tags
+
+
+@pytest.fixture
+async def tag_ids(pg_session) -> dict[str, uuid.UUID]:
+    ids = {name: uuid.uuid4() for name in ("tags-test-groceries", "tags-test-rent")}
+    for name, tag_id in ids.items():
+        await _add_tag(pg_session, name, tag_id)
+    return ids
+
+
+async def _add_tag(session, name: str, tag_id: uuid.UUID):
+    await session.execute(
+        text("INSERT INTO tags (id, name) VALUES (:id, :name)"),
+        {"id": tag_id, "name": name},
+    )
+
+
+async def test_get_ids_loads_the_tags_once(pg_session, tag_ids, query_count):
+    cache = TagCache()
+
+    for _ in range(3):
+        assert await cache.get_ids(pg_session, tag_ids) == tag_ids
+
+    assert len(query_count) == 1
+
+
+async def test_unknown_names_do_not_reload_the_tags(pg_session, tag_ids, query_count):
+    cache = TagCache()
+    names = [*tag_ids, "tags-test-unknown"]
+
+    for _ in range(3):
+        assert await cache.get_ids(pg_session, names) == tag_ids
+    assert await cache.get_ids(pg_session, ["tags-test-unknown"]) == {}
+
+    assert len(query_count) == 1
+
+
+async def test_new_unknown_names_reload_the_tags(pg_session, tag_ids, query_count):
+    cache = TagCache()
+    assert await cache.get_ids(pg_session, ["tags-test-unknown"]) == {}
+    tax_id = uuid.uuid4()
+    await _add_tag(pg_session, "tags-test-taxes", tax_id)
+
+    ids = await cache.get_ids(pg_session, ["tags-test-taxes", "tags-test-unknown"])
+
+    assert ids == {"tags-test-taxes": tax_id}
+    assert sum(statement.startswith("SELECT") for statement in query_count) == 2
+
+
+async def test_unknown_names_are_kept_across_reloads(pg_session, tag_ids, query_count):
+    cache = TagCache()
+    assert await cache.get_ids(pg_session, ["tags-test-unknown"]) == {}
+    assert await cache.get_ids(pg_session, ["tags-test-other"]) == {}
+
+    # Both names are remembered, neither reloads the tags again
+    for name in ("tags-test-unknown", "tags-test-other"):
+        assert await cache.get_ids(pg_session, [name]) == {}
+    assert len(query_count) == 2
+
+    cache.invalidate()
+    assert await cache.get_ids(pg_session, ["tags-test-other"]) == {}
+    assert await cache.get_ids(pg_session, ["tags-test-unknown"]) == {}
+    assert len(query_count) == 4
+
+
+async def test_unknown_names_are_retried_after_the_ttl(pg_session, tag_ids):
+    cache = TagCache(ttl=0)
+    assert await cache.get_ids(pg_session, ["tags-test-taxes"]) == {}
+    tax_id = uuid.uuid4()
+    await _add_tag(pg_session, "tags-test-taxes", tax_id)
+
+    assert await cache.get_ids(pg_session, ["tags-test-taxes"]) == {
+        "tags-test-taxes": tax_id
+    }
+
+
+@pytest.fixture
+async def statement_id(pg_session) -> uuid.UUID:
+    statement_id = uuid.uuid4()
+    await pg_session.execute(text("""
+            INSERT INTO accounts (id, name, iban, nickname)
+            VALUES (gen_random_uuid(), 'Checking', 'NL00TAGS', 'tags-test-checking')
+            """))
+    await pg_session.execute(
+        text("""
+            INSERT INTO statements
+                (id, date, interest_date, amount, account_iban, account_name)
+            VALUES (:id, '2003-04-05', '2003-04-05', 1, 'NL00TAGS', 'Checking')
+            """),
+        {"id": statement_id},
+    )
+    return statement_id
+
+
+async def _links(session, statement_id: uuid.UUID) -> set[uuid.UUID]:
+    result = await session.execute(
+        text("SELECT tag_id FROM tags_to_statement WHERE statement_id = :id"),
+        {"id": statement_id},
+    )
+    return set(result.scalars())
+
+
+async def test_assign_tags_skips_unknown_statements(pg_session, tag_ids, statement_id):
+    unknown_id = uuid.uuid4()
+
+    assigned = await assign_tags(
+        pg_session,
+        {statement_id: ["tags-test-groceries"], unknown_id: ["tags-test-rent"]},
+        cache=TagCache(),
+    )
+
+    assert assigned == 1
+    assert await _links(pg_session, statement_id) == {tag_ids["tags-test-groceries"]}
+    assert await _links(pg_session, unknown_id) == set()
+
+
+async def test_deleting_a_statement_deletes_its_links(
+    pg_session, tag_ids, statement_id
+):
+    await assign_tags(pg_session, {statement_id: list(tag_ids)}, cache=TagCache())
+
+    await pg_session.execute(
+        text("DELETE FROM statements WHERE id = :id"), {"id": statement_id}
+    )
+
+    assert await _links(pg_session, statement_id) == set()